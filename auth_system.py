@@ -1,11 +1,19 @@
 import json
 import os
 import hashlib
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
 import streamlit as st
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 
-DB_FILE = "users_db.json"
+DB_FILE = "users.db"
+# Old JSON store, imported into DB_FILE the first time the database is created
+LEGACY_DB_FILE = "users_db.json"
+
+USER_FIELDS = ["password", "role", "plan", "plan_start_date", "plan_expiry_date", "pages_used_cycle", "total_pages_used"]
+USER_DEFAULTS = {"role": "user", "plan": "None", "pages_used_cycle": 0, "total_pages_used": 0}
 
 # Plan Definitions
 PLANS = {
@@ -18,60 +26,118 @@ PLANS = {
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
-def load_db():
-    if not os.path.exists(DB_FILE):
-        return init_db()
-    
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def _connect():
+    """
+    Opens the SQLite user store. WAL lets Streamlit sessions read while another
+    one writes; every function opens its own short-lived connection because
+    sqlite3 connections can't be shared between Streamlit's threads.
+    """
+    global _schema_ready
+    conn = sqlite3.connect(DB_FILE, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    with _schema_lock:
+        if not _schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT PRIMARY KEY,
+                    password TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    plan TEXT NOT NULL,
+                    plan_start_date TEXT,
+                    plan_expiry_date TEXT,
+                    pages_used_cycle INTEGER NOT NULL DEFAULT 0,
+                    total_pages_used INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            if conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
+                init_db(conn)
+            _schema_ready = True
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+@contextmanager
+def _transaction(conn):
+    # IMMEDIATE takes the write lock up front, so reads inside see no concurrent writes
+    conn.execute("BEGIN IMMEDIATE")
     try:
-        with open(DB_FILE, "r") as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Database Error: {e}")
-        return {"users": {}}
-
-def init_db():
-    """Initializes the local JSON DB with default admin."""
-    admin_data = {
-        "password": hash_password("9157199960"),
-        "role": "admin",
-        "plan": "Admin",
-        "plan_start_date": str(datetime.now().date()),
-        "plan_expiry_date": str((datetime.now() + relativedelta(years=100)).date()),
-        "pages_used_cycle": 0,
-        "total_pages_used": 0
-    }
-    
-    db = {"users": {"admin": admin_data}}
-    save_db(db)
-    return db
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def _row_to_user(row):
+    return {k: row[k] for k in USER_FIELDS} if row else None
+
+def _fetch_user(conn, username):
+    # username is the primary key, so this is an index lookup
+    return _row_to_user(conn.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone())
+
+def _upsert_users(conn, users):
+    conn.executemany(
+        "INSERT OR REPLACE INTO users (username, " + ", ".join(USER_FIELDS) + ") VALUES (?" + ", ?" * len(USER_FIELDS) + ")",
+        [(name,) + tuple(u.get(k, USER_DEFAULTS.get(k)) for k in USER_FIELDS) for name, u in users.items()],
+    )
+
+def load_db():
+    """Snapshot of the whole store in the old JSON layout ({"users": {name: {...}}})."""
+    with closing(_connect()) as conn:
+        rows = conn.execute("SELECT * FROM users").fetchall()
+    return {"users": {row["username"]: _row_to_user(row) for row in rows}}
+
+def init_db(conn):
+    """Fills an empty store: users from the old JSON file if there is one, else the default admin."""
+    users = None
+    if os.path.exists(LEGACY_DB_FILE):
+        try:
+            with open(LEGACY_DB_FILE, "r") as f:
+                users = json.load(f).get("users")
+        except Exception as e:
+            print(f"Database Error: could not migrate {LEGACY_DB_FILE}: {e}")
+
+    if not users:
+        admin_data = {
+            "password": hash_password("9157199960"),
+            "role": "admin",
+            "plan": "Admin",
+            "plan_start_date": str(datetime.now().date()),
+            "plan_expiry_date": str((datetime.now() + relativedelta(years=100)).date()),
+            "pages_used_cycle": 0,
+            "total_pages_used": 0
+        }
+        users = {"admin": admin_data}
+
+    with _transaction(conn):
+        _upsert_users(conn, users)
 
 def save_db(db):
-    with open(DB_FILE, "w") as f:
-        json.dump(db, f, indent=4)
+    """Writes every user of a load_db() style dict back to the store."""
+    with closing(_connect()) as conn, _transaction(conn):
+        _upsert_users(conn, db["users"])
 
 def register_user(username, password):
-    db = load_db()
-    if username in db["users"]:
+    today = str(datetime.now().date())
+    try:
+        with closing(_connect()) as conn, _transaction(conn):
+            conn.execute(
+                "INSERT INTO users (username, password, role, plan, plan_start_date, plan_expiry_date, pages_used_cycle, total_pages_used) "
+                "VALUES (?, ?, 'user', 'None', ?, ?, 0, 0)",
+                (username, hash_password(password), today, today),
+            )
+    except sqlite3.IntegrityError:
         return False, "Username already taken."
-    
-    db["users"][username] = {
-        "password": hash_password(password),
-        "role": "user",
-        "plan": "None",
-        "plan_start_date": str(datetime.now().date()),
-        "plan_expiry_date": str(datetime.now().date()),
-        "pages_used_cycle": 0,
-        "total_pages_used": 0
-    }
-    save_db(db)
     return True, "Registration successful. Please ask Admin to assign a plan."
 
 def authenticate(username, password):
-    db = load_db()
-    if username not in db["users"]:
+    with closing(_connect()) as conn:
+        user = _fetch_user(conn, username)
+    if user is None:
         return False, None
     
-    user = db["users"][username]
     if user["password"] == hash_password(password):
         return True, user
     return False, None
@@ -80,10 +146,6 @@ def assign_plan(username, plan_type):
     if plan_type not in PLANS:
         return False, "Invalid plan type."
     
-    db = load_db()
-    if username not in db["users"]:
-        return False, "User not found."
-    
     plan_info = PLANS[plan_type]
     now = datetime.now().date()
     
@@ -93,28 +155,26 @@ def assign_plan(username, plan_type):
     else:
         expiry = now # Expired immediately
 
-    db["users"][username]["plan"] = plan_type
-    db["users"][username]["plan_start_date"] = str(now)
-    db["users"][username]["plan_expiry_date"] = str(expiry)
-    db["users"][username]["pages_used_cycle"] = 0 # Reset usage on new plan
-    
-    save_db(db)
+    with closing(_connect()) as conn, _transaction(conn):
+        # Reset usage on new plan
+        updated = conn.execute(
+            "UPDATE users SET plan = ?, plan_start_date = ?, plan_expiry_date = ?, pages_used_cycle = 0 WHERE username = ?",
+            (plan_type, str(now), str(expiry), username),
+        ).rowcount
+    if not updated:
+        return False, "User not found."
     return True, f"Assigned {plan_type} to {username}."
 
-def check_quota(username, pages_to_process):
-    db = load_db()
-    user = db["users"].get(username)
-    if not user: return False, "User not found."
-    if user["role"] == "admin": return True, "Admin"
-
+def _quota_error(user, pages_to_process):
+    """Why the user may not process this many pages, or None if allowed."""
     plan = user.get("plan", "None")
     if plan == "None":
-        return False, "No active plan. Contact Admin."
+        return "No active plan. Contact Admin."
 
     # Check Expiry
     expiry = datetime.strptime(user["plan_expiry_date"], "%Y-%m-%d").date()
     if datetime.now().date() > expiry:
-        return False, "Plan expired. Contact Admin."
+        return "Plan expired. Contact Admin."
 
     # Check Silver Plan Quota (Monthly Reset Logic)
     if plan == "Silver":
@@ -133,27 +193,58 @@ def check_quota(username, pages_to_process):
         
         limit = PLANS["Silver"]["pages"]
         if user["pages_used_cycle"] + pages_to_process > limit:
-            return False, f"Quota exceeded. Used: {user['pages_used_cycle']}/{limit} pages."
+            return f"Quota exceeded. Used: {user['pages_used_cycle']}/{limit} pages."
+    return None
 
+def check_quota(username, pages_to_process):
+    with closing(_connect()) as conn:
+        user = _fetch_user(conn, username)
+    if not user: return False, "User not found."
+    if user["role"] == "admin": return True, "Admin"
+
+    error = _quota_error(user, pages_to_process)
+    if error:
+        return False, error
     return True, "Allowed"
 
+def consume_quota(username, pages_processed):
+    """
+    Checks the quota and records the usage in one transaction, so two sessions
+    of the same user can't both pass the check and overrun the plan.
+    Returns (allowed, message) like check_quota.
+    """
+    with closing(_connect()) as conn, _transaction(conn):
+        user = _fetch_user(conn, username)
+        if not user:
+            return False, "User not found."
+        if user["role"] != "admin":
+            error = _quota_error(user, pages_processed)
+            if error:
+                return False, error
+        _add_usage(conn, username, pages_processed)
+    return True, "Allowed"
+
+def _add_usage(conn, username, pages_processed):
+    conn.execute(
+        "UPDATE users SET pages_used_cycle = pages_used_cycle + ?, total_pages_used = total_pages_used + ? WHERE username = ?",
+        (pages_processed, pages_processed, username),
+    )
+
 def update_usage(username, pages_processed):
-    db = load_db()
-    if username in db["users"]:
-        db["users"][username]["pages_used_cycle"] += pages_processed
-        db["users"][username]["total_pages_used"] += pages_processed
-        save_db(db)
+    with closing(_connect()) as conn, _transaction(conn):
+        _add_usage(conn, username, pages_processed)
 
 def get_user_info(username):
-    db = load_db()
-    return db["users"].get(username)
+    with closing(_connect()) as conn:
+        return _fetch_user(conn, username)
 
 def get_all_users():
-    db = load_db()
+    with closing(_connect()) as conn:
+        rows = conn.execute("SELECT * FROM users ORDER BY rowid").fetchall()
     # Return list of dicts with username included
     users = []
-    for k, v in db["users"].items():
-        u = v.copy()
-        u["username"] = k
+    for row in rows:
+        u = _row_to_user(row)
+        u["username"] = row["username"]
         users.append(u)
-    return users
\ No newline at end of file
+    return users
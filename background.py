@@ -0,0 +1,56 @@
+import threading
+
+class LatestWorker:
+    """
+    One daemon thread running func(item) over the items of the latest
+    submit(). A new submit replaces whatever was still queued, since the UI
+    only cares about what it is showing now. Exceptions are printed and the
+    worker moves on to the next item.
+    """
+    def __init__(self, func, name="worker"):
+        self.func = func
+        self.name = name
+        self._pending = []
+        self._busy = False
+        self._wake = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def submit(self, items):
+        with self._wake:
+            if self._closed:
+                return
+            self._pending = list(items)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._wake.notify()
+
+    def idle(self):
+        """True when nothing is queued or running."""
+        with self._wake:
+            return not self._pending and not self._busy
+
+    def close(self):
+        """Drops the queue and waits for the item in progress, if any, to finish."""
+        with self._wake:
+            self._closed = True
+            self._pending = []
+            self._wake.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._wake:
+                self._busy = False
+                while not self._pending and not self._closed:
+                    self._wake.wait()
+                if self._closed:
+                    return
+                item = self._pending.pop(0)
+                self._busy = True
+            try:
+                self.func(item)
+            except Exception as e:
+                print(f"{self.name} error: {e}")
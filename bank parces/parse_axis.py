@@ -1,57 +1,61 @@
 import re
 import pandas as pd
-import pdfplumber
-from utils import clean_amount, get_save_path, get_cropped_page
+from utils import get_save_path, get_cropped_page, iter_pages, write_rows_to_excel
+from progress import track
+from timing import stage, counter
+from tokenizer import tokenize_line, leading_date, amounts
 
-def parse_axis(pdf_path, password=None, areas=None):
-    rows = []
+COLUMNS = ["Txn Date", "Chq No", "Description", "Debit", "Credit", "Balance", "Branch Code"]
+
+def iter_transactions(pdf_path, password=None, areas=None, progress=None, backend=None):
+    """Yields transaction rows page by page."""
     # Axis Date: DD-MM-YYYY or DD/MM/YYYY
-    date_pattern = re.compile(r"^(\d{2}[-/]\d{2}[-/]\d{4})")
-    # Amount regex: looks for numbers with 2 decimal places (e.g., 12,345.00)
+    date_pattern = re.compile(r"\d{2}[-/]\d{2}[-/]\d{4}")
+    # Amounts are tokens with 2 decimal places (e.g., 12,345.00)
     # This helps distinguish financial amounts from other numbers
-    amount_pattern = re.compile(r"((?:[\d,]*\d)\.\d{2})")
 
     running_balance = None
+    rows = []
     
-    with pdfplumber.open(pdf_path, password=password) as pdf:
-        for i, page in enumerate(pdf.pages):
-            page = get_cropped_page(page, areas, i)
+    for i, page in iter_pages(pdf_path, password, progress=progress, backend=backend):
+        page = get_cropped_page(page, areas, i)
+        with stage("extract_text", page=i):
             text = page.extract_text()
-            if not text: continue
-            lines = text.split("\n")
-            
+        counter("chars", len(text or ""), page=i)
+        if not text: continue
+        lines = text.split("\n")
+        
+        with stage("parse", page=i):
             for line in lines:
                 line = line.strip()
                 if not line: continue
+                tokens = tokenize_line(line)
 
                 # 1. Handle Opening Balance (No Date)
                 if "OPENING BALANCE" in line.upper():
-                    matches = amount_pattern.findall(line)
+                    matches = amounts(tokens)
                     if matches:
                         # The last match is the Balance
-                        bal_str = matches[-1]
-                        running_balance = clean_amount(bal_str)
-                        
+                        running_balance = matches[-1].value
+                    
                         # Branch is text after the balance
-                        # Find where the balance string ends in the line
-                        idx = line.rfind(bal_str)
-                        branch = line[idx + len(bal_str):].strip()
-                        
+                        branch = line[matches[-1].end:].strip()
+                    
                         rows.append(["", "", "OPENING BALANCE", 0.0, 0.0, running_balance, branch])
                     continue
 
                 # 2. Handle Transaction Rows
-                date_match = date_pattern.match(line)
-                if date_match:
-                    txn_date = date_match.group(1)
-                    
-                    matches = amount_pattern.findall(line)
-                    
+                date_tok = leading_date(tokens, date_pattern)
+                if date_tok:
+                    txn_date = date_tok.text
+                
+                    matches = amounts(tokens)
+                
                     if matches:
-                        current_balance = clean_amount(matches[-1])
+                        current_balance = matches[-1].value
                         debit = 0.0
                         credit = 0.0
-                        
+                    
                         # MATH LOGIC: Determine Dr/Cr based on change in balance
                         if running_balance is not None:
                             diff = round(running_balance - current_balance, 2)
@@ -63,34 +67,30 @@ def parse_axis(pdf_path, password=None, areas=None):
                             # Fallback if Opening Balance missing (rare)
                             # If 3 amounts found, assume Dr, Cr, Bal
                             if len(matches) >= 3:
-                                debit = clean_amount(matches[-3])
-                                credit = clean_amount(matches[-2])
-                        
+                                debit = matches[-3].value
+                                credit = matches[-2].value
+                    
                         # Update running balance for next row
                         running_balance = current_balance
-                        
+                    
                         # Extract Description and Branch
                         # Description is between Date and the first amount found
-                        first_amt_str = matches[0]
-                        amt_start_idx = line.find(first_amt_str)
-                        desc_part = line[len(txn_date):amt_start_idx].strip()
-                        
+                        desc_part = line[date_tok.end:matches[0].start].strip()
+                    
                         # Branch is after the last amount
-                        last_amt_str = matches[-1]
-                        last_amt_idx = line.rfind(last_amt_str)
-                        branch = line[last_amt_idx + len(last_amt_str):].strip()
+                        branch = line[matches[-1].end:].strip()
 
                         # Separate Chq No from Description
                         parts = desc_part.split()
                         chq_no = ""
                         desc = desc_part
-                        
+                    
                         if parts:
                             # Check for numeric Chq No or placeholders like NA, -
                             if (parts[0].isdigit() and len(parts[0]) > 1) or parts[0].upper() in ["NA", "N.A.", "-"]:
                                 chq_no = parts[0]
                                 desc = " ".join(parts[1:])
-                        
+                    
                         rows.append([txn_date, chq_no, desc, debit, credit, current_balance, branch])
                     else:
                         # No amounts found
@@ -100,11 +100,19 @@ def parse_axis(pdf_path, password=None, areas=None):
                     # Continuation of description for the previous row
                     rows[-1][2] += " " + line.strip()
 
-    df = pd.DataFrame(rows, columns=["Txn Date", "Chq No", "Description", "Debit", "Credit", "Balance", "Branch Code"])
+        # Hold back the last row: continuation lines on the next page still belong to it
+        counter("rows", len(rows[:-1]), page=i)
+        yield from track(rows[:-1], progress)
+        rows = rows[-1:]
+    yield from track(rows, progress)
+
+def parse_axis(pdf_path, password=None, areas=None, progress=None, backend=None):
+    rows = list(iter_transactions(pdf_path, password, areas=areas, progress=progress, backend=backend))
+    with stage("dataframe", rows=len(rows)):
+        df = pd.DataFrame(rows, columns=COLUMNS)
     return df
 
-def convert_axis(pdf_path, password=None, areas=None):
-    df = parse_axis(pdf_path, password, areas=areas)
+def convert_axis(pdf_path, password=None, areas=None, progress=None, backend=None):
     out_path = get_save_path("AXIS", pdf_path)
-    df.to_excel(out_path, index=False)
+    write_rows_to_excel(iter_transactions(pdf_path, password, areas=areas, progress=progress, backend=backend), COLUMNS, out_path)
     return out_path
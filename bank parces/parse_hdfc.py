@@ -1,119 +1,143 @@
-import re
 import pandas as pd
-import fitz  # PyMuPDF
-from utils import clean_amount, get_save_path
+from document import use_session
+from utils import get_save_path, iter_pages, write_rows_to_excel
+from progress import track
+from timing import stage, counter
+from tokenizer import TEXT, DATE, tokenize_line, leading_date, amounts
 
-def parse_hdfc(pdf_path, password=None, areas=None):
-    rows = []
-    # Support / and - in dates, anchored to start of line. Supports 01-Jan-2023 and 01/01/2023
-    date_pattern = re.compile(r"^\d{2}[/-](?:\d{2}|[A-Za-z]{3})[/-]\d{2,4}")
-    # Amount regex to find financial numbers (e.g. 12,345.00)
-    amount_pattern = re.compile(r"((?:[\d,]*\d)\.\d{2})")
+COLUMNS = ["Txn Date","Value Date","Description","Ref No.","Debit","Credit","Balance"]
 
-    doc = fitz.open(pdf_path)
-    if password:
-        doc.authenticate(password)
+def _page_rects(areas, i):
+    # Determine areas to extract from
+    page_rects = []
+    if areas:
+        if 'all' in areas:
+            page_rects = areas['all']
+        elif i in areas:
+            page_rects = areas[i]
+    return page_rects
 
-    for i, page in enumerate(doc):
-        # Determine areas to extract from
-        page_rects = []
-        if areas:
-            if 'all' in areas:
-                page_rects = areas['all']
-            elif i in areas:
-                page_rects = areas[i]
-        
-        # If no specific areas, use the whole page
-        if not page_rects:
-            page_rects = [page.rect]
+def _iter_area_texts(pdf_path, password, areas, progress, backend):
+    """
+    Yields (page_index, [text of each area]), the whole page when no areas are set.
+    By default this is PyMuPDF's sorted text, which the rules below were written
+    against; backend= reads it through a text backend (see text_backends) instead.
+    """
+    if backend is None:
+        # PyMuPDF handle of the session, closed with it
+        with use_session(pdf_path, password) as session:
+            doc = session.mupdf_doc
+            total = len(doc)
+            for i, page in enumerate(doc):
+                if progress:
+                    progress.page(i, total)
+                texts = []
+                for rect in _page_rects(areas, i) or [page.rect]:
+                    # Extract text from the specific area (clip)
+                    with stage("extract_text", page=i):
+                        texts.append(page.get_text("text", clip=rect, sort=True))
+                counter("chars", sum(len(t) for t in texts), page=i)
+                yield i, texts
+        return
 
-        for rect in page_rects:
-            # Extract text from the specific area (clip)
-            text = page.get_text("text", clip=rect, sort=True)
-            if not text: continue
-            lines = text.split("\n")
-            current_row = None
+    for i, page in iter_pages(pdf_path, password, progress=progress, backend=backend):
+        texts = []
+        for rect in _page_rects(areas, i) or [page.bbox]:
+            with stage("extract_text", page=i):
+                texts.append(page.crop(rect, relative=False, strict=False).extract_text())
+        counter("chars", sum(len(t) for t in texts), page=i)
+        yield i, texts
+
+def iter_transactions(pdf_path, password=None, areas=None, progress=None, backend=None):
+    """Yields transaction rows page by page."""
+    for i, texts in _iter_area_texts(pdf_path, password, areas, progress, backend):
+        rows = []
+        with stage("parse", page=i):
+            for text in texts:
+                if not text: continue
+                lines = text.split("\n")
+                current_row = None
             
-            for line in lines:
-                line = line.strip()
-                if not line: continue
+                for line in lines:
+                    line = line.strip()
+                    if not line: continue
 
-                # Check if line starts with a date
-                date_match = date_pattern.search(line)
-                if date_match:
-                    txn_date = date_match.group(0)
+                    # Check if line starts with a date (01/01/2023 or 01-Jan-2023)
+                    tokens = tokenize_line(line)
+                    date_tok = leading_date(tokens)
+                    if date_tok:
+                        txn_date = date_tok.text
                     
-                    # Find all amounts in the line
-                    amounts = amount_pattern.findall(line)
-                    cleaned_amts = [clean_amount(x) for x in amounts]
+                        # Find all amounts in the line
+                        amts = amounts(tokens)
                     
-                    debit = 0.0
-                    credit = 0.0
-                    balance = 0.0
+                        debit = 0.0
+                        credit = 0.0
+                        balance = 0.0
                     
-                    if not amounts:
-                        continue
+                        if not amts:
+                            continue
 
-                    first_amt_str = amounts[0]
+                        upper = line.upper()
+                        is_credit = "CR" in upper or "CREDIT" in upper
 
-                    # Logic to assign Debit/Credit/Balance based on count
-                    if len(cleaned_amts) >= 3:
-                        # HDFC Format: ... Debit Credit Balance
-                        debit = cleaned_amts[-3]
-                        credit = cleaned_amts[-2]
-                        balance = cleaned_amts[-1]
-                        first_amt_str = amounts[-3]
-                    elif len(cleaned_amts) == 2:
-                        # Ambiguous, assume Amount and Balance
-                        val = cleaned_amts[-2]
-                        balance = cleaned_amts[-1]
-                        if "CR" in line.upper() or "CREDIT" in line.upper():
-                            credit = val
-                        else:
-                            debit = val
-                        first_amt_str = amounts[-2]
-                    else:
-                        # Only 1 amount found. Assume it's the transaction amount.
-                        val = cleaned_amts[-1]
-                        if "CR" in line.upper() or "CREDIT" in line.upper():
-                            credit = val
+                        # Logic to assign Debit/Credit/Balance based on count
+                        if len(amts) >= 3:
+                            # HDFC Format: ... Debit Credit Balance
+                            debit = amts[-3].value
+                            credit = amts[-2].value
+                            balance = amts[-1].value
+                            first_amt = amts[-3]
+                        elif len(amts) == 2:
+                            # Ambiguous, assume Amount and Balance
+                            val = amts[-2].value
+                            balance = amts[-1].value
+                            if is_credit:
+                                credit = val
+                            else:
+                                debit = val
+                            first_amt = amts[-2]
                         else:
-                            debit = val
-                        first_amt_str = amounts[-1]
+                            # Only 1 amount found. Assume it's the transaction amount.
+                            val = amts[-1].value
+                            if is_credit:
+                                credit = val
+                            else:
+                                debit = val
+                            first_amt = amts[-1]
 
-                    # Extract Description: Text between Date and First Amount
-                    # Check for Value Date (often appears right after Txn Date in HDFC)
-                    desc_start_idx = len(txn_date)
-                    val_date = ""
+                        # Extract Description: Text between Date and First Amount
+                        # Check for Value Date (often appears right after Txn Date in HDFC)
+                        desc_start_idx = date_tok.end
+                        val_date = ""
                     
-                    remaining_text = line[desc_start_idx:].strip()
-                    val_date_match = date_pattern.match(remaining_text)
-                    if val_date_match:
-                        val_date = val_date_match.group(0)
-                        # Find where val_date is in the original line to adjust description start
-                        val_date_idx = line.find(val_date, desc_start_idx)
-                        if val_date_idx != -1:
-                            desc_start_idx = val_date_idx + len(val_date)
+                        following = [t for t in tokens[1:3] if t.kind != TEXT or t.text.strip()]
+                        if following and following[0].kind == DATE:
+                            val_date = following[0].text
+                            desc_start_idx = following[0].end
 
-                    idx_amt = line.find(first_amt_str, desc_start_idx)
-                    if idx_amt > -1:
-                        desc = line[desc_start_idx:idx_amt].strip()
-                    else:
-                        desc = line[desc_start_idx:].strip()
+                        if first_amt.start >= desc_start_idx:
+                            desc = line[desc_start_idx:first_amt.start].strip()
+                        else:
+                            desc = line[desc_start_idx:].strip()
                     
-                    current_row = [txn_date, val_date, desc, "", debit, credit, balance]
-                    rows.append(current_row)
+                        current_row = [txn_date, val_date, desc, "", debit, credit, balance]
+                        rows.append(current_row)
                 
-                elif current_row:
-                    # Append continuation lines
-                    if "Statement" not in line and "Page" not in line and "HDFC BANK" not in line and "Balance" not in line:
-                        current_row[2] += " " + line.strip()
+                    elif current_row:
+                        # Append continuation lines
+                        if "Statement" not in line and "Page" not in line and "HDFC BANK" not in line and "Balance" not in line:
+                            current_row[2] += " " + line.strip()
+        counter("rows", len(rows), page=i)
+        yield from track(rows, progress)
 
-    df = pd.DataFrame(rows, columns=["Txn Date","Value Date","Description","Ref No.","Debit","Credit","Balance"])
+def parse_hdfc(pdf_path, password=None, areas=None, progress=None, backend=None):
+    rows = list(iter_transactions(pdf_path, password, areas=areas, progress=progress, backend=backend))
+    with stage("dataframe", rows=len(rows)):
+        df = pd.DataFrame(rows, columns=COLUMNS)
     return df
 
-def convert_hdfc(pdf_path, password=None, areas=None):
-    df = parse_hdfc(pdf_path, password, areas=areas)
+def convert_hdfc(pdf_path, password=None, areas=None, progress=None, backend=None):
     out_path = get_save_path("HDFC", pdf_path)
-    df.to_excel(out_path, index=False)
+    write_rows_to_excel(iter_transactions(pdf_path, password, areas=areas, progress=progress, backend=backend), COLUMNS, out_path)
     return out_path
@@ -1,70 +1,72 @@
 import re
 import pandas as pd
-import pdfplumber
-from utils import clean_amount, get_save_path, get_cropped_page
+from utils import get_save_path, get_cropped_page, iter_pages, write_rows_to_excel
+from progress import track
+from timing import stage, counter
+from tokenizer import tokenize_line, first_date, amounts
 
-def parse_pnb(pdf_path, password=None, areas=None):
-    rows = []
+COLUMNS = ["Txn Date", "Value Date", "Description", "Ref No.", "Debit", "Credit", "Balance"]
+
+def iter_transactions(pdf_path, password=None, areas=None, progress=None, backend=None):
+    """Yields transaction rows page by page."""
     # PNB Date: dd/mm/yyyy. Use search because Txn No is often the first column.
-    date_pattern = re.compile(r"(\d{2}/\d{2}/\d{4})")
-    amount_pattern = re.compile(r"((?:[\d,]*\d)\.\d{2})")
+    date_pattern = re.compile(r"\d{2}/\d{2}/\d{4}")
+    # Balance of the last row yielded so far (rows only holds the current page)
+    prev_bal = None
 
-    with pdfplumber.open(pdf_path, password=password) as pdf:
-        for i, page in enumerate(pdf.pages):
-            page = get_cropped_page(page, areas, i)
+    for i, page in iter_pages(pdf_path, password, progress=progress, backend=backend):
+        page = get_cropped_page(page, areas, i)
+        with stage("extract_text", page=i):
             text = page.extract_text()
-            if not text: continue
-            lines = text.split('\n')
-            current_row = None
-            
+        counter("chars", len(text or ""), page=i)
+        if not text: continue
+        lines = text.split('\n')
+        rows = []
+        current_row = None
+        
+        with stage("parse", page=i):
             for line in lines:
                 line = line.strip()
                 if not line: continue
-                
+            
                 # Skip header lines
                 if "Txn No" in line and "Txn Date" in line:
                     continue
 
                 # Search for date
-                date_match = date_pattern.search(line)
-                if date_match:
-                    txn_date = date_match.group(1)
-                    
+                tokens = tokenize_line(line)
+                date_tok = first_date(tokens, date_pattern)
+                if date_tok:
+                    txn_date = date_tok.text
+                
                     # Text before date is Txn No
-                    pre_date = line[:date_match.start()].strip()
+                    pre_date = line[:date_tok.start].strip()
                     txn_no = pre_date
-                    
-                    # Text after date
-                    post_date = line[date_match.end():].strip()
-                    
+                
                     # Find amounts in the text after date
-                    amounts = amount_pattern.findall(post_date)
-                    cleaned_amts = [clean_amount(x) for x in amounts]
-                    
+                    amts = [t for t in amounts(tokens) if t.start >= date_tok.end]
+                    cleaned_amts = [t.value for t in amts]
+                
                     debit = 0.0
                     credit = 0.0
                     balance = 0.0
-                    
-                    if not amounts:
+                
+                    if not amts:
                         continue
 
-                    # Identify Description vs Amounts
-                    first_amt_str = amounts[0]
-                    idx_amt = post_date.find(first_amt_str)
-                    
-                    # Description + Branch + Cheque
-                    middle_text = post_date[:idx_amt].strip()
-                    
+                    # Description + Branch + Cheque: between the date and the first amount
+                    middle_text = line[date_tok.end:amts[0].start].strip()
+                
                     # Try to extract Cheque No (usually numeric at end of description)
                     cheque_no = ""
                     desc = middle_text
-                    tokens = middle_text.split()
-                    if tokens:
-                        possible_chq = tokens[-1]
+                    words = middle_text.split()
+                    if words:
+                        possible_chq = words[-1]
                         if possible_chq.isdigit() and len(possible_chq) >= 3:
                             cheque_no = possible_chq
-                            desc = " ".join(tokens[:-1])
-                    
+                            desc = " ".join(words[:-1])
+                
                     # Assign amounts based on count
                     if len(cleaned_amts) >= 3:
                         debit = cleaned_amts[-3]
@@ -74,8 +76,7 @@ def parse_pnb(pdf_path, password=None, areas=None):
                         val = cleaned_amts[0]
                         balance = cleaned_amts[1]
                         # Determine Dr/Cr based on previous balance if available
-                        if rows:
-                            prev_bal = rows[-1][6]
+                        if prev_bal is not None:
                             # Check if Balance = Prev - Val (Debit) or Prev + Val (Credit)
                             if abs(prev_bal - val - balance) < 1.0:
                                 debit = val
@@ -90,20 +91,25 @@ def parse_pnb(pdf_path, password=None, areas=None):
 
                     # Use Cheque No as Ref No, fallback to Txn No
                     ref_no = cheque_no if cheque_no else txn_no
-                    
+                
                     current_row = [txn_date, "", desc, ref_no, debit, credit, balance]
                     rows.append(current_row)
-                
+                    prev_bal = balance
+            
                 elif current_row:
                     # Append continuation lines
                     if "Page" not in line and "Statement" not in line and "Balance" not in line and "Txn No" not in line:
                         current_row[2] += " " + line.strip()
+        counter("rows", len(rows), page=i)
+        yield from track(rows, progress)
 
-    df = pd.DataFrame(rows, columns=["Txn Date", "Value Date", "Description", "Ref No.", "Debit", "Credit", "Balance"])
+def parse_pnb(pdf_path, password=None, areas=None, progress=None, backend=None):
+    rows = list(iter_transactions(pdf_path, password, areas=areas, progress=progress, backend=backend))
+    with stage("dataframe", rows=len(rows)):
+        df = pd.DataFrame(rows, columns=COLUMNS)
     return df
 
-def convert_pnb(pdf_path, password=None, areas=None):
-    df = parse_pnb(pdf_path, password, areas=areas)
+def convert_pnb(pdf_path, password=None, areas=None, progress=None, backend=None):
     out_path = get_save_path("PNB", pdf_path)
-    df.to_excel(out_path, index=False)
+    write_rows_to_excel(iter_transactions(pdf_path, password, areas=areas, progress=progress, backend=backend), COLUMNS, out_path)
     return out_path
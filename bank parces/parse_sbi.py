@@ -1,68 +1,79 @@
 import re
 import pandas as pd
-import pdfplumber
-from utils import clean_amount, get_save_path, get_cropped_page
+from utils import get_save_path, get_cropped_page, iter_pages, write_rows_to_excel
+from progress import track
+from timing import stage, counter
+from tokenizer import tokenize_line, leading_date, amounts
 
-def parse_sbi(pdf_path, password=None, areas=None):
-    rows = []
+COLUMNS = ["Txn Date", "Value Date", "Description", "Ref No.", "Debit", "Credit", "Balance"]
+
+def iter_transactions(pdf_path, password=None, areas=None, progress=None, backend=None):
+    """Yields transaction rows page by page."""
     date_pattern = re.compile(r"\d{2}[-/]\d{2}[-/]\d{4}")
-    amount_pattern = re.compile(r"((?:[\d,]*\d)\.\d{2})")
     running_balance = None
 
-    with pdfplumber.open(pdf_path, password=password) as pdf:
-        for i, page in enumerate(pdf.pages):
-            page = get_cropped_page(page, areas, i)
+    for i, page in iter_pages(pdf_path, password, progress=progress, backend=backend):
+        page = get_cropped_page(page, areas, i)
+        with stage("extract_text", page=i):
             text = page.extract_text()
-            if not text: continue
-            lines = text.split("\n")
-            current_row = None
-            
+        counter("chars", len(text or ""), page=i)
+        if not text: continue
+        lines = text.split("\n")
+        rows = []
+        current_row = None
+        
+        with stage("parse", page=i):
             for line in lines:
+                tokens = tokenize_line(line)
                 # Check for Opening Balance
-                if "BROUGHT FORWARD" in line.upper() or "OPENING BALANCE" in line.upper():
-                    matches = amount_pattern.findall(line)
+                upper = line.upper()
+                if "BROUGHT FORWARD" in upper or "OPENING BALANCE" in upper:
+                    matches = amounts(tokens)
                     if matches:
-                        running_balance = clean_amount(matches[-1])
+                        running_balance = matches[-1].value
                     continue
 
-                if date_pattern.match(line):
-                    matches = amount_pattern.findall(line)
+                if leading_date(tokens, date_pattern):
+                    matches = amounts(tokens)
                     if matches:
-                        current_balance = clean_amount(matches[-1])
+                        current_balance = matches[-1].value
                         debit = 0.0
                         credit = 0.0
-                        
+                    
                         if running_balance is not None:
                             diff = round(running_balance - current_balance, 2)
                             if diff > 0: debit = diff
                             elif diff < 0: credit = abs(diff)
                         elif len(matches) >= 3:
                             # Fallback if no running balance yet
-                            debit = clean_amount(matches[-3])
-                            credit = clean_amount(matches[-2])
-                        
+                            debit = matches[-3].value
+                            credit = matches[-2].value
+                    
                         running_balance = current_balance
-                        
+                    
                         # Extract Description
                         parts = line.split()
                         txn_date = parts[0]
                         val_date = parts[1] if len(parts) > 1 else ""
-                        
+                    
                         # Description is between Val Date and first amount
-                        first_amt = matches[0]
-                        idx = line.find(first_amt)
+                        idx = matches[0].start
                         desc = line[len(txn_date) + len(val_date) + 2 : idx].strip()
-                        
+                    
                         current_row = [txn_date, val_date, desc, "", debit, credit, current_balance]
                         rows.append(current_row)
                 elif current_row and not "Statement" in line:
                     current_row[2] += " " + line.strip()
+        counter("rows", len(rows), page=i)
+        yield from track(rows, progress)
 
-    df = pd.DataFrame(rows, columns=["Txn Date", "Value Date", "Description", "Ref No.", "Debit", "Credit", "Balance"])
+def parse_sbi(pdf_path, password=None, areas=None, progress=None, backend=None):
+    rows = list(iter_transactions(pdf_path, password, areas=areas, progress=progress, backend=backend))
+    with stage("dataframe", rows=len(rows)):
+        df = pd.DataFrame(rows, columns=COLUMNS)
     return df
 
-def convert_sbi(pdf_path, password=None, areas=None):
-    df = parse_sbi(pdf_path, password, areas=areas)
+def convert_sbi(pdf_path, password=None, areas=None, progress=None, backend=None):
     out_path = get_save_path("SBI", pdf_path)
-    df.to_excel(out_path, index=False)
+    write_rows_to_excel(iter_transactions(pdf_path, password, areas=areas, progress=progress, backend=backend), COLUMNS, out_path)
     return out_path
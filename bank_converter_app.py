@@ -8,34 +8,52 @@ import platform
 import uuid
 import hashlib
 import json
-
-# Try importing libraries for visual selection
+import multiprocessing
+import queue
+import time
+
+# Libraries for visual selection and OCR. Imported by load_visual_libraries()
+# when a PDF is first opened rather than at startup, so the home screen comes
+# up without waiting for them.
+pdfium = None
 pdfium_error = None
-try:
-    import pypdfium2 as pdfium
-except ImportError as e:
-    print(f"DEBUG: pypdfium2 import failed: {e}")
-    pdfium = None
-    pdfium_error = str(e)
-
+Image = None
+ImageTk = None
 pil_error = None
-try:
-    from PIL import Image, ImageTk
-except ImportError as e:
-    print(f"DEBUG: Pillow import failed: {e}")
-    Image = None
-    ImageTk = None
-    pil_error = str(e)
-
-try:
-    import pdfplumber  # Required for auto-detection
-except ImportError:
-    pdfplumber = None
-
-try:
-    import pytesseract
-except ImportError:
-    pytesseract = None
+pdfplumber = None  # Required for auto-detection
+pytesseract = None
+_visual_libraries_loaded = False
+
+def load_visual_libraries():
+    global pdfium, pdfium_error, Image, ImageTk, pil_error, pdfplumber, pytesseract, _visual_libraries_loaded
+    if _visual_libraries_loaded:
+        return
+    _visual_libraries_loaded = True
+
+    try:
+        import pypdfium2 as pdfium
+    except ImportError as e:
+        print(f"DEBUG: pypdfium2 import failed: {e}")
+        pdfium = None
+        pdfium_error = str(e)
+
+    try:
+        from PIL import Image, ImageTk
+    except ImportError as e:
+        print(f"DEBUG: Pillow import failed: {e}")
+        Image = None
+        ImageTk = None
+        pil_error = str(e)
+
+    try:
+        import pdfplumber
+    except ImportError:
+        pdfplumber = None
+
+    try:
+        import pytesseract
+    except ImportError:
+        pytesseract = None
 
 from licensing import (
     verify_license_key,
@@ -43,17 +61,26 @@ from licensing import (
     save_license_to_file,
     format_license_remaining,
 )
-from parse_generic import convert_generic
-from parse_custom import convert_custom
-
-BANK_HANDLERS = {
-    "Generic": convert_generic,
-}
+from parser_registry import BANK_HANDLERS, load_converter
+from parallel import max_workers
+from cache import conversion_key, load_result, store_result
+from document import DocumentSession
+from utils import get_save_path, write_rows_to_excel
+from page_render import PageBitmapCache, zoom_key
+from grid_preview import GridPreviewer, detect_tables
+from progress import Cancelled, ConversionProgress, format_progress
 
 CONTACT_EMAIL = "akash@shrimadhavraiassociates.in"
 CONTACT_PHONE = "+91-9157199960"
 OFFICE_HOURS = "MON-FRI 10:00 AM - 6:00 PM"
 
+# How often the crop selector checks whether a page's sharp render or grid preview is ready
+RENDER_POLL_MS = 40
+# Pause after the last box change before the grid preview is computed
+GRID_PREVIEW_DELAY_MS = 150
+# Fastest the conversion screen's progress is refreshed; fast parsers report many pages a second
+PROGRESS_UPDATE_SECONDS = 0.1
+
 
 def generate_machine_id():
     unique_str = f"{uuid.getnode()}_{platform.system()}"
@@ -61,15 +88,19 @@ def generate_machine_id():
 
 
 class PDFCropSelector(tk.Toplevel):
-    def __init__(self, parent, pdf_path, password=None):
+    def __init__(self, parent, session):
         super().__init__(parent)
+        load_visual_libraries()
         self.title("Select Area to Extract")
         self.geometry("900x700")
-        self.pdf_path = pdf_path
-        self.password = password
+        # The job's open document; the conversion goes on using it after the selector closes
+        self.session = session
+        self.pdf_path = session.source
+        self.password = session.password
         self.areas = {}  # {page_index: [(x0, y0, x1, y1), ...]}
         self.headers = None
         self.use_grid_lines = False
+        self.use_template = False
         self.use_ocr = False
         self.merge_multiline = False
         self.skip_rows = 0
@@ -78,15 +109,25 @@ class PDFCropSelector(tk.Toplevel):
         self.plumber_doc = None
         self.rect_start = None
         self.zoom_scale = 1.0  # To handle display scaling
+        self.renders = None
+        self._render_poll = None
+        # pdfplumber documents aren't thread-safe; held by whoever reads plumber_doc
+        self.plumber_lock = session.plumber_lock
+        self.grid_preview = None
+        self._grid_poll = None
+        self._detect_thread = None
+        self._detect_poll = None
         self.cancelled = True
 
         try:
-            # pypdfium2 handles password in constructor
-            self.doc = pdfium.PdfDocument(self.pdf_path, password=password)
+            # Decrypted once for the renders, once for the grid preview and Auto-Detect
+            self.doc = self.session.pdfium_doc
+            self.renders = PageBitmapCache(self.doc, lock=self.session.pdfium_lock)
             
-            # Open pdfplumber instance for grid preview
+            # pdfplumber instance for grid preview
             if pdfplumber:
-                self.plumber_doc = pdfplumber.open(self.pdf_path, password=self.password)
+                self.plumber_doc = self.session.plumber_doc
+                self.grid_preview = GridPreviewer(self.plumber_doc, self.plumber_lock)
 
         except Exception as e:
             messagebox.showerror("Error", f"Could not open PDF: {e}")
@@ -135,6 +176,10 @@ class PDFCropSelector(tk.Toplevel):
         
         self.merge_var = tk.BooleanVar()
         tk.Checkbutton(settings_panel, text="Merge Multi-line Rows", variable=self.merge_var, bg="#e3f2fd").pack(anchor="w")
+
+        # Columns found on the first page are reused on the rest (no effect with grid lines)
+        self.template_var = tk.BooleanVar()
+        tk.Checkbutton(settings_panel, text="Reuse Column Layout (Faster)", variable=self.template_var, bg="#e3f2fd").pack(anchor="w")
         
         self.ocr_var = tk.BooleanVar()
         ocr_state = "normal" if pytesseract else "disabled"
@@ -146,7 +191,15 @@ class PDFCropSelector(tk.Toplevel):
         self.skip_rows_entry.insert(0, "0")
         self.skip_rows_entry.pack(anchor="w", pady=(0, 10))
 
-        tk.Button(settings_panel, text="Auto-Detect Tables", bg="#2196f3", fg="white", command=self.auto_detect_tables).pack(fill="x", pady=5)
+        self.detect_btn = tk.Button(settings_panel, text="Auto-Detect Tables", bg="#2196f3", fg="white", command=self.auto_detect_tables)
+        self.detect_btn.pack(fill="x", pady=5)
+        # Shown below the button while auto-detect runs
+        self.detect_frame = tk.Frame(settings_panel, bg="#e3f2fd")
+        self.detect_progress = ttk.Progressbar(self.detect_frame, mode="determinate")
+        self.detect_progress.pack(fill="x")
+        self.detect_label = tk.Label(self.detect_frame, text="", bg="#e3f2fd", fg="gray")
+        self.detect_label.pack(side="left")
+        tk.Button(self.detect_frame, text="Cancel", command=self.cancel_auto_detect).pack(side="right")
         tk.Button(settings_panel, text="Clear Page Selection", bg="#ffcdd2", command=self.clear_page_selection).pack(fill="x", pady=5)
         tk.Button(settings_panel, text="Apply to ALL Pages", bg="#ff9800", fg="black", command=self.apply_to_all).pack(fill="x", pady=5)
         tk.Button(settings_panel, text="Clear ALL Pages", bg="#d32f2f", fg="white", command=self.clear_all_pages).pack(fill="x", pady=5)
@@ -189,9 +242,8 @@ class PDFCropSelector(tk.Toplevel):
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
         if canvas_width > 10 and canvas_height > 10:
-            page = self.doc[self.current_page_idx]
             # Calculate scale to fit
-            width, height = page.get_size()
+            width, height = self.renders.page_size(self.current_page_idx)
             scale_w = canvas_width / width
             scale_h = canvas_height / height
             self.zoom_scale = min(scale_w, scale_h) * 0.95  # 95% to leave a small margin
@@ -203,65 +255,91 @@ class PDFCropSelector(tk.Toplevel):
             self.redraw_rects()
 
     def show_page(self, page_idx):
-        if 0 <= page_idx < len(self.doc):
+        if 0 <= page_idx < len(self.renders):
             self.current_page_idx = page_idx
-            page = self.doc[page_idx]
-            
-            # Render page to image using pypdfium2
-            bitmap = page.render(scale=self.zoom_scale)
-            pil_image = bitmap.to_pil()
+            if self._render_poll:
+                self.after_cancel(self._render_poll)
+                self._render_poll = None
+
+            # Cached full-size render, else a blurry placeholder at the same size
+            # until the background thread has the sharp one
+            pil_image = self.renders.get(page_idx, self.zoom_scale)
+            sharp = pil_image is not None
+            if not sharp:
+                pil_image = self.renders.placeholder(page_idx, self.zoom_scale)
             
             self.tk_img = ImageTk.PhotoImage(pil_image)
             
             self.canvas.delete("all")
             self.canvas.config(scrollregion=(0, 0, pil_image.width, pil_image.height))
-            self.canvas.create_image(0, 0, image=self.tk_img, anchor="nw")
+            self.canvas.create_image(0, 0, image=self.tk_img, anchor="nw", tags="page_image")
             
-            self.lbl_page.config(text=f"Page {page_idx + 1} of {len(self.doc)}")
+            self.lbl_page.config(text=f"Page {page_idx + 1} of {len(self.renders)}")
             
             # Redraw existing selection if any
             self.redraw_rects()
 
+            # This page first, then the ones prev/next will show
+            self.renders.prefetch([page_idx, page_idx + 1, page_idx - 1], self.zoom_scale)
+            if not sharp:
+                self._render_poll = self.after(RENDER_POLL_MS, self.swap_in_render, page_idx, self.zoom_scale)
+
+    def swap_in_render(self, page_idx, zoom):
+        """Replaces the placeholder with the sharp render once it is cached, keeping the boxes drawn over it."""
+        self._render_poll = None
+        if page_idx != self.current_page_idx or zoom_key(zoom) != zoom_key(self.zoom_scale):
+            return
+        pil_image = self.renders.get(page_idx, zoom)
+        if pil_image is None:
+            self._render_poll = self.after(RENDER_POLL_MS, self.swap_in_render, page_idx, zoom)
+            return
+        self.tk_img = ImageTk.PhotoImage(pil_image)
+        self.canvas.itemconfig("page_image", image=self.tk_img)
+
     def redraw_rects(self):
         self.canvas.delete("saved_rect")
-        self.canvas.delete("grid_line")
         if self.current_page_idx in self.areas:
             for (x0, y0, x1, y1) in self.areas[self.current_page_idx]:
                 s = self.zoom_scale
                 self.canvas.create_rectangle(x0*s, y0*s, x1*s, y1*s, outline="red", width=2, tags="saved_rect")
-                self.draw_grid_preview((x0, y0, x1, y1))
+        self.draw_grid_preview()
+
+    def draw_grid_preview(self):
+        """
+        Draws the detected table cells (rows/cols) inside the selections. Cells
+        not computed yet are found in the background once the boxes stop
+        changing, and drawn when ready.
+        """
+        self.canvas.delete("grid_line")
+        if not self.grid_preview: return
+        if self._grid_poll:
+            self.after_cancel(self._grid_poll)
+            self._grid_poll = None
 
-    def draw_grid_preview(self, bbox):
-        """Draws the detected table cells (rows/cols) inside the selection."""
-        if not self.plumber_doc: return
-        try:
-            page = self.plumber_doc.pages[self.current_page_idx]
-            # Ensure bbox is valid
-            if bbox[2] <= bbox[0] or bbox[3] <= bbox[1]: return
-            
-            # Crop the page to the selection
-            cropped = page.crop(bbox, relative=False, strict=False)
-            
-            use_lines = self.grid_var.get()
-            settings = {
-                "vertical_strategy": "lines" if use_lines else "text",
-                "horizontal_strategy": "lines" if use_lines else "text",
-                "intersection_x_tolerance": 15,
-                "intersection_y_tolerance": 15,
-            }
-            
-            # Find table structure
-            tables = cropped.find_tables(settings)
-            s = self.zoom_scale
-            
-            for table in tables:
-                for cell in table.cells:
-                    # cell is (x0, top, x1, bottom)
-                    if cell[0] is None: continue
-                    cx0, cy0, cx1, cy1 = cell
-                    self.canvas.create_rectangle(cx0*s, cy0*s, cx1*s, cy1*s, outline="#00e5ff", width=1, tags="grid_line")
-        except Exception as e:
-            print(f"Grid preview error: {e}")
+        use_lines = self.grid_var.get()
+        s = self.zoom_scale
+        missing = []
+        for bbox in self.areas.get(self.current_page_idx, []):
+            cells = self.grid_preview.cells(self.current_page_idx, bbox, use_lines)
+            if cells is None:
+                missing.append((self.current_page_idx, bbox))
+                continue
+            for cx0, cy0, cx1, cy1 in cells:
+                self.canvas.create_rectangle(cx0*s, cy0*s, cx1*s, cy1*s, outline="#00e5ff", width=1, tags="grid_line")
+
+        if missing:
+            self._grid_poll = self.after(GRID_PREVIEW_DELAY_MS, self.request_grid_preview, missing, use_lines)
+
+    def request_grid_preview(self, boxes, use_lines):
+        self.grid_preview.request(boxes, use_lines)
+        self._grid_poll = self.after(RENDER_POLL_MS, self.wait_for_grid_preview)
+
+    def wait_for_grid_preview(self):
+        self._grid_poll = None
+        if self.grid_preview.idle():
+            self.draw_grid_preview()
+        else:
+            self._grid_poll = self.after(RENDER_POLL_MS, self.wait_for_grid_preview)
 
     def prev_page(self):
         self.show_page(self.current_page_idx - 1)
@@ -324,42 +402,91 @@ class PDFCropSelector(tk.Toplevel):
                     return
 
     def auto_detect_tables(self):
-        if not pdfplumber:
+        if not self.plumber_doc:
             messagebox.showerror("Error", "pdfplumber library missing.")
             return
+        if self._detect_thread:
+            return
         
         detect_all = messagebox.askyesno("Auto-Detect Tables", "Do you want to detect tables on ALL pages?\n\nClick 'Yes' for All Pages.\nClick 'No' for Current Page only.")
         
-        try:
-            self.config(cursor="watch")
-            self.update()
-            
-            count = 0
-            with pdfplumber.open(self.pdf_path, password=self.password) as pdf:
-                if detect_all:
-                    pages_indices = range(len(pdf.pages))
-                else:
-                    pages_indices = [self.current_page_idx]
-                
-                for i in pages_indices:
-                    page = pdf.pages[i]
-                    tables = page.find_tables()
-                    
-                    if tables:
-                        new_rects = [t.bbox for t in tables]
-                        self.areas[i] = new_rects
-                        count += len(new_rects)
-                    
-                    # Keep UI responsive
-                    self.update()
-            
+        with self.plumber_lock:
+            page_count = len(self.plumber_doc.pages)
+        if detect_all:
+            pages_indices = range(page_count)
+        else:
+            pages_indices = [self.current_page_idx]
+
+        # Runs on the already open document, in the background; boxes are drawn as pages finish
+        self._detect_results = queue.Queue()
+        self._detect_cancel = threading.Event()
+        self._detect_total = len(pages_indices)
+        self._detect_done = 0
+        self._detect_count = 0
+        self._detect_started = time.perf_counter()
+        self._detect_thread = threading.Thread(
+            target=detect_tables,
+            args=(self.plumber_doc, self.plumber_lock, pages_indices, self._detect_results, self._detect_cancel),
+            daemon=True,
+        )
+        self.detect_btn.config(state="disabled")
+        self.detect_progress.config(maximum=self._detect_total, value=0)
+        self.detect_label.config(text=f"0 of {self._detect_total} pages")
+        self.detect_frame.pack(after=self.detect_btn, fill="x", pady=(0, 5))
+        self._detect_thread.start()
+        self._detect_poll = self.after(RENDER_POLL_MS, self.poll_auto_detect)
+
+    def poll_auto_detect(self):
+        self._detect_poll = None
+        finished = False
+        error = None
+        redraw = False
+        while True:
+            try:
+                item = self._detect_results.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                finished = True
+                break
+            if item[0] == "error":
+                error = item[1]
+                continue
+            i, new_rects = item
+            self._detect_done += 1
+            if new_rects:
+                self.areas[i] = new_rects
+                self._detect_count += len(new_rects)
+                redraw = redraw or i == self.current_page_idx
+
+        if redraw:
             self.redraw_rects()
-            self.config(cursor="")
-            messagebox.showinfo("Auto-Detect", f"Detected {count} table(s) across {len(pages_indices)} page(s).")
+        self.detect_progress.config(value=self._detect_done)
+        elapsed = time.perf_counter() - self._detect_started
+        status = f"{self._detect_done} of {self._detect_total} pages"
+        if 0 < self._detect_done < self._detect_total:
+            eta = elapsed / self._detect_done * (self._detect_total - self._detect_done)
+            status += f", ~{eta:.0f}s left"
+        self.detect_label.config(text=status)
+
+        if not finished:
+            self._detect_poll = self.after(RENDER_POLL_MS, self.poll_auto_detect)
+            return
 
-        except Exception as e:
-            self.config(cursor="")
-            messagebox.showerror("Error", f"Detection failed: {e}")
+        self._detect_thread = None
+        self.detect_frame.pack_forget()
+        self.detect_btn.config(state="normal")
+        if error:
+            messagebox.showerror("Error", f"Detection failed: {error}")
+        elif self._detect_cancel.is_set():
+            messagebox.showinfo("Auto-Detect", f"Stopped after {self._detect_done} of {self._detect_total} page(s). Detected {self._detect_count} table(s).")
+        else:
+            messagebox.showinfo("Auto-Detect", f"Detected {self._detect_count} table(s) across {self._detect_total} page(s).")
+
+    def cancel_auto_detect(self):
+        if self._detect_thread:
+            self._detect_cancel.set()
+            self.detect_label.config(text="Stopping...")
 
     def clear_page_selection(self):
         if self.current_page_idx in self.areas:
@@ -382,6 +509,7 @@ class PDFCropSelector(tk.Toplevel):
         if h_str:
             self.headers = [h.strip() for h in h_str.split(",") if h.strip()]
         self.use_grid_lines = self.grid_var.get()
+        self.use_template = self.template_var.get()
         self.use_ocr = self.ocr_var.get()
         self.merge_multiline = self.merge_var.get()
         try:
@@ -393,8 +521,25 @@ class PDFCropSelector(tk.Toplevel):
         self.destroy()
     
     def destroy(self):
-        if self.plumber_doc:
-            self.plumber_doc.close()
+        if self._render_poll:
+            self.after_cancel(self._render_poll)
+            self._render_poll = None
+        if self._grid_poll:
+            self.after_cancel(self._grid_poll)
+            self._grid_poll = None
+        if self._detect_poll:
+            self.after_cancel(self._detect_poll)
+            self._detect_poll = None
+        if self._detect_thread:
+            # Let the page in progress finish before the document is closed under it
+            self._detect_cancel.set()
+            self._detect_thread.join()
+            self._detect_thread = None
+        if self.renders:
+            self.renders.close()
+        if self.grid_preview:
+            self.grid_preview.close()
+        # The documents belong to the session, which the conversion closes
         super().destroy()
 
 class BankConverterApp(tk.Tk):
@@ -406,6 +551,7 @@ class BankConverterApp(tk.Tk):
         self.machine_id = generate_machine_id()
         self.license_data = None
         self.converted_file_path = None
+        self.workers_var = tk.IntVar(value=1)
 
         self.current_frame = None
         self.center_window()
@@ -612,6 +758,24 @@ class BankConverterApp(tk.Tk):
             command=lambda: self.convert_pdf(bank_name, select_area=True),
         ).pack(pady=5)
 
+        if bank_name in ("Generic", "Custom"):
+            workers_frame = tk.Frame(frame, bg="#f0f2f5")
+            workers_frame.pack(pady=10)
+            tk.Label(
+                workers_frame,
+                text="Parallel workers (1 = off):",
+                font=("Segoe UI", 11),
+                bg="#f0f2f5",
+            ).pack(side="left", padx=5)
+            tk.Spinbox(
+                workers_frame,
+                from_=1,
+                to=max_workers(),
+                textvariable=self.workers_var,
+                width=5,
+                state="readonly",
+            ).pack(side="left")
+
         tk.Button(
             frame,
             text="Back to Home",
@@ -674,6 +838,7 @@ class BankConverterApp(tk.Tk):
         headers = None
         column_indices = None
         use_grid_lines = False
+        use_template = False
         use_ocr = False
         merge_multiline = False
         skip_rows = 0
@@ -681,6 +846,7 @@ class BankConverterApp(tk.Tk):
         areas = None
         
         # Check if we have the libraries needed for visual selection
+        load_visual_libraries()
         has_visual_libs = (pdfium is not None) and (Image is not None)
         should_open_selector = False
 
@@ -702,11 +868,16 @@ class BankConverterApp(tk.Tk):
             if messagebox.askyesno("Select Area", "Do you want to visually select the table area?"):
                 should_open_selector = True
 
+        # The selector and the conversion share one open (and decrypted) PDF,
+        # closed when the conversion ends
+        session = DocumentSession(pdf_path, pdf_pwd)
+
         if should_open_selector:
-            selector = PDFCropSelector(self, pdf_path, pdf_pwd)
+            selector = PDFCropSelector(self, session)
             self.wait_window(selector)
             
             if getattr(selector, 'cancelled', True):
+                session.close()
                 return
 
             areas = selector.areas
@@ -714,22 +885,27 @@ class BankConverterApp(tk.Tk):
             if bank == "Custom":
                 headers = selector.headers
                 use_grid_lines = selector.use_grid_lines
+                use_template = selector.use_template
                 use_ocr = selector.use_ocr
                 merge_multiline = selector.merge_multiline
                 skip_rows = selector.skip_rows
 
             if not areas:
                 if not messagebox.askyesno("No Selection", "No area selected. Continue with full page?"):
+                    session.close()
                     return
 
-        self.show_loading(f"Processing {bank} PDF...\nPlease wait.")
+        progress = ConversionProgress()
+        progress.callback = lambda *state: self._post_progress(progress, *state)
+        self._progress_posted = 0.0
+        self.show_loading(f"Processing {bank} PDF...\nPlease wait.", progress)
 
         # Run conversion in a separate thread to prevent UI freezing
-        thread = threading.Thread(target=self._run_conversion, args=(bank, pdf_path, pdf_pwd, areas, headers, column_indices, use_grid_lines, use_ocr, merge_multiline, skip_rows))
+        thread = threading.Thread(target=self._run_conversion, args=(bank, session, pdf_pwd, areas, headers, column_indices, use_grid_lines, use_ocr, merge_multiline, skip_rows, self.workers_var.get(), progress, use_template))
         thread.daemon = True
         thread.start()
 
-    def show_loading(self, message):
+    def show_loading(self, message, progress=None):
         self.clear_frame()
         frame = tk.Frame(self, bg="#f0f2f5")
         frame.pack(expand=True, fill="both")
@@ -743,30 +919,86 @@ class BankConverterApp(tk.Tk):
             fg="#0d47a1"
         ).pack(pady=100)
 
-        # Indeterminate progress bar
-        pb = ttk.Progressbar(frame, orient="horizontal", length=400, mode="indeterminate")
-        pb.pack(pady=20)
-        pb.start(10)
+        # Indeterminate until the parser reports its first page
+        self.progress_bar = ttk.Progressbar(frame, orient="horizontal", length=400, mode="indeterminate")
+        self.progress_bar.pack(pady=20)
+        self.progress_bar.start(10)
+
+        if progress:
+            self.progress_label = tk.Label(frame, text="Opening PDF...", font=("Segoe UI", 11), bg="#f0f2f5", fg="#555")
+            self.progress_label.pack()
+            self.cancel_btn = tk.Button(frame, text="Cancel", width=12, command=lambda: self.cancel_conversion(progress))
+            self.cancel_btn.pack(pady=20)
+
+    def _post_progress(self, progress, page_index, total_pages, rows, stage):
+        # Runs on the conversion thread: hand the numbers to the UI thread, at most every PROGRESS_UPDATE_SECONDS
+        now = time.perf_counter()
+        if stage != "done" and now - self._progress_posted < PROGRESS_UPDATE_SECONDS:
+            return
+        self._progress_posted = now
+        eta = progress.eta()
+        self.after(0, lambda: self.update_progress(page_index, total_pages, rows, eta))
 
-    def _run_conversion(self, bank, pdf_path, pdf_pwd, areas=None, headers=None, column_indices=None, use_grid_lines=False, use_ocr=False, merge_multiline=False, skip_rows=0):
+    def update_progress(self, page_index, total_pages, rows, eta):
+        if not self.progress_bar.winfo_exists() or not total_pages:
+            return
+        if str(self.progress_bar.cget("mode")) != "determinate":
+            self.progress_bar.stop()
+            self.progress_bar.config(mode="determinate", maximum=total_pages)
+        self.progress_bar.config(value=page_index)
+        self.progress_label.config(text=format_progress(page_index, total_pages, rows, eta))
+
+    def cancel_conversion(self, progress):
+        # The parser stops before its next page
+        progress.cancel()
+        self.cancel_btn.config(state="disabled", text="Cancelling...")
+
+    def _run_conversion(self, bank, session, pdf_pwd, areas=None, headers=None, column_indices=None, use_grid_lines=False, use_ocr=False, merge_multiline=False, skip_rows=0, workers=1, progress=None, use_template=False):
         try:
             if bank == "Custom":
-                out_file = convert_custom(pdf_path, pdf_pwd, areas=areas, headers=headers, column_indices=column_indices, use_grid_lines=use_grid_lines, use_ocr=use_ocr, merge_multiline=merge_multiline, skip_rows=skip_rows)
+                from ocr import MAX_OCR_WORKERS
+                convert_custom = load_converter("custom")
+                # Repeat conversions of the same file and settings skip parsing
+                key = conversion_key(session, pdf_pwd, mode=bank, areas=areas, headers=headers, column_indices=column_indices, use_grid_lines=use_grid_lines, use_ocr=use_ocr, merge_multiline=merge_multiline, skip_rows=skip_rows, use_template=use_template)
+                df = load_result(key)
+                if df is None:
+                    df = convert_custom(session, pdf_pwd, areas=areas, headers=headers, column_indices=column_indices, use_grid_lines=use_grid_lines, use_ocr=use_ocr, merge_multiline=merge_multiline, skip_rows=skip_rows, return_df=True, workers=workers, ocr_workers=MAX_OCR_WORKERS, progress=progress, use_template=use_template)
+                    store_result(key, df)
+                out_file = get_save_path("Custom", session)
+                df.to_excel(out_file, index=False)
+            elif bank == "Generic":
+                key = conversion_key(session, pdf_pwd, mode=bank, areas=areas)
+                df = load_result(key)
+                if df is None:
+                    df = BANK_HANDLERS["Generic"](session, pdf_pwd, areas=areas, return_df=True, workers=workers, progress=progress)
+                    store_result(key, df)
+                out_file = get_save_path("Generic", session)
+                write_rows_to_excel(df.itertuples(index=False, name=None), list(df.columns), out_file)
             else:
                 convert_func = BANK_HANDLERS.get(bank, BANK_HANDLERS["Generic"])
                 if areas:
-                    out_file = convert_func(pdf_path, pdf_pwd, areas=areas)
+                    out_file = convert_func(session, pdf_pwd, areas=areas, progress=progress)
                 else:
-                    out_file = convert_func(pdf_path, pdf_pwd)
+                    out_file = convert_func(session, pdf_pwd, progress=progress)
+            if progress:
+                progress.finish()
             # Schedule UI update on main thread
             self.after(0, lambda: self.on_conversion_success(out_file))
+        except Cancelled:
+            self.after(0, self.on_conversion_cancelled)
         except Exception as e:
             self.after(0, lambda: self.on_conversion_error(str(e)))
+        finally:
+            session.close()
 
     def on_conversion_success(self, out_file):
         self.converted_file_path = out_file
         self.show_post_conversion()
 
+    def on_conversion_cancelled(self):
+        messagebox.showinfo("Cancelled", "Conversion cancelled. No file was written.")
+        self.show_home()
+
     def on_conversion_error(self, error_msg):
         messagebox.showerror("Conversion Failed", error_msg)
         self.show_home()
@@ -834,5 +1066,7 @@ class BankConverterApp(tk.Tk):
 
 
 if __name__ == "__main__":
+    # Needed for the parallel-workers process pool in frozen Windows builds
+    multiprocessing.freeze_support()
     app = BankConverterApp()
     app.mainloop()
@@ -0,0 +1,94 @@
+import re
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+from document import use_session
+from parser_registry import load_converter
+
+# Only the top of the first page is scored: the bank's own name, IFSC and
+# column headers are there, while transaction narrations further down often
+# mention other banks (NEFT from HDFC, UPI to SBI...)
+HEADER_CHARS = 3000
+# Below this the statement is parsed with parse_generic
+MIN_SCORE = 3
+
+# (pattern, weight) per bank. The branch IFSC prefix is the strongest signal,
+# then the bank name, then layout tokens of that bank's statement format.
+SIGNATURES = {
+    "axis": [(r"\bUTIB0", 5), (r"AXIS BANK", 3), (r"OPENING BALANCE", 1)],
+    "bob": [(r"\bBARB0", 5), (r"BANK OF BARODA", 3)],
+    "boi": [(r"\bBKID0", 5), (r"BANK OF INDIA", 3)],
+    "canara": [(r"\bCNRB0", 5), (r"CANARA BANK", 3)],
+    "hdfc": [(r"\bHDFC0", 5), (r"HDFC BANK", 3), (r"WITHDRAWAL AMT", 1)],
+    "icici": [(r"\bICIC0", 5), (r"ICICI BANK", 3)],
+    "idfc": [(r"\bIDFB0", 5), (r"IDFC FIRST", 3)],
+    "indusind": [(r"\bINDB0", 5), (r"INDUSIND", 3)],
+    "kotak": [(r"\bKKBK0", 5), (r"KOTAK MAHINDRA", 3)],
+    "pnb": [(r"\bPUNB0", 5), (r"PUNJAB NATIONAL BANK", 3), (r"TXN NO", 1)],
+    "sbi": [(r"\bSBIN0", 5), (r"STATE BANK OF INDIA", 3)],
+    "union": [(r"\bUBIN0", 5), (r"UNION BANK OF INDIA", 3)],
+    "yes": [(r"\bYESB0", 5), (r"YES BANK", 3)],
+}
+_COMPILED = {bank: [(re.compile(p), w) for p, w in sigs] for bank, sigs in SIGNATURES.items()}
+
+# "BANK OF INDIA" is also inside "STATE BANK OF INDIA" and "UNION BANK OF INDIA"
+_NAME_CLASHES = {"boi": ("STATE BANK OF INDIA", "UNION BANK OF INDIA")}
+
+def score_text(text):
+    """Signature score of every bank for the given (upper-cased) header text."""
+    scores = {}
+    for bank, sigs in _COMPILED.items():
+        haystack = text
+        for clash in _NAME_CLASHES.get(bank, ()):
+            haystack = haystack.replace(clash, "")
+        score = sum(w for pattern, w in sigs if pattern.search(haystack))
+        if score:
+            scores[bank] = score
+    return scores
+
+def first_page_header(pdf_path, password=None):
+    """
+    Top of the first page's text plus the document's producer/creator/title.
+    pypdfium2 reads a single page in a few milliseconds, without the layout
+    analysis pdfplumber does for the whole page.
+    """
+    with use_session(pdf_path, password) as session:
+        if pdfium is None:
+            with session.plumber_lock:
+                pdf = session.plumber_doc
+                if not pdf.pages:
+                    return ""
+                return (pdf.pages[0].extract_text() or "")[:HEADER_CHARS].upper()
+
+        with session.pdfium_lock:
+            doc = session.pdfium_doc
+            meta = doc.get_metadata_dict()
+            parts = [meta.get(k, "") for k in ("Producer", "Creator", "Title", "Author")]
+            if len(doc) > 0:
+                page = doc[0]
+                textpage = page.get_textpage()
+                try:
+                    parts.append(textpage.get_text_range()[:HEADER_CHARS])
+                finally:
+                    textpage.close()
+                    page.close()
+        return "\n".join(parts).upper()
+
+def detect_bank(pdf_path, password=None):
+    """Best matching bank parser name (e.g. 'hdfc'), or 'generic' when nothing scores MIN_SCORE."""
+    scores = score_text(first_page_header(pdf_path, password))
+    if not scores:
+        return "generic"
+    bank, score = max(scores.items(), key=lambda kv: kv[1])
+    return bank if score >= MIN_SCORE else "generic"
+
+def convert_auto(pdf_path, password=None, areas=None, progress=None, backend=None):
+    """Detects the bank from the first page and converts with its parser (parse_generic if unknown)."""
+    # Detection and conversion share one open (and decrypted) document
+    with use_session(pdf_path, password) as session:
+        convert = load_converter(detect_bank(session, password))
+        if areas:
+            return convert(session, password, areas=areas, progress=progress, backend=backend)
+        return convert(session, password, progress=progress, backend=backend)
@@ -0,0 +1,201 @@
+"""
+Headless batch converter for whole folders of statements.
+
+    python batch_convert.py statements/
+    python batch_convert.py statements/ --bank SBI
+    python batch_convert.py "2024-03/*.pdf" --bank Generic --passwords passwords.json -j 8
+    python batch_convert.py scans/ --bank Custom --headers "Date, Desc, Debit, Credit, Balance" --ocr
+    python batch_convert.py statements/ --backend pypdfium2
+
+By default each file's bank is detected from its first page (bank_router).
+Outputs go to the usual Documents/SMA_TRANSACTION/<Bank>/ layout (utils.get_save_path).
+Files with the same name in different folders are named after their path
+below the common folder instead (march/statement.pdf -> march_statement_sbi.xlsx),
+so one doesn't overwrite the other.
+The password map is a JSON object of file name (or glob pattern) -> password.
+"""
+import argparse
+import fnmatch
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from document import DocumentSession
+from parallel import count_pages, max_workers
+from parser_registry import load_converter
+
+def find_pdfs(inputs):
+    """PDF files from directories (searched recursively), glob patterns and plain paths."""
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, "**", "*.pdf"), recursive=True)
+            matches += glob.glob(os.path.join(item, "**", "*.PDF"), recursive=True)
+        else:
+            matches = glob.glob(item) or [item]
+        found.extend(m for m in sorted(set(matches)) if os.path.isfile(m))
+    # Keep the first occurrence of each file
+    return list(dict.fromkeys(os.path.abspath(p) for p in found))
+
+def output_names(pdfs):
+    """
+    The file name each PDF's output is named after: its own, or for names that
+    occur in more than one folder, its path below the folder all the inputs
+    share, joined with "_". The extension is kept as it is; outputs are named
+    after the name without it (utils.get_save_path), so a.pdf and a.PDF clash
+    too, as do names differing only in case (Windows ignores it).
+    """
+    def output_key(name):
+        return os.path.splitext(name)[0].lower()
+
+    folders = {}
+    for pdf in pdfs:
+        folders.setdefault(output_key(os.path.basename(pdf)), []).append(pdf)
+    names = {pdf: os.path.basename(pdf) for pdf in pdfs if len(folders[output_key(os.path.basename(pdf))]) == 1}
+    taken = {output_key(name) for name in names.values()}
+    try:
+        root = os.path.commonpath([os.path.dirname(pdf) for pdf in pdfs])
+    except ValueError:
+        # Different drives
+        root = None
+    for pdf in pdfs:
+        if pdf in names:
+            continue
+        relative = os.path.relpath(pdf, root) if root else os.path.splitdrive(pdf)[1].lstrip(os.sep)
+        name = relative.replace(os.sep, "_")
+        # A file already called march_statement.pdf next to march/statement.pdf
+        stem, ext = os.path.splitext(name)
+        n = 2
+        while output_key(name) in taken:
+            name = f"{stem}_{n}{ext}"
+            n += 1
+        taken.add(output_key(name))
+        names[pdf] = name
+    return names
+
+def load_passwords(path):
+    if not path:
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+def password_for(pdf_path, passwords, default=None):
+    """Exact file name first, then the first matching glob pattern, then the default."""
+    name = os.path.basename(pdf_path)
+    if name in passwords:
+        return passwords[name]
+    for pattern, password in passwords.items():
+        if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(pdf_path, pattern):
+            return password
+    return default
+
+def convert_one(pdf_path, password, bank, options, name=None):
+    """
+    Process-pool worker: converts one file and reports (path, output, pages, seconds, error).
+    name is the file name the output is named after (see output_names).
+    """
+    start = time.perf_counter()
+    pages = 0
+    try:
+        # Counting and converting share one open (and decrypted) document
+        with DocumentSession(pdf_path, password, name=name) as session:
+            pages = count_pages(session)
+            convert = load_converter(bank)
+            out_path = convert(session, password, **options)
+        return pdf_path, out_path, pages, time.perf_counter() - start, None
+    except Exception as e:
+        return pdf_path, None, pages, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+def build_options(args):
+    """Keyword arguments for the converter, beyond (pdf_path, password)."""
+    options = {"backend": args.backend} if args.backend else {}
+    if args.bank.lower() != "custom":
+        return options
+    headers = [h.strip() for h in args.headers.split(",") if h.strip()] if args.headers else None
+    options.update({
+        "headers": headers,
+        "use_grid_lines": args.grid,
+        "use_template": args.template,
+        "use_ocr": args.ocr,
+        "merge_multiline": args.merge_multiline,
+        "skip_rows": args.skip_rows,
+    })
+    return options
+
+def run(args):
+    pdfs = find_pdfs(args.inputs)
+    if not pdfs:
+        print("No PDF files found.")
+        return 1
+    # Fail on a bad bank name before starting the pool
+    try:
+        load_converter(args.bank)
+        if args.backend:
+            from text_backends import resolve_backend
+            args.backend = resolve_backend(args.backend)
+    except (ValueError, ImportError) as e:
+        print(e)
+        return 2
+    passwords = load_passwords(args.passwords)
+    options = build_options(args)
+    names = output_names(pdfs)
+    jobs = max(1, min(args.jobs, len(pdfs)))
+
+    print(f"Converting {len(pdfs)} file(s) as {args.bank} with {jobs} worker(s)...")
+    renamed = sum(name != os.path.basename(pdf) for pdf, name in names.items())
+    if renamed:
+        print(f"{renamed} file(s) share a name with another input; their outputs are named after their folders.")
+    started = time.perf_counter()
+    done = pages_total = 0
+    failures = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(convert_one, pdf, password_for(pdf, passwords, args.password), args.bank, options, names[pdf])
+            for pdf in pdfs
+        ]
+        for future in as_completed(futures):
+            pdf, out_path, pages, seconds, error = future.result()
+            done += 1
+            if error:
+                failures.append((pdf, error))
+                print(f"[{done}/{len(pdfs)}] FAILED {pdf}: {error}")
+            else:
+                pages_total += pages
+                print(f"[{done}/{len(pdfs)}] {pdf} -> {out_path} ({pages} pages, {seconds:.1f}s)")
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    converted = len(pdfs) - len(failures)
+    print()
+    print("Summary")
+    print(f"  Files:    {converted} converted, {len(failures)} failed, {len(pdfs)} total")
+    print(f"  Pages:    {pages_total}")
+    print(f"  Time:     {elapsed:.1f}s")
+    print(f"  Speed:    {pages_total / elapsed:.1f} pages/s, {converted / elapsed:.2f} files/s")
+    for pdf, error in failures:
+        print(f"  Failed:   {pdf}: {error}")
+    return 1 if failures else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert folders of bank statement PDFs to Excel.")
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("--bank", default="Auto", help="Auto (detect per file), Generic, Custom or a bank name (SBI, HDFC, AXIS, ...)")
+    parser.add_argument("--passwords", help="JSON file mapping file names or glob patterns to passwords")
+    parser.add_argument("--password", help="Password for files not in the password map")
+    parser.add_argument("-j", "--jobs", type=int, default=max_workers(), help="Files converted at the same time")
+    parser.add_argument("--backend", help="Text extraction library: pdfplumber (default), pypdfium2 or pymupdf")
+    custom = parser.add_argument_group("Custom mode")
+    custom.add_argument("--headers", help="Comma separated column headers")
+    custom.add_argument("--grid", action="store_true", help="Use grid lines")
+    custom.add_argument("--template", action="store_true", help="Reuse the columns found on the first page")
+    custom.add_argument("--ocr", action="store_true", help="OCR scanned pages")
+    custom.add_argument("--merge-multiline", action="store_true", help="Merge multi-line rows")
+    custom.add_argument("--skip-rows", type=int, default=0, help="Skip the top N rows")
+    return run(parser.parse_args(argv))
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
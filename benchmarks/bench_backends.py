@@ -0,0 +1,105 @@
+"""
+Text backend benchmark and parity check (see text_backends.py) on the
+synthetic statements from make_statements.py. Works offline.
+
+    python benchmarks/bench_backends.py [--corpus DIR] [--banks sbi,hdfc] [--pages 20] [--backends pypdfium2,pymupdf]
+
+Speed: milliseconds per page to read every page and extract_text() it, as the
+bank parsers do. pdfplumber is timed cold (empty text sidecar) and warm.
+Parity: every layout's own parser, parse_generic and parse_custom (a two-column
+area) run with each backend; the rows must equal pdfplumber's. parse_hdfc is
+also compared with its default PyMuPDF text. Exits 1 on any difference.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from make_statements import LAYOUTS, make_statement, statement_path
+
+# Column mode: the left and right halves of every page
+CUSTOM_AREAS = {"all": [(20, 30, 300, 820), (300, 30, 580, 820)]}
+
+def time_extraction(path, backend):
+    from utils import iter_pages
+    start = time.perf_counter()
+    pages = 0
+    for _, page in iter_pages(path, backend=backend):
+        page.extract_text()
+        pages += 1
+    return (time.perf_counter() - start) * 1000 / max(pages, 1)
+
+def parser_rows(path, parser, backend):
+    import importlib
+    if parser == "custom":
+        import parse_custom
+        return list(parse_custom.iter_transactions(path, areas=CUSTOM_AREAS, backend=backend))
+    module = importlib.import_module("parse_" + parser)
+    return list(module.iter_transactions(path, backend=backend))
+
+def compare(rows, expected):
+    if rows == expected:
+        return "ok"
+    differ = sum(a != b for a, b in zip(rows, expected)) + abs(len(rows) - len(expected))
+    return f"{differ}/{len(expected)} rows differ"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the text backends for speed and parsed output.")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "sma_bench_corpus"))
+    parser.add_argument("--banks", default=",".join(LAYOUTS))
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--backends", default="pypdfium2,pymupdf", help="Backends compared with pdfplumber")
+    args = parser.parse_args(argv)
+
+    # A private, empty sidecar so pdfplumber's first pass is a cold one
+    home = tempfile.mkdtemp(prefix="sma_bench_home_")
+    os.environ["HOME"] = os.environ["USERPROFILE"] = home
+    import warnings
+    warnings.filterwarnings("ignore")
+    from parser_registry import BANK_PARSERS_DIR
+    from text_backends import available_backends
+    sys.path.insert(0, BANK_PARSERS_DIR)
+
+    banks = [b.strip().lower() for b in args.banks.split(",") if b.strip()]
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    missing = [b for b in backends if b not in available_backends()]
+    if missing:
+        print("Not installed, skipped: " + ", ".join(missing))
+        backends = [b for b in backends if b not in missing]
+
+    os.makedirs(args.corpus, exist_ok=True)
+    print(f"{'file':<18} {'plumber cold':>12} {'plumber warm':>12} " + " ".join(f"{b:>10}" for b in backends) + "   ms/page (speedup vs cold)")
+    speed = []
+    files = []
+    for bank in banks:
+        path = statement_path(args.corpus, bank, args.pages)
+        if not os.path.exists(path):
+            make_statement(path, bank, args.pages)
+        files.append((bank, path))
+        cold = time_extraction(path, "pdfplumber")
+        warm = time_extraction(path, "pdfplumber")
+        fast = [time_extraction(path, b) for b in backends]
+        speed.append((cold, warm, fast))
+        print(f"{os.path.basename(path):<18} {cold:>12.1f} {warm:>12.1f} " + " ".join(f"{t:>5.1f} ({cold / t:>3.0f}x)" for t in fast))
+
+    print()
+    print(f"{'file':<18} {'parser':<9} " + " ".join(f"{b:<22}" for b in backends))
+    failed = False
+    for bank, path in files:
+        for name in (bank, "generic", "custom"):
+            expected = parser_rows(path, name, "pdfplumber")
+            results = [compare(parser_rows(path, name, b), expected) for b in backends]
+            if name == "hdfc":
+                # Its default reading (PyMuPDF's own sorted text) against the shared backends
+                results.append("default: " + compare(parser_rows(path, name, None), expected))
+            failed |= any(r != "ok" and not r.startswith("default") for r in results)
+            print(f"{os.path.basename(path):<18} {name:<9} " + " ".join(f"{r:<22}" for r in results) + ("" if expected else "  (no rows)"))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
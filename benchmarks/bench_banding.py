@@ -0,0 +1,97 @@
+"""
+Compares column mode's row banding, parse_custom.band_rows (vectorized) with
+band_rows_sequential (word by word), on dense synthetic pages: many narrow
+rows, wrapped descriptions, slightly uneven baselines and tall words that
+span two rows. The rows must be identical. Works offline, no PDFs needed.
+
+    python benchmarks/bench_banding.py [--pages 20] [--rows 400] [--cols 6] [--seed 0] [--pdf FILE]
+
+With --pdf, the statement's pages are also split into --cols column boxes and
+banded both ways, as parse_custom would.
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parse_custom import band_rows, band_rows_sequential
+
+TOKENS = ["UPI", "NEFT", "IMPS", "ATM", "WDL", "SALARY", "RENT", "1,234.50", "12/03/2024", "CR", "DR", "REF", "0012345"]
+
+def dense_page(rng, rows, cols, line_height=9.0, width=560.0):
+    """One page of word dicts per column box, rows line_height apart."""
+    col_width = width / cols
+    column_words = [[] for _ in range(cols)]
+    for r in range(rows):
+        base = 20 + r * line_height
+        for c in range(cols):
+            if rng.random() < 0.15:
+                continue
+            x = 20 + c * col_width
+            for _ in range(rng.randint(1, 3)):
+                text = rng.choice(TOKENS)
+                # Uneven baselines, and now and then a word as tall as two rows
+                top = base + rng.uniform(-0.8, 0.8)
+                height = 2 * line_height if rng.random() < 0.01 else rng.uniform(4.5, 6.0)
+                w = len(text) * 3.6
+                column_words[c].append({"text": text, "x0": x, "x1": x + w, "top": top, "bottom": top + height})
+                x += w + 2
+    # extract_words gives each box's words line by line, left to right
+    for words in column_words:
+        words.sort(key=lambda w: (round(w["top"]), w["x0"]))
+    return column_words
+
+def pdf_pages(path, cols):
+    from utils import iter_pages
+    from spatial_index import crop_page
+    for _, page in iter_pages(path):
+        x0, top, x1, bottom = page.bbox
+        step = (x1 - x0) / cols
+        boxes = [(x0 + k * step, top, x0 + (k + 1) * step, bottom) for k in range(cols)]
+        yield [crop_page(page, box).extract_words(keep_blank_chars=True) for box in boxes]
+
+def compare(pages):
+    """Seconds for each version over the pages, after checking their rows are equal."""
+    # The sequential version tags the word dicts, so it gets its own copy
+    copies = copy.deepcopy(pages)
+    start = time.perf_counter()
+    expected = [band_rows_sequential(p) for p in copies]
+    t_seq = time.perf_counter() - start
+    start = time.perf_counter()
+    rows = [band_rows(p) for p in pages]
+    t_vec = time.perf_counter() - start
+    if rows != expected:
+        differ = sum(a != b for a, b in zip(rows, expected))
+        raise SystemExit(f"band_rows differs from band_rows_sequential on {differ} page(s)")
+    return sum(len(r) for r in rows), t_seq, t_vec
+
+def report(label, pages, n_rows, t_seq, t_vec):
+    words = sum(len(words) for page in pages for words in page)
+    print(f"{label:<24} {len(pages):>5} pages {words:>8} words {n_rows:>7} rows  "
+          f"sequential {t_seq:.3f}s  vectorized {t_vec:.3f}s  x{t_seq / t_vec:.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark column mode's row banding on dense pages.")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=400, help="Printed lines per page")
+    parser.add_argument("--cols", type=int, default=6, help="Column boxes per page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pdf", help="Also band this statement's pages")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    pages = [dense_page(rng, args.rows, args.cols) for _ in range(args.pages)]
+    report(f"dense {args.rows}x{args.cols}", pages, *compare(pages))
+    if args.pdf:
+        import warnings
+        warnings.filterwarnings("ignore")
+        pages = list(pdf_pages(args.pdf, args.cols))
+        report(os.path.basename(args.pdf), pages, *compare(pages))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
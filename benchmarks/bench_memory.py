@@ -0,0 +1,97 @@
+"""
+Checks that peak memory stays flat as statements get longer: each parser
+streams a synthetic statement page by page in a fresh interpreter (empty HOME,
+so the text sidecar starts cold) and the rows are counted, not kept. Exits 1
+if the longest statement peaks more than --tolerance MB above the shortest.
+
+    python benchmarks/bench_memory.py [--corpus DIR] [--pages 50,200,1000] [--modes extract,generic,sbi,custom]
+                                      [--tolerance 25]
+
+Modes: extract (text sidecar only), generic, custom, or a bank layout name for
+its own parser. extract also runs on the scanned variant, whose page images
+are what pdfminer's object cache used to pile up.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from make_statements import make_statement, statement_path
+from bench_parsers import peak_rss_mb
+
+def run_job(job):
+    import warnings
+    warnings.filterwarnings("ignore")
+    path, mode = job["path"], job["mode"]
+    if mode == "extract":
+        from utils import iter_pages
+        rows = sum(1 for _ in iter_pages(path))
+    elif mode == "generic":
+        import parse_generic
+        rows = sum(1 for _ in parse_generic.iter_transactions(path))
+    elif mode == "custom":
+        import parse_custom
+        rows = sum(1 for _ in parse_custom.iter_transactions(path))
+    else:
+        import importlib
+        from parser_registry import BANK_PARSERS_DIR
+        sys.path.insert(0, BANK_PARSERS_DIR)
+        rows = sum(1 for _ in importlib.import_module("parse_" + mode).iter_transactions(path))
+    return {"rows": rows, "peak_rss_mb": peak_rss_mb()}
+
+def run_isolated(job):
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, USERPROFILE=home)
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--job", json.dumps(job)],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError((proc.stderr.strip().splitlines() or ["?"])[-1])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that peak memory doesn't grow with the page count.")
+    parser.add_argument("--job", help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "sma_bench_corpus"))
+    parser.add_argument("--bank", default="sbi", help="Layout of the generated statements")
+    parser.add_argument("--pages", default="50,200,1000", help="Comma separated page counts, shortest first")
+    parser.add_argument("--modes", default="extract,generic,sbi,custom")
+    parser.add_argument("--tolerance", type=float, default=25, help="Allowed peak RSS growth in MB")
+    args = parser.parse_args(argv)
+
+    if args.job:
+        print(json.dumps(run_job(json.loads(args.job))))
+        return 0
+
+    page_counts = sorted(int(p) for p in args.pages.split(","))
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    os.makedirs(args.corpus, exist_ok=True)
+    runs = [(mode, False) for mode in modes]
+    if "extract" in modes:
+        runs.append(("extract", True))
+
+    failed = False
+    print(f"{'mode':<14} " + " ".join(f"{p:>8}p" for p in page_counts) + f" {'growth':>9}")
+    for mode, scanned in runs:
+        peaks = []
+        for pages in page_counts:
+            path = statement_path(args.corpus, args.bank, pages, scanned)
+            if not os.path.exists(path):
+                make_statement(path, args.bank, pages, scanned)
+            peaks.append(run_isolated({"path": path, "mode": mode})["peak_rss_mb"])
+        growth = peaks[-1] - peaks[0]
+        ok = growth <= args.tolerance
+        failed |= not ok
+        label = mode + (" (scan)" if scanned else "")
+        print(f"{label:<14} " + " ".join(f"{p:>7.0f}MB" for p in peaks) + f" {growth:>7.0f}MB" + ("" if ok else "  FAIL"))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Compares parse_custom's number normalization, convert_numeric_columns, with
+the per-cell convert_to_number_if_possible loop it replaced.
+
+    python benchmarks/bench_normalize.py [rows]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from utils import convert_to_number_if_possible, convert_numeric_columns
+
+def make_frame(rows):
+    cells = ["1,23,456.78", "12,345.00 Cr", "Rs.500.00", "0012345", "NEFT/SALARY/ACME", "", "-", "99.5 Dr"]
+    data = {f"Column {c + 1}": [cells[(r + c) % len(cells)] for r in range(rows)] for c in range(6)}
+    # A balance-like column where (almost) every value is distinct
+    data["Balance"] = [f"{r * 137.25:,.2f}" for r in range(rows)]
+    return pd.DataFrame(data)
+
+def check_rules():
+    """The conversions the column path must make, and the cells it must leave alone."""
+    cells = ["1,23,456.78", "12,345.00 Cr", "Rs.500.00", "99.5 Dr", "0012345", "0.50", "NEFT/SALARY/ACME", "Dr Rao", "", "-"]
+    expected = [123456.78, 12345.0, 500.0, 99.5, "0012345", 0.5, "NEFT/SALARY/ACME", "Dr Rao", "", "-"]
+    got = convert_numeric_columns(pd.DataFrame({"cell": cells}))["cell"].tolist()
+    assert got == expected, f"convert_numeric_columns gave {got}"
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    check_rules()
+    df = make_frame(rows)
+
+    def per_cell():
+        out = df.copy()
+        for col in out.columns:
+            out[col] = out[col].apply(convert_to_number_if_possible)
+        return out
+
+    old_df, t_old = timed(per_cell)
+    new_df, t_new = timed(lambda: convert_numeric_columns(df.copy()))
+    assert old_df.astype(str).equals(new_df.astype(str)), "convert_numeric_columns differs from per-cell path"
+    cells = rows * df.shape[1]
+    print(f"numeric columns        {cells:>8} cells  per-cell {t_old:.3f}s  vectorized {t_new:.3f}s  x{t_old / t_new:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+End-to-end parser benchmark on the synthetic statements from make_statements.py.
+Every run happens in a fresh interpreter with its own empty HOME, so caches
+start cold and peak RSS belongs to that run alone. Works offline.
+
+    python benchmarks/bench_parsers.py [--corpus DIR] [--banks sbi,hdfc] [--pages 1,10,100]
+                                       [--modes bank,auto,generic,custom] [--scanned] [-j 4] [--json out.json]
+                                       [--trace DIR]
+
+Modes: bank (the layout's own parser), auto (bank_router), generic, custom,
+custom-template (custom reusing the first page's columns, see layout_template.py),
+custom-ocr (scanned files; needs tesseract). Stages per run:
+  extract    text layer of every page into the sidecar (pdfplumber)
+  detect     bank_router fingerprint (auto mode)
+  parse      the parser's iter_transactions, on the warm sidecar
+  dataframe  building the DataFrame
+  excel      writing the .xlsx
+parse_hdfc reads the PDF with PyMuPDF, so its extraction is part of parse.
+With --trace, each run also records the pipeline's own stages (see timing.py)
+and writes DIR/<file>.<mode>.json for chrome://tracing or Perfetto, and the
+self time per stage over all runs is printed at the end.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from make_statements import LAYOUTS, make_statement, statement_path
+
+MODES = ("bank", "auto", "generic", "custom", "custom-template", "custom-ocr")
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_job(job):
+    """Runs one (file, mode) conversion in this process and returns its measurements."""
+    import warnings
+    warnings.filterwarnings("ignore")
+    import importlib
+    import pandas as pd
+    from parallel import count_pages
+    from parser_registry import BANK_PARSERS_DIR
+    from utils import iter_pages, write_rows_to_excel
+
+    import timing
+    path, mode, bank, workers = job["path"], job["mode"], job["bank"], job["workers"]
+    stages = {}
+    if job.get("trace"):
+        timing.enable()
+
+    def timed(stage, fn):
+        start = time.perf_counter()
+        result = fn()
+        stages[stage] = stages.get(stage, 0.0) + time.perf_counter() - start
+        return result
+
+    started = time.perf_counter()
+    pages = count_pages(path)
+    if mode == "auto":
+        from bank_router import detect_bank
+        bank = timed("detect", lambda: detect_bank(path))
+    if not (mode in ("bank", "auto") and bank == "hdfc"):
+        timed("extract", lambda: sum(1 for _ in iter_pages(path)))
+
+    if mode in ("bank", "auto") and bank != "generic":
+        sys.path.insert(0, BANK_PARSERS_DIR)
+        module = importlib.import_module("parse_" + bank)
+        rows = timed("parse", lambda: list(module.iter_transactions(path)))
+        df = timed("dataframe", lambda: pd.DataFrame(rows, columns=module.COLUMNS))
+    elif mode in ("generic", "auto"):
+        import parse_generic
+        rows = timed("parse", lambda: list(parse_generic.iter_transactions(path, workers=workers)))
+        df = timed("dataframe", lambda: pd.DataFrame(rows, columns=parse_generic.COLUMNS))
+    else:
+        import parse_custom
+        use_ocr = mode == "custom-ocr"
+        use_template = mode == "custom-template"
+        rows = timed("parse", lambda: list(parse_custom.iter_transactions(path, use_ocr=use_ocr, use_template=use_template, workers=workers, ocr_workers=job["ocr_workers"])))
+        df = timed("dataframe", lambda: parse_custom.build_dataframe(rows))
+
+    out = os.path.join(os.path.expanduser("~"), "out.xlsx")
+    timed("excel", lambda: write_rows_to_excel(df.itertuples(index=False, name=None), [str(c) for c in df.columns], out))
+    result = {
+        "file": os.path.basename(path),
+        "mode": mode,
+        "parser": bank if mode in ("bank", "auto") else mode,
+        "pages": pages,
+        "rows": len(df),
+        "seconds": time.perf_counter() - started,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": stages,
+    }
+    if job.get("trace"):
+        result["trace"] = timing.save(job["trace"])
+        result["trace_summary"] = timing.summary()
+    return result
+
+def run_isolated(job):
+    """run_job in a fresh interpreter with an empty HOME (cold caches, separate RSS)."""
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, USERPROFILE=home)
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--job", json.dumps(job)],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        return {"file": os.path.basename(job["path"]), "mode": job["mode"], "error": (proc.stderr.strip().splitlines() or ["?"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def ensure_corpus(corpus, banks, page_counts, scanned):
+    files = []
+    os.makedirs(corpus, exist_ok=True)
+    for bank in banks:
+        for pages in page_counts:
+            for is_scan in ((False, True) if scanned else (False,)):
+                path = statement_path(corpus, bank, pages, is_scan)
+                if not os.path.exists(path):
+                    make_statement(path, bank, pages, is_scan)
+                files.append((path, bank, is_scan))
+    return files
+
+def print_table(results):
+    stage_names = ["extract", "detect", "parse", "dataframe", "excel"]
+    print(f"{'file':<22} {'mode':<15} {'parser':<15} {'pages':>5} {'rows':>7} {'sec':>7} {'pages/s':>8} {'RSS MB':>7}  " + " ".join(f"{s:>9}" for s in stage_names))
+    for r in results:
+        if "error" in r:
+            print(f"{r['file']:<22} {r['mode']:<15} FAILED: {r['error']}")
+            continue
+        rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "-"
+        stages = " ".join(f"{r['stages'][s]:>9.3f}" if s in r["stages"] else f"{'-':>9}" for s in stage_names)
+        print(f"{r['file']:<22} {r['mode']:<15} {r['parser']:<15} {r['pages']:>5} {r['rows']:>7} {r['seconds']:>7.2f} {r['pages'] / r['seconds']:>8.1f} {rss:>7}  {stages}")
+
+def print_trace_summary(results):
+    totals = {}
+    for r in results:
+        for name, t in r.get("trace_summary", {}).items():
+            entry = totals.setdefault(name, {"count": 0, "wall_s": 0.0, "self_s": 0.0, "cpu_s": 0.0})
+            for k in entry:
+                entry[k] += t[k]
+    if totals:
+        from timing import format_summary
+        print()
+        print(format_summary(totals))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the parsers on synthetic statements.")
+    parser.add_argument("--job", help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "sma_bench_corpus"), help="Where the generated PDFs are kept between runs")
+    parser.add_argument("--banks", default=",".join(LAYOUTS))
+    parser.add_argument("--pages", default="1,10,100", help="Comma separated page counts (e.g. 1,10,100,1000)")
+    parser.add_argument("--modes", default="bank,auto,generic,custom", help="Comma separated: " + ", ".join(MODES))
+    parser.add_argument("--scanned", action="store_true", help="Also run custom-ocr on image-only variants")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="Page workers for generic/custom")
+    parser.add_argument("--ocr-workers", type=int, default=1)
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--trace", help="Write a Chrome trace of every run into this folder")
+    args = parser.parse_args(argv)
+
+    if args.job:
+        print(json.dumps(run_job(json.loads(args.job))))
+        return 0
+
+    banks = [b.strip().lower() for b in args.banks.split(",") if b.strip()]
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES] + [b for b in banks if b not in LAYOUTS]
+    if unknown:
+        print("Unknown mode/bank: " + ", ".join(unknown))
+        return 2
+    if args.scanned and "custom-ocr" not in modes:
+        modes.append("custom-ocr")
+
+    from ocr import ocr_available
+    if "custom-ocr" in modes and not ocr_available():
+        print("tesseract not found: skipping custom-ocr")
+        modes.remove("custom-ocr")
+
+    results = []
+    for path, bank, is_scan in ensure_corpus(args.corpus, banks, [int(p) for p in args.pages.split(",")], args.scanned):
+        # Text parsers find nothing on image-only pages; scans are only worth OCR
+        for mode in (m for m in modes if (m == "custom-ocr") == is_scan):
+            job = {"path": path, "mode": mode, "bank": bank, "workers": args.workers, "ocr_workers": args.ocr_workers}
+            if args.trace:
+                os.makedirs(args.trace, exist_ok=True)
+                job["trace"] = os.path.abspath(os.path.join(args.trace, f"{os.path.splitext(os.path.basename(path))[0]}.{mode}.json"))
+            print(f"{os.path.basename(path)} [{mode}]...", flush=True)
+            results.append(run_isolated(job))
+    print()
+    print_table(results)
+    print_trace_summary(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if any("error" in r for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
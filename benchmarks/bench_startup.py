@@ -0,0 +1,53 @@
+"""
+Cold import time of the desktop app, measured in fresh interpreters.
+Fails if the import pulls in the PDF/dataframe libraries, which should only
+load when a statement is opened or converted.
+
+    python benchmarks/bench_startup.py [runs] [budget_ms]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("pandas", "numpy", "pdfplumber", "pypdfium2", "PIL", "pytesseract", "fitz")
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import bank_converter_app
+elapsed = time.perf_counter() - start
+heavy = [m for m in %r if m in sys.modules]
+print(elapsed, ",".join(heavy))
+""" % (HEAVY_MODULES,)
+
+def import_once():
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    seconds, heavy = out.strip().splitlines()[-1].partition(" ")[::2]
+    return float(seconds), [m for m in heavy.split(",") if m]
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    times = []
+    heavy = []
+    for _ in range(runs):
+        seconds, heavy = import_once()
+        times.append(seconds * 1000)
+    median = statistics.median(times)
+    print(f"import bank_converter_app: median {median:.0f} ms, min {min(times):.0f} ms over {runs} runs")
+
+    failed = False
+    if heavy:
+        print("Loaded at import: " + ", ".join(heavy))
+        failed = True
+    if budget_ms is not None and median > budget_ms:
+        print(f"Over budget of {budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Layout-template parity check and benchmark (see layout_template.py) on the
+synthetic statements from make_statements.py. Works offline.
+
+    python benchmarks/bench_templates.py [--corpus DIR] [--banks sbi,hdfc] [--pages 10]
+
+Every page of every layout goes through LayoutTemplates.extract_tables and
+through cropped_page.extract_tables, for the full page and for selected
+sub-areas that cut through the table; the tables must be equal. A last run
+feeds the pages of all the layouts, interleaved, to one set of templates, so
+every page is a layout change. Exits 1 on any difference.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from make_statements import LAYOUTS, make_statement, statement_path
+
+# None is the full page; the others are selections that cut rows, columns or words
+AREAS = [None, (20, 300, 580, 790), (20, 60, 580, 400), (100, 100, 500, 700), (250, 80, 580, 800), (20, 80, 300, 800)]
+
+def area_pages(path, area):
+    from spatial_index import crop_page
+    from utils import iter_pages
+    for i, page in iter_pages(path):
+        bbox = area or page.bbox
+        yield i, bbox, crop_page(page, bbox)
+
+def check(pages, templates, settings):
+    """(pages whose tables differ, pages, seconds with templates, seconds with extract_tables)."""
+    differ = count = 0
+    t_template = t_plain = 0.0
+    for i, bbox, cropped in pages:
+        start = time.perf_counter()
+        got = templates.extract_tables(cropped, bbox, i)
+        t_template += time.perf_counter() - start
+        start = time.perf_counter()
+        expected = cropped.extract_tables(settings)
+        t_plain += time.perf_counter() - start
+        differ += got != expected
+        count += 1
+    return differ, count, t_template, t_plain
+
+def interleaved(paths, area):
+    iterators = [area_pages(path, area) for path in paths]
+    while iterators:
+        for it in list(iterators):
+            page = next(it, None)
+            if page is None:
+                iterators.remove(it)
+            else:
+                yield page
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare layout-template extraction with pdfplumber's extract_tables.")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "sma_bench_corpus"))
+    parser.add_argument("--banks", default=",".join(LAYOUTS))
+    parser.add_argument("--pages", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    os.environ["HOME"] = os.environ["USERPROFILE"] = tempfile.mkdtemp(prefix="sma_bench_home_")
+    import warnings
+    warnings.filterwarnings("ignore")
+    from layout_template import LayoutTemplates
+    from parse_custom import _table_settings
+
+    settings = _table_settings(False)
+    banks = [b.strip().lower() for b in args.banks.split(",") if b.strip()]
+    os.makedirs(args.corpus, exist_ok=True)
+    paths = []
+    for bank in banks:
+        path = statement_path(args.corpus, bank, args.pages)
+        if not os.path.exists(path):
+            make_statement(path, bank, args.pages)
+        paths.append(path)
+
+    print(f"{'file':<18} {'area':<26} {'differ':>7} {'template ms/page':>17} {'plain ms/page':>14}")
+    failed = False
+    runs = [(os.path.basename(p), [p], area) for p in paths for area in AREAS]
+    runs += [("interleaved", paths, area) for area in AREAS]
+    for name, files, area in runs:
+        # Pages are used as they come: iter_pages closes each one once the next is read
+        differ, count, t_template, t_plain = check(interleaved(files, area), LayoutTemplates(settings), settings)
+        failed |= differ > 0
+        n = max(count, 1)
+        print(f"{name:<18} {str(area or 'page'):<26} {differ:>3}/{count:<3} {t_template * 1000 / n:>17.1f} {t_plain * 1000 / n:>14.1f}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Generates synthetic bank statement PDFs for the benchmarks, fully offline.
+Text statements are written directly with the standard Helvetica font; the
+scanned variants embed a grayscale render (pypdfium2) of each text page and
+have no text layer.
+
+    python benchmarks/make_statements.py out_dir [--banks sbi,hdfc] [--pages 1,10,100] [--scanned]
+
+Each bank layout carries that bank's name and IFSC prefix (so bank_router
+detects it), its date format and column order, an opening balance line, and
+multi-line descriptions on some rows.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import zlib
+from datetime import date, timedelta
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+FONT_SIZE = 8
+LINE_HEIGHT = 12
+TOP, BOTTOM = 90, 60
+# Share of rows whose description wraps onto a second line
+WRAP_RATE = 0.25
+SCAN_DPI = 150
+
+# name, IFSC prefix, date format, extra columns before/after the standard ones
+LAYOUTS = {
+    "axis": {"name": "AXIS BANK", "ifsc": "UTIB0", "date": "%d-%m-%Y", "cheque": True, "branch": True},
+    "bob": {"name": "BANK OF BARODA", "ifsc": "BARB0", "date": "%d/%m/%Y", "value_date": True},
+    "boi": {"name": "BANK OF INDIA", "ifsc": "BKID0", "date": "%d/%m/%Y"},
+    "canara": {"name": "CANARA BANK", "ifsc": "CNRB0", "date": "%d-%b-%Y"},
+    "hdfc": {"name": "HDFC BANK", "ifsc": "HDFC0", "date": "%d/%m/%Y", "value_date": True},
+    "icici": {"name": "ICICI BANK", "ifsc": "ICIC0", "date": "%d/%m/%Y", "value_date": True},
+    "idfc": {"name": "IDFC FIRST BANK", "ifsc": "IDFB0", "date": "%d-%b-%Y"},
+    "indusind": {"name": "INDUSIND BANK", "ifsc": "INDB0", "date": "%d-%b-%Y"},
+    "kotak": {"name": "KOTAK MAHINDRA BANK", "ifsc": "KKBK0", "date": "%d-%m-%Y"},
+    "pnb": {"name": "PUNJAB NATIONAL BANK", "ifsc": "PUNB0", "date": "%d/%m/%Y", "txn_no": True},
+    "sbi": {"name": "STATE BANK OF INDIA", "ifsc": "SBIN0", "date": "%d/%m/%Y", "value_date": True},
+    "union": {"name": "UNION BANK OF INDIA", "ifsc": "UBIN0", "date": "%d/%m/%Y"},
+    "yes": {"name": "YES BANK", "ifsc": "YESB0", "date": "%d/%m/%Y", "value_date": True},
+}
+
+NARRATIONS = [
+    "UPI/PAYTM/{n}/GROCERY", "NEFT/SALARY/ACME LTD", "ATM WDL {n} MG ROAD", "IMPS/{n}/RENT",
+    "POS {n} FUEL STATION", "CHQ DEP {n}", "INT CREDIT", "ACH/LIC PREMIUM/{n}", "BY CLG {n}",
+]
+CONTINUATIONS = ["REF NO {n}", "TRANSFER FROM SAVINGS", "BILL PAYMENT {n}", "BRANCH {n}"]
+
+def money(value):
+    return f"{value:,.2f}"
+
+def statement_lines(bank, pages, seed=0):
+    """
+    Yields one list of (x, text) cells per printed line, per page, for the
+    given bank layout: header, opening balance, then transactions.
+    """
+    layout = LAYOUTS[bank]
+    rng = random.Random(f"{bank}-{pages}-{seed}")
+    day = date(2023, 4, 1)
+    balance = round(rng.uniform(10_000, 200_000), 2)
+    txn = 0
+    rows_per_page = (PAGE_HEIGHT - TOP - BOTTOM) // LINE_HEIGHT
+
+    # Column x positions: optional prefix columns, narration, then amounts
+    x = 30
+    cols = {}
+    if layout.get("txn_no"):
+        cols["txn_no"], x = x, x + 45
+    cols["date"], x = x, x + 55
+    if layout.get("value_date"):
+        cols["value_date"], x = x, x + 55
+    cols["desc"] = x
+    amounts_x = 340
+    if layout.get("cheque"):
+        cols["cheque"], amounts_x = amounts_x, amounts_x + 40
+    cols["debit"], cols["credit"], cols["balance"] = amounts_x, amounts_x + 60, amounts_x + 120
+    if layout.get("branch"):
+        cols["branch"] = amounts_x + 190
+
+    for page_no in range(pages):
+        lines = [
+            [(30, f"{layout['name']}    Statement of Account    Page {page_no + 1} of {pages}")],
+            [(30, f"Branch IFSC: {layout['ifsc']}{1000 + rng.randint(0, 8999):06d}    Account No: 0000{rng.randint(10**9, 10**10 - 1)}")],
+        ]
+        header = [(cols["date"], "Txn Date"), (cols["desc"], "Description"), (cols["debit"], "Debit"), (cols["credit"], "Credit"), (cols["balance"], "Balance")]
+        if "txn_no" in cols:
+            header.insert(0, (cols["txn_no"], "Txn No"))
+        if "value_date" in cols:
+            header.insert(1, (cols["value_date"], "Value Dt"))
+        lines.append(sorted(header))
+        if page_no == 0:
+            lines.append([(cols["desc"], "OPENING BALANCE"), (cols["balance"], money(balance))] + ([(cols["branch"], "0001")] if "branch" in cols else []))
+
+        while len(lines) < rows_per_page:
+            txn += 1
+            if rng.random() < 0.3:
+                day += timedelta(days=1)
+            amount = round(rng.uniform(10, 25_000) if rng.random() < 0.9 else rng.uniform(25_000, 300_000), 2)
+            # Statements don't go overdrawn, which also keeps every balance positive
+            credit = rng.random() < 0.4 or amount > balance
+            balance = round(balance + amount if credit else balance - amount, 2)
+            stamp = day.strftime(layout["date"])
+            n = rng.randint(100000, 999999)
+            cells = [(cols["date"], stamp), (cols["desc"], rng.choice(NARRATIONS).format(n=n))]
+            if "txn_no" in cols:
+                cells.append((cols["txn_no"], f"S{txn:07d}"))
+            if "value_date" in cols:
+                cells.append((cols["value_date"], stamp))
+            if "cheque" in cols:
+                cells.append((cols["cheque"], f"{rng.randint(0, 999999):06d}" if rng.random() < 0.2 else ""))
+            cells.append((cols["credit"] if credit else cols["debit"], money(amount)))
+            cells.append((cols["balance"], money(balance)))
+            if "branch" in cols:
+                cells.append((cols["branch"], f"{rng.randint(1, 9999):04d}"))
+            lines.append(sorted(c for c in cells if c[1]))
+            if rng.random() < WRAP_RATE and len(lines) < rows_per_page:
+                lines.append([(cols["desc"], rng.choice(CONTINUATIONS).format(n=n))])
+        yield lines
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def text_page_stream(lines):
+    ops = ["BT", f"/F1 {FONT_SIZE} Tf"]
+    y = PAGE_HEIGHT - 40
+    for cells in lines:
+        for x, text in cells:
+            ops.append(f"1 0 0 1 {x} {y} Tm ({_escape(text)}) Tj")
+        y -= LINE_HEIGHT
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+def scanned_images(text_pdf, dpi=SCAN_DPI):
+    """Grayscale renders of each page of a text PDF (bytes), like a scan of the printed statement."""
+    import pypdfium2 as pdfium
+    doc = pdfium.PdfDocument(text_pdf)
+    try:
+        for i in range(len(doc)):
+            page = doc[i]
+            bitmap = page.render(scale=dpi / 72, grayscale=True)
+            image = bitmap.to_pil().copy()
+            bitmap.close()
+            page.close()
+            yield image
+    finally:
+        doc.close()
+
+class PdfWriter:
+    """Just enough of the PDF format for text and image-only pages."""
+    def __init__(self):
+        self.objects = []
+        self.pages = []
+
+    def add(self, body):
+        self.objects.append(body)
+        return len(self.objects)
+
+    def add_stream(self, data, extra="", level=6):
+        data = zlib.compress(data, level)
+        return self.add(f"<< /Length {len(data)} /Filter /FlateDecode {extra}>>\nstream\n".encode("latin-1") + data + b"\nendstream")
+
+    def add_text_page(self, lines):
+        self.pages.append((self.add_stream(text_page_stream(lines)), None))
+
+    def add_image_page(self, image):
+        image_id = self.add_stream(image.tobytes(), f"/Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} /ColorSpace /DeviceGray /BitsPerComponent 8 ", level=1)
+        content = f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Im1 Do Q".encode("latin-1")
+        self.pages.append((self.add_stream(content), image_id))
+
+    def save(self, path, title=""):
+        with open(path, "wb") as f:
+            self.write(f, title)
+
+    def to_bytes(self, title=""):
+        buf = io.BytesIO()
+        self.write(buf, title)
+        return buf.getvalue()
+
+    def write(self, f, title=""):
+        font_id = self.add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        pages_id = len(self.objects) + len(self.pages) + 1
+        kids = []
+        for content_id, image_id in self.pages:
+            resources = f"/Font << /F1 {font_id} 0 R >>"
+            if image_id:
+                resources += f" /XObject << /Im1 {image_id} 0 R >>"
+            kids.append(self.add(f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] /Resources << {resources} >> /Contents {content_id} 0 R >>".encode("latin-1")))
+        assert self.add(f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>".encode("latin-1")) == pages_id
+        catalog_id = self.add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode("latin-1"))
+        info_id = self.add(f"<< /Producer (make_statements.py) /Title ({_escape(title)}) >>".encode("latin-1"))
+
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for i, body in enumerate(self.objects, 1):
+            offsets.append(f.tell())
+            f.write(f"{i} 0 obj\n".encode("latin-1") + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(f"xref\n0 {len(self.objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+        f.write(f"trailer\n<< /Size {len(self.objects) + 1} /Root {catalog_id} 0 R /Info {info_id} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1"))
+
+def make_statement(path, bank, pages, scanned=False, seed=0):
+    """Writes a synthetic statement for the bank layout and returns its path."""
+    title = f"{LAYOUTS[bank]['name']} statement"
+    writer = PdfWriter()
+    for lines in statement_lines(bank, pages, seed):
+        writer.add_text_page(lines)
+    if scanned:
+        # Image-only copy of the text statement: no text layer at all
+        text_pdf = writer.to_bytes(title)
+        writer = PdfWriter()
+        for image in scanned_images(text_pdf):
+            writer.add_image_page(image)
+    writer.save(path, title)
+    return path
+
+def statement_path(out_dir, bank, pages, scanned=False):
+    return os.path.join(out_dir, f"{bank}_{pages}p{'_scan' if scanned else ''}.pdf")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic bank statement PDFs.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--banks", default=",".join(LAYOUTS), help="Comma separated bank layouts")
+    parser.add_argument("--pages", default="1,10,100", help="Comma separated page counts (up to 1000 and beyond)")
+    parser.add_argument("--scanned", action="store_true", help="Also write image-only variants")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    banks = [b.strip().lower() for b in args.banks.split(",") if b.strip()]
+    unknown = [b for b in banks if b not in LAYOUTS]
+    if unknown:
+        print("Unknown bank layout(s): " + ", ".join(unknown))
+        return 2
+    for bank in banks:
+        for pages in (int(p) for p in args.pages.split(",")):
+            for scanned in ((False, True) if args.scanned else (False,)):
+                print(make_statement(statement_path(args.out_dir, bank, pages, scanned), bank, pages, scanned))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import tempfile
+import threading
+from document import DocumentSession
+
+# Shared by the desktop app and the Streamlit app, so results survive restarts of either
+CACHE_ROOT = os.path.expanduser("~/.sma_cache")
+
+def hash_key(*parts):
+    """SHA-256 hex digest of the given str/bytes parts (length-prefixed, so parts can't run together)."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+class DiskCache:
+    """
+    Size-bounded key/value store with one file per key under CACHE_ROOT/name.
+    Reads refresh a file's mtime and, once the directory grows past max_bytes,
+    the least recently used files are deleted. Writes go through a temp file
+    and os.replace, so several processes can share the directory.
+    """
+    def __init__(self, name, max_bytes, suffix=".bin"):
+        self.dir = os.path.join(CACHE_ROOT, name)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._size = None
+
+    def path(self, key):
+        return os.path.join(self.dir, key + self.suffix)
+
+    def get(self, key):
+        """Cached bytes for key, or None."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path(key))
+        except OSError as e:
+            # A cache that can't be written is just a cache miss next time
+            print(f"Cache write failed ({self.dir}): {e}")
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in self._entries():
+                _remove(path)
+            self._size = 0
+
+    def _entries(self):
+        entries = []
+        try:
+            with os.scandir(self.dir) as it:
+                for entry in it:
+                    if entry.name.endswith(self.suffix):
+                        st = entry.stat()
+                        entries.append((entry.path, st.st_size, st.st_mtime))
+        except OSError:
+            pass
+        return entries
+
+    def _evict(self):
+        # Other processes may have written too, so recount from disk.
+        # Trim to 90% so every put after the cap is reached doesn't rescan.
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        size = sum(e[1] for e in entries)
+        target = self.max_bytes * 0.9
+        for path, entry_size, _ in entries:
+            if size <= target:
+                break
+            if _remove(path):
+                size -= entry_size
+        self._size = size
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
+# --- Conversion results ---
+
+# Bump when parser output changes, so results from older versions aren't served
+RESULT_CACHE_VERSION = "1"
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_result_cache = DiskCache("results", RESULT_CACHE_MAX_BYTES, suffix=".df")
+
+def file_sha256(pdf):
+    """SHA-256 of a PDF given as a path, a file-like object, bytes or a DocumentSession."""
+    if isinstance(pdf, DocumentSession):
+        return pdf.sha256()
+    if isinstance(pdf, (bytes, bytearray)):
+        return hashlib.sha256(pdf).hexdigest()
+    h = hashlib.sha256()
+    if hasattr(pdf, "read"):
+        # Streamlit uploads: hash from the start and leave the position as it was
+        pos = pdf.tell()
+        pdf.seek(0)
+        for chunk in iter(lambda: pdf.read(1024 * 1024), b""):
+            h.update(chunk)
+        pdf.seek(pos)
+        return h.hexdigest()
+    with open(pdf, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def conversion_key(pdf, password=None, **settings):
+    """
+    Cache key of one conversion: the PDF contents plus every setting that changes
+    the output (mode, areas, headers, grid/OCR flags, skip_rows...).
+    The password is part of the key so a cached result is only served to
+    someone who could have decrypted the file.
+    """
+    import json
+    return hash_key(
+        RESULT_CACHE_VERSION,
+        file_sha256(pdf),
+        password or "",
+        # Only the top level is sorted: areas mix int page keys with 'all'
+        json.dumps(sorted(settings.items()), default=str),
+    )
+
+def load_result(key):
+    """Cached DataFrame for key, or None."""
+    import io
+    import pandas as pd
+    data = _result_cache.get(key)
+    if data is None:
+        return None
+    try:
+        if data[:4] == b"PAR1":
+            return pd.read_parquet(io.BytesIO(data))
+        return pd.read_pickle(io.BytesIO(data))
+    except Exception as e:
+        print(f"Could not read cached result: {e}")
+        return None
+
+def store_result(key, df):
+    import io
+    buf = io.BytesIO()
+    try:
+        # Parquet (columnar, compressed) when pyarrow is installed
+        df.to_parquet(buf, index=False)
+    except Exception:
+        # No parquet engine, or object columns mixing numbers and text
+        buf = io.BytesIO()
+        df.to_pickle(buf, compression=None)
+    _result_cache.put(key, buf.getvalue())
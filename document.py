@@ -0,0 +1,155 @@
+import os
+import threading
+from contextlib import contextmanager
+from timing import stage
+
+class DocumentSession:
+    """
+    One PDF (a path, bytes or a file object) opened for a whole job: the crop
+    selector, its grid preview and Auto-Detect, and the conversion that follows
+    share the same handles, so an encrypted statement is decrypted once per
+    library instead of once per step.
+
+    Pass the session wherever a parser takes pdf_path. Each library's handle is
+    opened on first use (pdfplumber_doc, pdfium_doc, mupdf_doc) and closed by
+    close() or at the end of a with block, never by whoever borrowed it.
+    None of the libraries is thread-safe: threads sharing a handle hold
+    plumber_lock / pdfium_lock around its use.
+
+    name overrides the file name outputs are named after (see utils.get_save_path).
+    """
+    def __init__(self, source, password=None, name=None):
+        if hasattr(source, "read"):
+            # Two libraries seeking around one file object would trip each other up
+            source = _read_all(source)
+        self.source = source
+        self.password = password
+        self._name = name
+        self.plumber_lock = threading.Lock()
+        self.pdfium_lock = threading.RLock()
+        self._open_lock = threading.Lock()
+        self._plumber = None
+        self._pdfium = None
+        self._mupdf = None
+        self._sha256 = None
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def name(self):
+        """The file name outputs are named after."""
+        if self._name:
+            return self._name
+        return os.fspath(self.source) if isinstance(self.source, (str, os.PathLike)) else "statement.pdf"
+
+    @property
+    def plumber_doc(self):
+        with self._open_lock:
+            self._check_open()
+            if self._plumber is None:
+                from utils import open_pdf
+                self._plumber = open_pdf(self.source, self.password)
+            return self._plumber
+
+    @property
+    def pdfium_doc(self):
+        with self._open_lock:
+            self._check_open()
+            if self._pdfium is None:
+                import pypdfium2 as pdfium
+                with stage("open", library="pypdfium2"):
+                    self._pdfium = pdfium.PdfDocument(self.source, password=self.password)
+            return self._pdfium
+
+    @property
+    def mupdf_doc(self):
+        with self._open_lock:
+            self._check_open()
+            if self._mupdf is None:
+                self._mupdf = _open_mupdf(self.source, self.password)
+            return self._mupdf
+
+    def page_count(self):
+        """From whichever handle is already open, else from pypdfium2 (the quickest to open)."""
+        if self._pdfium is not None:
+            with self.pdfium_lock:
+                return len(self._pdfium)
+        if self._plumber is not None:
+            with self.plumber_lock:
+                return len(self._plumber.pages)
+        if self._mupdf is not None:
+            return len(self._mupdf)
+        try:
+            doc = self.pdfium_doc
+        except ImportError:
+            with self.plumber_lock:
+                return len(self.plumber_doc.pages)
+        with self.pdfium_lock:
+            return len(doc)
+
+    def sha256(self):
+        """file_sha256 of the PDF, computed once per session."""
+        if self._sha256 is None:
+            from cache import file_sha256
+            self._sha256 = file_sha256(self.source)
+        return self._sha256
+
+    def close(self):
+        with self._open_lock:
+            self.closed = True
+            handles = (self._plumber, self._pdfium, self._mupdf)
+            self._plumber = self._pdfium = self._mupdf = None
+        for handle in handles:
+            if handle is not None:
+                handle.close()
+
+    def _check_open(self):
+        if self.closed:
+            raise ValueError("The document session is closed.")
+
+@contextmanager
+def use_session(pdf_path, password=None):
+    """
+    The DocumentSession passed in, or a new one on the path, bytes or file
+    object, closed on exit. Lets a parser take either without closing a
+    session it was lent.
+    """
+    if isinstance(pdf_path, DocumentSession):
+        yield pdf_path
+        return
+    session = DocumentSession(pdf_path, password)
+    try:
+        yield session
+    finally:
+        session.close()
+
+def pdf_source(pdf_path):
+    """The path, bytes or file object itself, also out of a DocumentSession."""
+    return pdf_path.source if isinstance(pdf_path, DocumentSession) else pdf_path
+
+def _open_mupdf(source, password=None):
+    try:
+        import pymupdf
+    except ImportError:
+        import fitz as pymupdf
+    with stage("open", library="pymupdf"):
+        if isinstance(source, (bytes, bytearray)):
+            doc = pymupdf.open(stream=bytes(source), filetype="pdf")
+        else:
+            doc = pymupdf.open(source)
+        if doc.needs_pass and not doc.authenticate(password or ""):
+            doc.close()
+            raise ValueError("Incorrect password for this PDF.")
+    return doc
+
+def _read_all(file_obj):
+    pos = file_obj.tell()
+    file_obj.seek(0)
+    data = file_obj.read()
+    file_obj.seek(pos)
+    return data
@@ -0,0 +1,92 @@
+import threading
+from background import LatestWorker
+from utils import PAGE_WINDOW, release_parsed_objects
+
+# Same settings the crop selector has always previewed with
+INTERSECTION_TOLERANCE = 15
+
+def grid_key(page_index, bbox, use_lines):
+    # Boxes come from mouse coordinates divided by the zoom; round away float noise
+    return (page_index, tuple(round(v, 2) for v in bbox), bool(use_lines))
+
+def find_cells(page, bbox, use_lines):
+    """Table cells (x0, top, x1, bottom) that pdfplumber finds inside bbox."""
+    if bbox[2] <= bbox[0] or bbox[3] <= bbox[1]:
+        return []
+    from spatial_index import crop_page
+    # The page's index is kept, so each further box on it is found without a full scan
+    cropped = crop_page(page, bbox)
+    strategy = "lines" if use_lines else "text"
+    settings = {
+        "vertical_strategy": strategy,
+        "horizontal_strategy": strategy,
+        "intersection_x_tolerance": INTERSECTION_TOLERANCE,
+        "intersection_y_tolerance": INTERSECTION_TOLERANCE,
+    }
+    return [cell for table in cropped.find_tables(settings) for cell in table.cells if cell[0] is not None]
+
+class GridPreviewer:
+    """
+    Detected cell geometry per (page, box, strategy), computed once on a
+    background thread. pdfplumber documents aren't thread-safe, so every use of
+    the document goes through self.lock (pass the lock other users hold).
+    """
+    def __init__(self, plumber_doc, lock=None):
+        self.doc = plumber_doc
+        self.lock = lock or threading.Lock()
+        self._cells = {}
+        self._worker = LatestWorker(self._compute, name="Grid preview")
+
+    def cells(self, page_index, bbox, use_lines):
+        """Cached cells for the box, or None if not computed yet."""
+        return self._cells.get(grid_key(page_index, bbox, use_lines))
+
+    def request(self, boxes, use_lines):
+        """Computes the missing (page_index, bbox) boxes in the background, replacing earlier requests."""
+        missing = [grid_key(i, bbox, use_lines) for i, bbox in boxes if self.cells(i, bbox, use_lines) is None]
+        self._worker.submit(missing)
+
+    def idle(self):
+        return self._worker.idle()
+
+    def close(self):
+        self._worker.close()
+        self._cells.clear()
+
+    def _compute(self, key):
+        if key in self._cells:
+            return
+        page_index, bbox, use_lines = key
+        try:
+            with self.lock:
+                cells = find_cells(self.doc.pages[page_index], bbox, use_lines)
+        except Exception as e:
+            print(f"Grid preview error: {e}")
+            cells = []
+        # Cache failures as empty so the UI stops waiting on them
+        self._cells[key] = cells
+
+def detect_tables(plumber_doc, lock, page_indices, results, cancel):
+    """
+    Worker for the selector's Auto-Detect: puts (page_index, [table bboxes])
+    on the results queue page by page, then None when done. Parsed PDF objects
+    are released every PAGE_WINDOW pages so long statements don't pile them up. Stops between
+    pages once the cancel event is set; an error is put as ("error", message).
+    """
+    from spatial_index import drop_index
+    try:
+        for n, i in enumerate(page_indices, 1):
+            if cancel.is_set():
+                break
+            with lock:
+                page = plumber_doc.pages[i]
+                bboxes = [t.bbox for t in page.find_tables()]
+                # Drop the parsed objects and any grid preview index of them; a 300-page run would otherwise keep them all
+                page.close()
+                drop_index(page)
+                if n % PAGE_WINDOW == 0:
+                    release_parsed_objects(plumber_doc)
+            results.put((i, bboxes))
+    except Exception as e:
+        results.put(("error", str(e)))
+    results.put(None)
@@ -0,0 +1,138 @@
+"""
+Layout-template mode for parse_custom's text tables. Statement pages share one
+column layout, so the columns pdfplumber's "text" strategy finds on the first
+page of an area are kept, and the pages that follow are checked against them
+instead of going through pdfplumber's whole table search.
+
+A page whose own column edges are the learned ones, with no word running
+across a learned boundary, is the same plain grid of columns and rows: its
+cells are filled straight from the chars (the same midpoint-in-cell rule and
+cell text as pdfplumber's Table.extract), skipping the intersection and cell
+search that is most of the time extract_tables spends on a page. The grid is
+cut at the page's own edges, never at the learned ones, so the rows are the
+ones extract_tables gives.
+
+Any other page (another layout, a shifted table, a word across a column) is
+extracted with the text strategy again and its columns become the template.
+"""
+import numpy as np
+from pdfplumber import utils
+from pdfplumber.table import (
+    Table, TableSettings, cells_to_tables, edges_to_intersections, intersections_to_cells,
+    merge_edges, words_to_edges_h, words_to_edges_v,
+)
+from timing import counter
+
+# Points a column edge of the page may be off a learned boundary and still
+# match it: pdfplumber's snap tolerance, within which edges are merged anyway
+BOUNDARY_TOLERANCE = 3.0
+
+class LayoutTemplates:
+    """
+    Learned column boundaries per selected area, for one run of parse_custom.
+    table_settings are the text-strategy settings parse_custom uses.
+    """
+    def __init__(self, table_settings):
+        self.settings = TableSettings.resolve(table_settings)
+        # area key -> interior column boundaries of the learning page
+        self._columns = {}
+
+    def extract_tables(self, cropped_page, bbox, page_index=None):
+        """Same result as cropped_page.extract_tables(table_settings), through the area's template once learned."""
+        s = self.settings
+        key = _area_key(bbox)
+        words = cropped_page.extract_words(**s.text_settings)
+        edges = self._edges(words)
+        interior = self._columns.get(key)
+        if interior is not None:
+            grid = _grid(edges, s) if _fits(words, edges, interior) else None
+            if grid is not None:
+                counter("template_reused", 1, page=page_index)
+                cols, rows = grid
+                if (len(cols) - 1) * (len(rows) - 1) <= 1:
+                    # pdfplumber drops single-cell tables
+                    return []
+                return [_fill_grid(cropped_page.chars, cols, rows, s.text_settings)]
+            counter("template_relearned", 1, page=page_index)
+
+        intersections = edges_to_intersections(edges, s.intersection_x_tolerance, s.intersection_y_tolerance)
+        tables = [Table(cropped_page, cells) for cells in cells_to_tables(intersections_to_cells(intersections))]
+        if len(tables) == 1:
+            bounds = sorted({x for cell in tables[0].cells for x in (cell[0], cell[2])})
+            self._columns[key] = bounds[1:-1]
+        return [table.extract(**s.text_settings) for table in tables]
+
+    def _edges(self, words):
+        """TableFinder.get_edges for the text strategy, from the page's words."""
+        s = self.settings
+        edges = words_to_edges_v(words, word_threshold=s.min_words_vertical) + words_to_edges_h(words, word_threshold=s.min_words_horizontal)
+        edges = merge_edges(edges, s.snap_x_tolerance, s.snap_y_tolerance, s.join_x_tolerance, s.join_y_tolerance)
+        return utils.filter_edges(edges, min_length=s.edge_min_length)
+
+def _fits(words, edges, interior):
+    """
+    Whether the page has the learned columns: its inner column edges are the
+    learned boundaries, one for one, and none of its words runs across one.
+    """
+    page_interior = sorted(e["x0"] for e in edges if e["orientation"] == "v")[1:-1]
+    if len(page_interior) != len(interior):
+        return False
+    if any(abs(x - b) > BOUNDARY_TOLERANCE for x, b in zip(page_interior, interior)):
+        return False
+    if not words or not interior:
+        return True
+    x0 = np.array([w["x0"] for w in words])[:, None]
+    x1 = np.array([w["x1"] for w in words])[:, None]
+    b = np.asarray(interior)[None, :]
+    return not ((x0 < b) & (x1 > b)).any()
+
+def _grid(edges, s):
+    """
+    (column xs, row tops) if every vertical edge meets every horizontal one
+    within the intersection tolerances: then pdfplumber's intersections are
+    the full grid and its cells one table of all the grid's cells. None otherwise.
+    """
+    v = [e for e in edges if e["orientation"] == "v"]
+    h = [e for e in edges if e["orientation"] == "h"]
+    if len(v) < 2 or len(h) < 2:
+        return None
+    cols = sorted(e["x0"] for e in v)
+    rows = sorted(e["top"] for e in h)
+    if len(set(cols)) != len(cols) or len(set(rows)) != len(rows):
+        return None
+    # The conditions of edges_to_intersections, for every pair at once
+    vx = np.array([e["x0"] for e in v])[:, None]
+    vtop = np.array([e["top"] for e in v])[:, None]
+    vbottom = np.array([e["bottom"] for e in v])[:, None]
+    htop = np.array([e["top"] for e in h])[None, :]
+    hx0 = np.array([e["x0"] for e in h])[None, :]
+    hx1 = np.array([e["x1"] for e in h])[None, :]
+    xt, yt = s.intersection_x_tolerance, s.intersection_y_tolerance
+    meets = (vtop <= htop + yt) & (vbottom >= htop - yt) & (vx >= hx0 - xt) & (vx <= hx1 + xt)
+    return (cols, rows) if meets.all() else None
+
+def _fill_grid(chars, cols, rows, text_settings):
+    """Table.extract for the grid cols x rows: each char goes to the cell holding its midpoint."""
+    table = [[""] * (len(cols) - 1) for _ in range(len(rows) - 1)]
+    if not chars:
+        return table
+    h_mid = np.array([(c["x0"] + c["x1"]) / 2 for c in chars])
+    v_mid = np.array([(c["top"] + c["bottom"]) / 2 for c in chars])
+    col = np.searchsorted(cols, h_mid, side="right") - 1
+    row = np.searchsorted(rows, v_mid, side="right") - 1
+    inside = (col >= 0) & (col < len(cols) - 1) & (row >= 0) & (row < len(rows) - 1)
+    idx = np.flatnonzero(inside)
+    # Stable sort by cell keeps each cell's chars in page order, as Table.extract has them
+    cell = row[idx] * (len(cols) - 1) + col[idx]
+    order = np.argsort(cell, kind="stable")
+    idx, cell = idx[order], cell[order]
+    starts = np.flatnonzero(np.r_[True, cell[1:] != cell[:-1]])
+    ends = np.r_[starts[1:], len(cell)]
+    for start, end in zip(starts, ends):
+        r, c = divmod(int(cell[start]), len(cols) - 1)
+        table[r][c] = utils.extract_text([chars[k] for k in idx[start:end]], **text_settings)
+    return table
+
+def _area_key(bbox):
+    # Boxes come from mouse coordinates divided by the zoom; round away float noise
+    return tuple(round(v, 2) for v in bbox)
@@ -0,0 +1,124 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from cache import DiskCache, hash_key
+from timing import stage, counter
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Render at 3x scale (approx 216 DPI)
+OCR_SCALE = 3
+# Grayscale pixels darker than this become black, the rest white
+OCR_THRESHOLD = 140
+# Assume uniform block of text - PSM 6
+OCR_CONFIG = '--psm 6'
+# Seconds a single tesseract run may take before it is killed
+OCR_TIMEOUT = 120
+# Tesseract processes allowed at once in this process, across all conversions
+# (Streamlit sessions share one process), so one upload can't take every core
+MAX_OCR_WORKERS = max(1, (os.cpu_count() or 1) // 2)
+
+# OCR text is small, this holds tens of thousands of areas
+OCR_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_tesseract_slots = threading.BoundedSemaphore(MAX_OCR_WORKERS)
+_ocr_cache = DiskCache("ocr", OCR_CACHE_MAX_BYTES, suffix=".txt")
+
+def ocr_available():
+    return bool(pytesseract and Image)
+
+class PageRaster:
+    """
+    Grayscale bitmap of one page, rendered on first use and shared by every OCR
+    area on that page, so a page is rasterized at most once however many areas
+    were selected on it.
+    """
+    def __init__(self, pdfium_doc, page_index, scale=OCR_SCALE):
+        self.pdfium_doc = pdfium_doc
+        self.page_index = page_index
+        self.scale = scale
+        self._gray = None
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            page = self.pdfium_doc[self.page_index]
+            try:
+                # Render straight to 8-bit grayscale: a third of the memory of RGB
+                # and no PIL conversion afterwards
+                with stage("render", page=self.page_index):
+                    bitmap = page.render(scale=self.scale, grayscale=True)
+                    # Copy out of the pdfium buffer so the bitmap can be freed right away
+                    self._gray = np.array(bitmap.to_numpy(), dtype=np.uint8)
+                    bitmap.close()
+            finally:
+                page.close()
+        return self._gray
+
+    def region(self, bbox, threshold=OCR_THRESHOLD):
+        """Thresholded (black/white) crop of a PDF-space bbox as a boolean array."""
+        gray = self.gray
+        height, width = gray.shape
+        x0, y0, x1, y1 = (round(v * self.scale) for v in bbox)
+        x0, x1 = max(0, x0), min(width, x1)
+        y0, y1 = max(0, y0), min(height, y1)
+        return gray[y0:y1, x0:x1] >= threshold
+
+    def close(self):
+        self._gray = None
+
+def ocr_region(raster, bbox, config=OCR_CONFIG, timeout=OCR_TIMEOUT):
+    """Runs tesseract on one area of a rendered page and returns the raw text."""
+    return _ocr_mask(raster.region(bbox), raster.scale, config, timeout)
+
+def ocr_cache_key(mask, scale, config):
+    """Content address of an OCR job: the thresholded pixels plus everything that shapes the text."""
+    return hash_key(np.packbits(mask).tobytes(), str(mask.shape), str(scale), config)
+
+def _ocr_mask(mask, scale, config, timeout):
+    if mask.size == 0:
+        return ""
+    # Re-running the converter on the same scan (new headers, skip_rows...)
+    # renders the same pixels, so tesseract only runs on the first pass
+    key = ocr_cache_key(mask, scale, config)
+    cached = _ocr_cache.get(key)
+    if cached is not None:
+        counter("ocr_cache_hits", 1)
+        return cached.decode("utf-8")
+
+    # A boolean array becomes a 1-bit PIL image (True = white)
+    img = Image.fromarray(mask)
+    with _tesseract_slots, stage("ocr", pixels=mask.size):
+        # pytesseract kills the tesseract process and raises RuntimeError on timeout
+        text = pytesseract.image_to_string(img, config=config, timeout=timeout)
+    _ocr_cache.put(key, text.encode("utf-8"))
+    return text
+
+class OcrPool:
+    """
+    Runs tesseract on page areas in the background while the caller keeps
+    rendering and extracting the next pages.
+    Every job is its own tesseract process, so a small thread pool is enough to
+    keep several cores busy without pickling bitmaps to worker processes.
+    """
+    def __init__(self, workers=1, config=OCR_CONFIG, timeout=OCR_TIMEOUT):
+        self.workers = max(1, min(workers, MAX_OCR_WORKERS))
+        self.config = config
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+
+    def submit(self, raster, bbox):
+        """Crops the area now (so the page bitmap can be dropped) and queues the OCR."""
+        return self._executor.submit(_ocr_mask, raster.region(bbox), raster.scale, self.config, self.timeout)
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
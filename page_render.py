@@ -0,0 +1,138 @@
+import math
+import threading
+from collections import OrderedDict
+from background import LatestWorker
+
+# Rendered pages kept in memory. An A4 page at zoom 1.0 is about 1.4 MB of RGB,
+# at zoom 2.0 about 5.6 MB.
+RENDER_CACHE_MAX_BYTES = 192 * 1024 * 1024
+# Scale of the quick render shown while the sharp one is prepared
+PLACEHOLDER_SCALE = 0.25
+
+def zoom_key(zoom):
+    # fit_page zooms are arbitrary floats; treat near-equal ones as the same zoom
+    return round(zoom, 4)
+
+def _image_bytes(image):
+    return image.width * image.height * len(image.getbands())
+
+class PageBitmapCache:
+    """
+    LRU cache of rendered pages (PIL images) keyed by (page, zoom), with one
+    background thread that renders requested pages ahead of time. The thread
+    never touches Tk; the UI polls get() for the pages it is waiting on.
+
+    pdfium is not thread-safe, so every call into the document goes through
+    self.lock (pass the lock other users of the document hold). The cached
+    images have their own lock, and the page count and sizes are read once up
+    front, so get(), prefetch(), len() and page_size() never wait on a render;
+    placeholder() only renders when the document is free.
+    """
+    def __init__(self, pdfium_doc, max_bytes=RENDER_CACHE_MAX_BYTES, lock=None):
+        self.doc = pdfium_doc
+        self.max_bytes = max_bytes
+        self.lock = lock or threading.RLock()
+        self._cache_lock = threading.Lock()
+        self._images = OrderedDict()
+        self._placeholders = {}
+        self._bytes = 0
+        with self.lock:
+            # From the page tree, without loading the pages
+            self._sizes = [pdfium_doc.get_page_size(i) for i in range(len(pdfium_doc))]
+        self._worker = LatestWorker(self._prerender, name="Prerender")
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def page_size(self, page_index):
+        return self._sizes[page_index]
+
+    def get(self, page_index, zoom):
+        """The cached full-size render, or None."""
+        key = (page_index, zoom_key(zoom))
+        with self._cache_lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def render(self, page_index, zoom):
+        """Full-size render of a page, from the cache or rendered now."""
+        image = self.get(page_index, zoom)
+        if image is None:
+            image = self._render(page_index, zoom)
+            self._store((page_index, zoom_key(zoom)), image)
+        return image
+
+    def placeholder(self, page_index, zoom):
+        """
+        A blurry stand-in at the final size: another zoom of the same page if
+        one is cached, else a quick low-resolution render, scaled up. While
+        the background thread has the document, a blank page instead.
+        """
+        from PIL import Image
+
+        # Same rounding as pdfium's render, so the boxes line up when the sharp image replaces it
+        width, height = self.page_size(page_index)
+        size = (max(1, math.ceil(width * zoom)), max(1, math.ceil(height * zoom)))
+        with self._cache_lock:
+            source = next((img for (i, _), img in reversed(self._images.items()) if i == page_index), None)
+            if source is None:
+                source = self._placeholders.get(page_index)
+        if source is None:
+            if not self.lock.acquire(blocking=False):
+                return Image.new("RGB", size, "white")
+            try:
+                source = self._render(page_index, PLACEHOLDER_SCALE)
+            finally:
+                self.lock.release()
+            with self._cache_lock:
+                self._placeholders[page_index] = source
+        # NEAREST: a few ms even for large pages, where smoother filters take tens
+        return source.resize(size, Image.NEAREST)
+
+    def prefetch(self, page_indices, zoom):
+        """
+        Queues pages for the background renderer, first one first. Replaces
+        whatever was still queued, since that was for an earlier page or zoom.
+        """
+        count = len(self._sizes)
+        self._worker.submit((i, zoom_key(zoom)) for i in page_indices if 0 <= i < count)
+
+    def close(self):
+        """Stops the background renderer and drops the cached images. The document stays open."""
+        self._worker.close()
+        with self._cache_lock:
+            self._images.clear()
+            self._placeholders.clear()
+            self._bytes = 0
+
+    def _render(self, page_index, scale):
+        with self.lock:
+            page = self.doc[page_index]
+            try:
+                bitmap = page.render(scale=scale)
+            finally:
+                page.close()
+        try:
+            # Copy out of the pdfium buffer so the bitmap can be freed right away
+            image = bitmap.to_pil().copy()
+        finally:
+            with self.lock:
+                bitmap.close()
+        return image
+
+    def _store(self, key, image):
+        with self._cache_lock:
+            if key in self._images:
+                return
+            self._images[key] = image
+            self._bytes += _image_bytes(image)
+            # Keep at least the newest image even if it alone is over budget
+            while self._bytes > self.max_bytes and len(self._images) > 1:
+                _, old = self._images.popitem(last=False)
+                self._bytes -= _image_bytes(old)
+
+    def _prerender(self, item):
+        page_index, zoom = item
+        self.render(page_index, zoom)
@@ -0,0 +1,75 @@
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from document import pdf_source, use_session
+
+# Each worker gets several small shards instead of one big one, so a few dense
+# pages don't leave the other workers idle at the end of the run.
+SHARDS_PER_WORKER = 4
+
+def max_workers():
+    """Number of worker processes that makes sense on this machine."""
+    return os.cpu_count() or 1
+
+def count_pages(pdf_path, password=None):
+    with use_session(pdf_path, password) as session:
+        return session.page_count()
+
+def page_shards(total_pages, workers):
+    """Splits range(total_pages) into contiguous (start, stop) shards."""
+    if total_pages <= 0:
+        return []
+    size = max(1, math.ceil(total_pages / (workers * SHARDS_PER_WORKER)))
+    return [(start, min(start + size, total_pages)) for start in range(0, total_pages, size)]
+
+def iter_page_results(worker_fn, pdf_path, password, workers, *args, progress=None):
+    """
+    Runs worker_fn(path, password, start, stop, *args) for every page shard in a
+    process pool and yields the per-page results in page order.
+    worker_fn must be a module-level function returning one result per page.
+    Each worker opens its own PDF handles (a DocumentSession's can't cross
+    processes); file objects and bytes (e.g. Streamlit uploads) are spilled to
+    a temp file so shards don't each pickle the whole PDF.
+    progress is updated here, in the calling process, as each page's result
+    comes back; cancelling it drops the shards that haven't started.
+    """
+    temp_path = None
+    source = pdf_source(pdf_path)
+    if isinstance(source, (str, os.PathLike)):
+        path = source
+    else:
+        data = source if isinstance(source, (bytes, bytearray)) else _read_all(source)
+        fd, temp_path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        path = temp_path
+
+    try:
+        # A session already has the document open
+        total = count_pages(pdf_path, password)
+        shards = page_shards(total, workers)
+        if not shards:
+            return
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(shards)))
+        try:
+            futures = [pool.submit(worker_fn, path, password, start, stop, *args) for start, stop in shards]
+            page_index = 0
+            for future in futures:
+                for result in future.result():
+                    if progress:
+                        progress.page(page_index, total)
+                    page_index += 1
+                    yield result
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+
+def _read_all(file_obj):
+    pos = file_obj.tell()
+    file_obj.seek(0)
+    data = file_obj.read()
+    file_obj.seek(pos)
+    return data
@@ -1,225 +1,331 @@
 import re
+from collections import deque
+from concurrent.futures import Future
+from itertools import chain, islice
+from operator import itemgetter
+import numpy as np
 import pandas as pd
-import pdfplumber
 try:
     import pypdfium2 as pdfium
 except ImportError:
     pdfium = None
-from utils import get_save_path, get_cropped_page
+from document import use_session
+from utils import EXCEL_BATCH_ROWS, get_save_path, get_cropped_page, iter_pages, convert_numeric_columns, write_rows_to_excel
+from parallel import iter_page_results
+from ocr import OcrPool, PageRaster, ocr_available, ocr_region
+from progress import track
+from spatial_index import crop_page
+from timing import counter, enabled, stage
 
-try:
-    import pytesseract
-except ImportError:
-    pytesseract = None
+# Points a word's vertical midpoint may lie outside a row's band in column mode
+ROW_TOLERANCE = 3
 
-try:
-    from PIL import Image
-except ImportError:
-    Image = None
+def iter_transactions(pdf_path, password=None, areas=None, column_indices=None, use_grid_lines=False, use_ocr=False, merge_multiline=False, skip_rows=0, workers=1, ocr_workers=1, progress=None, backend=None, use_template=False):
+    """
+    Yields the extracted rows page by page, applying the multi-line merge and
+    skip_rows post-processing as rows stream past.
+    With workers > 1 the pages are extracted in a process pool.
+    With use_ocr, up to ocr_workers tesseract runs go on in the background.
+    Grid-line tables need the ruling lines only pdfplumber extracts, so
+    use_grid_lines always reads the text with pdfplumber, whatever backend says.
+    use_template learns each area's columns on the first page and reuses them
+    on the pages that follow (see layout_template); it has no effect with
+    use_grid_lines.
+    """
+    if use_grid_lines:
+        backend = "pdfplumber"
+    if workers > 1:
+        page_results = iter_page_results(_parse_pages, pdf_path, password, workers, areas, column_indices, use_grid_lines, use_ocr, ocr_workers, backend, use_template, progress=progress)
+    else:
+        page_results = _iter_page_rows(pdf_path, password, 0, None, areas, column_indices, use_grid_lines, use_ocr, ocr_workers, progress, backend, use_template)
+    rows = (row for page_rows in page_results for row in page_rows)
+
+    # Post-Processing Options
+    if merge_multiline:
+        rows = _merge_multiline(rows)
+    if skip_rows > 0:
+        rows = _skip_top_rows(rows, skip_rows)
+    yield from track(rows, progress)
 
-def parse_custom(pdf_path, password=None, areas=None, headers=None, column_indices=None, use_grid_lines=False, use_ocr=False, merge_multiline=False, skip_rows=0):
+def parse_custom(pdf_path, password=None, areas=None, headers=None, column_indices=None, use_grid_lines=False, use_ocr=False, merge_multiline=False, skip_rows=0, workers=1, ocr_workers=1, progress=None, backend=None, use_template=False):
     """
     Parses a PDF based on visually selected areas and user-provided headers.
     Uses pdfplumber's table extraction with text-based strategies.
     """
+    rows = list(iter_transactions(pdf_path, password, areas=areas, column_indices=column_indices, use_grid_lines=use_grid_lines, use_ocr=use_ocr, merge_multiline=merge_multiline, skip_rows=skip_rows, workers=workers, ocr_workers=ocr_workers, progress=progress, backend=backend, use_template=use_template))
+    return build_dataframe(rows, headers)
 
-    rows = []
+def _merge_multiline(rows):
+    """Merges rows whose first column is empty into the previous row."""
+    prev_row = None
+    for row in rows:
+        # If first column is empty (and row has content), assume continuation
+        if not row[0] and any(row) and prev_row:
+            # Merge text into previous row
+            for k in range(len(row)):
+                if row[k]:
+                    prev_row[k] = (str(prev_row[k]) + " " + str(row[k])).strip()
+        else:
+            if prev_row: yield prev_row
+            prev_row = row
+    if prev_row: yield prev_row
+
+def _skip_top_rows(rows, skip_rows):
+    """Drops the first skip_rows rows, unless that would leave no rows at all."""
+    skipped = []
+    for row in rows:
+        if skipped is not None:
+            if len(skipped) < skip_rows:
+                skipped.append(row)
+                continue
+            skipped = None
+        yield row
+    if skipped:
+        yield from skipped
+
+def build_dataframe(rows, headers=None):
+    """Builds the output DataFrame, fitting the headers to the widest row."""
+    # Dynamic Header Adjustment
+    if not rows:
+        final_headers = headers if headers else ["No Data"]
+    else:
+        max_cols = max(len(r) for r in rows)
+        final_headers = fit_headers(headers, max_cols)
+        if len(final_headers) > max_cols:
+            # Pad rows to match headers
+            for r in rows:
+                r.extend([""] * (len(final_headers) - len(r)))
+
+    with stage("dataframe", rows=len(rows)):
+        df = pd.DataFrame(rows, columns=final_headers)
+    
+    # Attempt to convert numeric strings to actual numbers for Excel
+    with stage("normalize"):
+        convert_numeric_columns(df)
+
+    return df
+
+def fit_headers(headers, width):
+    """The user's headers, with "Column N" added for columns past the last of them."""
+    final_headers = list(headers) if headers else []
+    final_headers.extend(f"Column {i+1}" for i in range(len(final_headers), width))
+    return final_headers
+
+def fixed_row_width(areas, column_indices):
+    """
+    The width of every row when it is known before parsing: column_indices
+    picks the cells, and no page has areas side by side (column mode rows are
+    as wide as their group of areas). None otherwise.
+    """
+    if not column_indices:
+        return None
+    for bboxes in (areas or {}).values():
+        if any(len(group) > 1 for group in group_areas(list(bboxes))):
+            return None
+    return len(column_indices)
+
+def _normalized_rows(rows, width):
+    """Rows as build_dataframe leaves them (numbers converted), a batch at a time."""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, EXCEL_BATCH_ROWS))
+        if not batch:
+            return
+        with stage("normalize", rows=len(batch)):
+            df = convert_numeric_columns(pd.DataFrame(batch, columns=range(width)))
+        yield from df.itertuples(index=False, name=None)
+
+def _table_settings(use_grid_lines):
     # Use text strategy as it works best for visual areas without explicit lines
-    table_settings = {
+    return {
         "vertical_strategy": "lines" if use_grid_lines else "text",
         "horizontal_strategy": "lines" if use_grid_lines else "text",
         "intersection_x_tolerance": 15,
         "intersection_y_tolerance": 15,
     }
 
-    pdfium_doc = None
-    if use_ocr and pdfium:
-        pdfium_doc = pdfium.PdfDocument(pdf_path, password=password)
-
-    with pdfplumber.open(pdf_path, password=password) as pdf:
-        for i, page in enumerate(pdf.pages):
-            # Determine areas for this page (support list of rects)
-            page_bboxes = []
-            if areas:
-                if 'all' in areas:
-                    page_bboxes = areas['all']
-                elif i in areas:
-                    page_bboxes = areas[i]
-            elif areas is None:
-                # Fallback to full page if no areas defined (e.g. libraries missing)
-                page_bboxes = [page.bbox]
-            
-            # If no areas defined, skip page
-            if not page_bboxes:
-                continue
-            
-            # 1. Group bboxes into "Row Groups" (tables or split tables) based on Y-overlap
-            # Sort by top Y first
-            page_bboxes.sort(key=lambda b: b[1]) 
+def _iter_page_rows(pdf_path, password, start, stop, areas, column_indices, use_grid_lines, use_ocr, ocr_workers=1, progress=None, backend=None, use_template=False):
+    """Yields the raw rows of each page in [start, stop), one list per page."""
+    table_settings = _table_settings(use_grid_lines)
+    templates = None
+    if use_template and not use_grid_lines:
+        from layout_template import LayoutTemplates
+        templates = LayoutTemplates(table_settings)
+    # The text and the OCR renders come from one session: one open (and decryption) per library
+    with use_session(pdf_path, password) as session:
+        pdfium_doc = None
+        ocr_pool = None
+        if use_ocr and pdfium:
+            pdfium_doc = session.pdfium_doc
+            if ocr_available():
+                ocr_pool = OcrPool(ocr_workers)
+        # Pages whose OCR jobs are still running. Rendering and text extraction run
+        # ahead of tesseract, but only a few pages deep to bound memory.
+        pending = deque()
+        lookahead = 2 * ocr_pool.workers if ocr_pool else 0
+        try:
+            for i, page in iter_pages(session, password, start, stop, progress, backend):
+                pending.append((i, parse_page(page, i, areas, table_settings, column_indices, pdfium_doc, ocr_pool, templates)))
+                while len(pending) > lookahead:
+                    yield _resolve_ocr(*pending.popleft(), column_indices)
+            while pending:
+                yield _resolve_ocr(*pending.popleft(), column_indices)
+        finally:
+            if ocr_pool:
+                ocr_pool.close()
+
+def _parse_pages(pdf_path, password, start, stop, areas, column_indices, use_grid_lines, use_ocr, ocr_workers=1, backend=None, use_template=False):
+    """Process-pool worker: opens its own document session (and learns its own layout templates) for its shard."""
+    return list(_iter_page_rows(pdf_path, password, start, stop, areas, column_indices, use_grid_lines, use_ocr, ocr_workers, backend=backend, use_template=use_template))
+
+def _resolve_ocr(i, rows, column_indices):
+    """Replaces the pending OCR jobs in a page's rows by the rows they produced."""
+    resolved = []
+    for row in rows:
+        if not isinstance(row, Future):
+            resolved.append(row)
+            continue
+        try:
+            resolved.extend(ocr_rows(row.result(), column_indices))
+        except Exception as e:
+            print(f"OCR Error on page {i}: {e}")
+    counter("rows", len(resolved), page=i)
+    return resolved
+
+def ocr_rows(ocr_text, column_indices):
+    """Turns tesseract output into rows."""
+    rows = []
+    # Simple parsing: split by lines, then by whitespace (approximate)
+    for line in ocr_text.split('\n'):
+        if line.strip():
+            # Split by 2+ spaces to separate columns
+            parts = [p.strip() for p in re.split(r'\s{2,}', line) if p.strip()]
+            cleaned_row = process_row(parts, column_indices)
+            if any(cleaned_row):
+                rows.append(cleaned_row)
+    return rows
+
+def parse_page(page, i, areas, table_settings, column_indices=None, pdfium_doc=None, ocr_pool=None, templates=None):
+    """
+    Extracts the raw rows of the selected areas on one page, in reading order.
+    With an ocr_pool, OCR areas are queued and left in the list as Futures
+    (see _resolve_ocr) so the caller can move on to the next page.
+    With templates (a layout_template.LayoutTemplates), single-area tables
+    reuse the columns learned on earlier pages.
+    """
+    rows = []
+    # Determine areas for this page (support list of rects)
+    page_bboxes = []
+    if areas:
+        if 'all' in areas:
+            page_bboxes = areas['all']
+        elif i in areas:
+            page_bboxes = areas[i]
+    elif areas is None:
+        # Fallback to full page if no areas defined (e.g. libraries missing)
+        page_bboxes = [page.bbox]
+    
+    # If no areas defined, skip page
+    if not page_bboxes:
+        return rows
+    if enabled():
+        counter("chars", len(page.chars), page=i)
+    
+    # 1. Group bboxes into "Row Groups" (tables or split tables) based on Y-overlap
+    groups = group_areas(page_bboxes)
+
+    # Rendered at most once, on the first OCR area of the page
+    raster = PageRaster(pdfium_doc, i) if pdfium_doc and ocr_available() else None
+
+    # 2. Process each group
+    for group in groups:
+        if len(group) == 1:
+            # Single area
+            bbox = group[0]
             
-            groups = []
-            if page_bboxes:
-                current_group = [page_bboxes[0]]
-                # Union rect of current group
-                g_y0, g_y1 = page_bboxes[0][1], page_bboxes[0][3]
-                
-                for bbox in page_bboxes[1:]:
-                    b_y0, b_y1 = bbox[1], bbox[3]
-                    
-                    # Check overlap
-                    overlap_start = max(g_y0, b_y0)
-                    overlap_end = min(g_y1, b_y1)
-                    overlap_height = max(0, overlap_end - overlap_start)
-                    min_height = min(g_y1 - g_y0, b_y1 - b_y0)
-                    
-                    # If significant overlap (e.g., > 40% of the shorter box), group them (Columns)
-                    if overlap_height > 0.4 * min_height:
-                        current_group.append(bbox)
-                        g_y0 = min(g_y0, b_y0)
-                        g_y1 = max(g_y1, b_y1)
+            if raster:
+                # OCR Strategy: crop this area out of the page bitmap
+                try:
+                    if ocr_pool:
+                        rows.append(ocr_pool.submit(raster, bbox))
                     else:
-                        groups.append(current_group)
-                        current_group = [bbox]
-                        g_y0, g_y1 = b_y0, b_y1
-                groups.append(current_group)
+                        rows.extend(ocr_rows(ocr_region(raster, bbox), column_indices))
+                except Exception as e:
+                    print(f"OCR Error on page {i}: {e}")
+                continue
 
-            # 2. Process each group
-            for group in groups:
-                if len(group) == 1:
-                    # Single area
-                    bbox = group[0]
-                    
-                    if use_ocr and pdfium_doc and pytesseract and Image:
-                        # OCR Strategy
-                        try:
-                            # Get image of the area
-                            f_page = pdfium_doc[i]
-                            # Render full page at 3x scale (approx 216 DPI)
-                            bitmap = f_page.render(scale=3)
-                            pil_img = bitmap.to_pil()
-                            
-                            # Crop to bbox (scale bbox coordinates by 3)
-                            crop_rect = (bbox[0]*3, bbox[1]*3, bbox[2]*3, bbox[3]*3)
-                            img = pil_img.crop(crop_rect)
-                            
-                            # Preprocessing: Grayscale and Thresholding
-                            img = img.convert('L')
-                            img = img.point(lambda x: 0 if x < 140 else 255, '1')
-                            
-                            # Run OCR (Assume uniform block of text - PSM 6)
-                            ocr_text = pytesseract.image_to_string(img, config='--psm 6')
-                            
-                            # Simple parsing: split by lines, then by whitespace (approximate)
-                            for line in ocr_text.split('\n'):
-                                if line.strip():
-                                    # Split by 2+ spaces to separate columns
-                                    parts = [p.strip() for p in re.split(r'\s{2,}', line) if p.strip()]
-                                    cleaned_row = process_row(parts, column_indices)
-                                    if any(cleaned_row):
-                                        rows.append(cleaned_row)
-                        except Exception as e:
-                            print(f"OCR Error on page {i}: {e}")
-                        continue
-
-                    # Standard Text Extraction
-                    try:
-                        cropped_page = page.crop(bbox, relative=False, strict=False)
+            # Standard Text Extraction
+            try:
+                cropped_page = crop_page(page, bbox)
+                with stage("extract_tables", page=i):
+                    if templates:
+                        tables = templates.extract_tables(cropped_page, bbox, i)
+                    else:
                         tables = cropped_page.extract_tables(table_settings)
-                        for table in tables:
-                            for row in table:
-                                cleaned_row = process_row(row, column_indices)
-                                if any(cleaned_row):
-                                    rows.append(cleaned_row)
-                    except Exception as e:
-                        print(f"Error processing area on page {i}: {e}")
-                else:
-                    # Multiple areas side-by-side -> Column Mode
-                    # Sort by X to assign column order
-                    group.sort(key=lambda b: b[0])
-                    
-                    # Extract words from each column-box
-                    col_words = []
-                    for col_idx, bbox in enumerate(group):
-                        try:
-                            c_page = page.crop(bbox, relative=False, strict=False)
-                            words = c_page.extract_words(keep_blank_chars=True)
-                            for w in words:
-                                w['col_idx'] = col_idx
-                            col_words.extend(words)
-                        except:
-                            pass
-                    
-                    # Group words by Y (rows)
-                    col_words.sort(key=lambda w: w['top'])
-                    
-                    current_row_words = []
-                    if col_words:
-                        # Initialize row bounds with the first word
-                        current_row_top = col_words[0]['top']
-                        current_row_bottom = col_words[0]['bottom']
-                        
-                        for w in col_words:
-                            # Check vertical overlap with current row
-                            w_mid = (w['top'] + w['bottom']) / 2
-                            if current_row_top - 3 <= w_mid <= current_row_bottom + 3:
-                                current_row_words.append(w)
-                                current_row_bottom = max(current_row_bottom, w['bottom'])
-                            else:
-                                # Finish current row
-                                rows.append(build_row_from_words(current_row_words, len(group)))
-                                # Start new row
-                                current_row_words = [w]
-                                current_row_top = w['top']
-                                current_row_bottom = w['bottom']
-                        # Append last row
-                        rows.append(build_row_from_words(current_row_words, len(group)))
+                for table in tables:
+                    for row in table:
+                        cleaned_row = process_row(row, column_indices)
+                        if any(cleaned_row):
+                            rows.append(cleaned_row)
+            except Exception as e:
+                print(f"Error processing area on page {i}: {e}")
+        else:
+            # Multiple areas side-by-side -> Column Mode
+            # Sort by X to assign column order
+            group.sort(key=lambda b: b[0])
+            
+            # Extract words from each column-box
+            column_words = []
+            for bbox in group:
+                try:
+                    c_page = crop_page(page, bbox)
+                    with stage("extract_words", page=i):
+                        column_words.append(c_page.extract_words(keep_blank_chars=True))
+                except:
+                    column_words.append([])
 
-    # Post-Processing Options
-    
-    # 1. Merge Multi-line Rows
-    if merge_multiline and rows:
-        merged_rows = []
-        prev_row = None
-        for row in rows:
-            # If first column is empty (and row has content), assume continuation
-            if not row[0] and any(row) and prev_row:
-                # Merge text into previous row
-                for k in range(len(row)):
-                    if row[k]:
-                        prev_row[k] = (str(prev_row[k]) + " " + str(row[k])).strip()
-            else:
-                if prev_row: merged_rows.append(prev_row)
-                prev_row = row
-        if prev_row: merged_rows.append(prev_row)
-        rows = merged_rows
+            # Group words by Y (rows)
+            with stage("band_rows", page=i):
+                rows.extend(band_rows(column_words))
 
-    # 2. Skip Top Rows
-    if skip_rows > 0 and len(rows) > skip_rows:
-        rows = rows[skip_rows:]
+    if raster:
+        raster.close()
+    return rows
 
-    # Dynamic Header Adjustment
-    if not rows:
-        final_headers = headers if headers else ["No Data"]
-    else:
-        max_cols = max(len(r) for r in rows)
-        if not headers:
-            final_headers = [f"Column {i+1}" for i in range(max_cols)]
-        else:
-            final_headers = headers[:]
-            if len(final_headers) < max_cols:
-                final_headers.extend([f"Column {i+1}" for i in range(len(final_headers), max_cols)])
-            elif len(final_headers) > max_cols:
-                # Pad rows to match headers
-                for r in rows:
-                    r.extend([""] * (len(final_headers) - len(r)))
-
-    df = pd.DataFrame(rows, columns=final_headers)
+def group_areas(bboxes):
+    """
+    Splits a page's areas into row groups: areas that overlap vertically sit
+    side by side and are read in column mode, one column per area. Sorts
+    bboxes by top in place.
+    """
+    bboxes.sort(key=lambda b: b[1])
     
-    # Attempt to convert numeric strings to actual numbers for Excel
-    for col in df.columns:
-        df[col] = df[col].apply(convert_to_number_if_possible)
+    groups = []
+    if bboxes:
+        current_group = [bboxes[0]]
+        # Union rect of current group
+        g_y0, g_y1 = bboxes[0][1], bboxes[0][3]
         
-    return df
+        for bbox in bboxes[1:]:
+            b_y0, b_y1 = bbox[1], bbox[3]
+            
+            # Check overlap
+            overlap_start = max(g_y0, b_y0)
+            overlap_end = min(g_y1, b_y1)
+            overlap_height = max(0, overlap_end - overlap_start)
+            min_height = min(g_y1 - g_y0, b_y1 - b_y0)
+            
+            # If significant overlap (e.g., > 40% of the shorter box), group them (Columns)
+            if overlap_height > 0.4 * min_height:
+                current_group.append(bbox)
+                g_y0 = min(g_y0, b_y0)
+                g_y1 = max(g_y1, b_y1)
+            else:
+                groups.append(current_group)
+                current_group = [bbox]
+                g_y0, g_y1 = b_y0, b_y1
+        groups.append(current_group)
+    return groups
 
 def process_row(row, column_indices):
     cleaned_row = []
@@ -234,6 +340,83 @@ def process_row(row, column_indices):
         cleaned_row = [cell.strip() if cell else "" for cell in row]
     return cleaned_row
 
+def band_rows(column_words, tolerance=ROW_TOLERANCE):
+    """
+    Column mode's rows from the words of each column box (one list per box,
+    left to right), in one vectorized pass; same rows as band_rows_sequential.
+    Words taken by top join the current row while their midpoint is within
+    tolerance of its band, which runs from the top of the row's first word to
+    the lowest bottom so far. Each cell joins its words left to right.
+    """
+    words = [w for col_words in column_words for w in col_words]
+    if not words:
+        return []
+    num_cols = len(column_words)
+    top, bottom, x0 = (np.fromiter(map(itemgetter(key), words), dtype=float, count=len(words)) for key in ('top', 'bottom', 'x0'))
+    if not (bottom >= top).all():
+        return band_rows_sequential(column_words, tolerance)
+    col = np.repeat(np.arange(num_cols), [len(col_words) for col_words in column_words])
+
+    order = np.argsort(top, kind="stable")
+    top, bottom, x0, col = top[order], bottom[order], x0[order], col[order]
+    mid = (top + bottom) / 2
+    # A word past the band starts a row and reaches below every word before it,
+    # so the band's bottom is the lowest bottom of all the words so far. The
+    # midpoint of a word taken by top can't be above the band's top.
+    reach = np.maximum.accumulate(bottom)
+    row = np.zeros(len(words), dtype=int)
+    np.cumsum(mid[1:] > reach[:-1] + tolerance, out=row[1:])
+
+    # Cells in (row, column) order, their words by x0 and then by top
+    by_x0 = np.argsort(x0, kind="stable")
+    cell = (row * num_cols + col)[by_x0]
+    by_cell = np.argsort(cell, kind="stable")
+    cell = cell[by_cell]
+    texts = [words[k]['text'] for k in order[by_x0[by_cell]].tolist()]
+    breaks = (np.flatnonzero(cell[1:] != cell[:-1]) + 1).tolist()
+    starts, ends = [0] + breaks, breaks + [len(words)]
+
+    cells = [""] * ((int(row[-1]) + 1) * num_cols)
+    for c, start, end in zip(cell[starts].tolist(), starts, ends):
+        cells[c] = texts[start] if end - start == 1 else " ".join(texts[start:end])
+    return [cells[k:k + num_cols] for k in range(0, len(cells), num_cols)]
+
+def band_rows_sequential(column_words, tolerance=ROW_TOLERANCE):
+    """
+    band_rows one word at a time. band_rows falls back to it for words whose
+    bottom is above their top, where its single pass doesn't hold.
+    """
+    col_words = []
+    for col_idx, words in enumerate(column_words):
+        for w in words:
+            w['col_idx'] = col_idx
+        col_words.extend(words)
+    col_words.sort(key=lambda w: w['top'])
+
+    rows = []
+    current_row_words = []
+    if col_words:
+        # Initialize row bounds with the first word
+        current_row_top = col_words[0]['top']
+        current_row_bottom = col_words[0]['bottom']
+
+        for w in col_words:
+            # Check vertical overlap with current row
+            w_mid = (w['top'] + w['bottom']) / 2
+            if current_row_top - tolerance <= w_mid <= current_row_bottom + tolerance:
+                current_row_words.append(w)
+                current_row_bottom = max(current_row_bottom, w['bottom'])
+            else:
+                # Finish current row
+                rows.append(build_row_from_words(current_row_words, len(column_words)))
+                # Start new row
+                current_row_words = [w]
+                current_row_top = w['top']
+                current_row_bottom = w['bottom']
+        # Append last row
+        rows.append(build_row_from_words(current_row_words, len(column_words)))
+    return rows
+
 def build_row_from_words(words, num_cols):
     row_data = [""] * num_cols
     cols = {}
@@ -249,28 +432,30 @@ def build_row_from_words(words, num_cols):
             row_data[idx] = text
     return row_data
 
-def convert_to_number_if_possible(val):
-    """Converts string to float if it looks like a number (handles commas)."""
-    if not isinstance(val, str):
-        return val
-    val_clean = val.replace(',', '').strip()
-    if not val_clean:
-        return val
-    
-    # Avoid converting strings with leading zeros that are not decimals (e.g. "0123" -> 123)
-    # This preserves Cheque Numbers
-    if val_clean.startswith('0') and len(val_clean) > 1 and '.' not in val_clean:
-        return val
-        
-    try:
-        return float(val_clean)
-    except ValueError:
-        return val
-
-def convert_custom(pdf_path, password=None, areas=None, headers=None, column_indices=None, use_grid_lines=False, use_ocr=False, merge_multiline=False, skip_rows=0, return_df=False):
-    df = parse_custom(pdf_path, password, areas=areas, headers=headers, column_indices=column_indices, use_grid_lines=use_grid_lines, use_ocr=use_ocr, merge_multiline=merge_multiline, skip_rows=skip_rows)
-    if return_df:
-        return df
+def convert_custom(pdf_path, password=None, areas=None, headers=None, column_indices=None, use_grid_lines=False, use_ocr=False, merge_multiline=False, skip_rows=0, return_df=False, workers=1, ocr_workers=1, progress=None, backend=None, use_template=False):
+    """
+    Writes the rows to Custom/<name>_custom.xlsx. When column_indices fixes
+    the width of every row (see fixed_row_width) they stream straight into
+    the workbook; otherwise the headers are fitted to the widest row, so the
+    whole statement is parsed into a DataFrame first.
+    """
+    width = None if return_df else fixed_row_width(areas, column_indices)
+    if width is None:
+        df = parse_custom(pdf_path, password, areas=areas, headers=headers, column_indices=column_indices, use_grid_lines=use_grid_lines, use_ocr=use_ocr, merge_multiline=merge_multiline, skip_rows=skip_rows, workers=workers, ocr_workers=ocr_workers, progress=progress, backend=backend, use_template=use_template)
+        if return_df:
+            return df
+        out_path = get_save_path("Custom", pdf_path)
+        with stage("excel"):
+            df.to_excel(out_path, index=False)
+        return out_path
+
+    rows = iter_transactions(pdf_path, password, areas=areas, column_indices=column_indices, use_grid_lines=use_grid_lines, use_ocr=use_ocr, merge_multiline=merge_multiline, skip_rows=skip_rows, workers=workers, ocr_workers=ocr_workers, progress=progress, backend=backend, use_template=use_template)
     out_path = get_save_path("Custom", pdf_path)
-    df.to_excel(out_path, index=False)
-    return out_path
\ No newline at end of file
+    # The header row goes first, and an empty statement gets build_dataframe's
+    first = next(rows, None)
+    if first is None:
+        return write_rows_to_excel([], headers or ["No Data"], out_path)
+    columns = fit_headers(headers, width)
+    padding = [""] * (len(columns) - width)
+    rows = (row + padding for row in chain([first], rows))
+    return write_rows_to_excel(_normalized_rows(rows, len(columns)), columns, out_path)
@@ -1,111 +1,130 @@
-import re
 import pandas as pd
-import pdfplumber
-from utils import clean_amount, get_save_path, get_cropped_page
+from utils import get_save_path, get_cropped_page, iter_pages, write_rows_to_excel
+from parallel import iter_page_results
+from progress import track
+from timing import stage, counter
+from tokenizer import tokenize_line, first_date, amounts
 
-def parse_generic(pdf_path, password=None, areas=None):
+COLUMNS = ["Txn Date", "Value Date", "Description", "Ref No.", "Debit", "Credit", "Balance"]
+
+def iter_transactions(pdf_path, password=None, areas=None, workers=1, progress=None, backend=None):
+    """
+    Yields transaction rows page by page, so callers can show or write rows
+    while later pages are still being parsed.
+    With workers > 1 the pages are parsed in a process pool.
+    """
+    if workers > 1:
+        page_results = iter_page_results(_parse_page_range, pdf_path, password, workers, areas, backend, progress=progress)
+    else:
+        page_results = (parse_page(page, i, areas) for i, page in iter_pages(pdf_path, password, progress=progress, backend=backend))
+    for page_rows in page_results:
+        yield from track(page_rows, progress)
+
+def parse_generic(pdf_path, password=None, areas=None, workers=1, progress=None, backend=None):
     """
     A robust generic parser that attempts to find transactions based on 
     Date patterns and Amount patterns (Debit/Credit/Balance).
     """
+    rows = list(iter_transactions(pdf_path, password, areas=areas, workers=workers, progress=progress, backend=backend))
+    with stage("dataframe", rows=len(rows)):
+        df = pd.DataFrame(rows, columns=COLUMNS)
+    return df
+
+def _parse_page_range(pdf_path, password, start, stop, areas, backend=None):
+    """Process-pool worker: parses pages [start, stop) with its own PDF handle."""
+    return [parse_page(page, i, areas) for i, page in iter_pages(pdf_path, password, start, stop, backend=backend)]
+
+def parse_page(page, page_idx, areas=None):
+    """
+    Parses the transactions on one page. Continuation lines never cross a page
+    boundary, so pages can be parsed independently and concatenated in order.
+    """
     rows = []
-    # Matches dates like 01/01/2023, 01-01-2023, 01-Jan-2023
-    # Removed ^ anchor to allow dates anywhere in the line (e.g. PNB has Txn No before date)
-    date_pattern = re.compile(r"\d{2}[/-](?:\d{2}|[A-Za-z]{3})[/-]\d{2,4}")
+    # Apply cropping if areas are defined
+    page = get_cropped_page(page, areas, page_idx)
+    with stage("extract_text", page=page_idx):
+        text = page.extract_text()
+    counter("chars", len(text or ""), page=page_idx)
+    if not text:
+        return rows
     
-    # Matches amounts like 1,234.56 or 1234.56 (requires 2 decimal places)
-    amount_pattern = re.compile(r"((?:[\d,]*\d)\.\d{2})")
+    lines = text.split("\n")
+    current_row = None
+    
+    with stage("parse", page=page_idx):
+        for line in lines:
+            line = line.strip()
+            if not line: continue
 
-    with pdfplumber.open(pdf_path, password=password) as pdf:
-        for i, page in enumerate(pdf.pages):
-            # Apply cropping if areas are defined
-            page = get_cropped_page(page, areas, i)
-            text = page.extract_text()
-            if not text:
-                continue
+            # Check if line contains a date (anywhere, e.g. PNB has Txn No before the date)
+            tokens = tokenize_line(line)
+            date_tok = first_date(tokens)
+        
+            if date_tok:
+                txn_date = date_tok.text
             
-            lines = text.split("\n")
-            current_row = None
+                # Find all valid amounts in the line
+                amts = amounts(tokens)
             
-            for line in lines:
-                line = line.strip()
-                if not line: continue
-
-                # Check if line contains a date
-                date_match = date_pattern.search(line)
-                
-                if date_match:
-                    txn_date = date_match.group(0)
-                    date_start = date_match.start()
-                    date_end = date_match.end()
-                    
-                    # Find all valid amounts in the line
-                    amounts = amount_pattern.findall(line)
-                    
-                    if amounts:
-                        cleaned_amts = [clean_amount(x) for x in amounts]
-                        
-                        debit = 0.0
-                        credit = 0.0
-                        balance = 0.0
-                        first_amt_str = amounts[0]
+                if amts:
+                    debit = 0.0
+                    credit = 0.0
+                    balance = 0.0
+                    upper = line.upper()
 
-                        # Heuristic to determine columns based on number of amounts found
-                        if len(cleaned_amts) >= 3:
-                            # Assume format: ... Debit Credit Balance
-                            debit = cleaned_amts[-3]
-                            credit = cleaned_amts[-2]
-                            balance = cleaned_amts[-1]
-                            first_amt_str = amounts[-3]
-                        elif len(cleaned_amts) == 2:
-                            # Assume format: ... Amount Balance
-                            # Try to guess if Amount is Cr or Dr based on text
-                            val = cleaned_amts[-2]
-                            balance = cleaned_amts[-1]
-                            if "CR" in line.upper() or "CREDIT" in line.upper():
-                                credit = val
-                            else:
-                                debit = val
-                            first_amt_str = amounts[-2]
+                    # Heuristic to determine columns based on number of amounts found
+                    if len(amts) >= 3:
+                        # Assume format: ... Debit Credit Balance
+                        debit = amts[-3].value
+                        credit = amts[-2].value
+                        balance = amts[-1].value
+                        first_amt = amts[-3]
+                    elif len(amts) == 2:
+                        # Assume format: ... Amount Balance
+                        # Try to guess if Amount is Cr or Dr based on text
+                        val = amts[-2].value
+                        balance = amts[-1].value
+                        if "CR" in upper or "CREDIT" in upper:
+                            credit = val
                         else:
-                            # Only 1 amount found. Assume it's the transaction amount.
-                            val = cleaned_amts[-1]
-                            if "CR" in line.upper():
-                                credit = val
-                            else:
-                                debit = val
-                            first_amt_str = amounts[-1]
-
-                        # Extract Description: 
-                        # 1. Text before the Date (e.g. Txn No)
-                        # 2. Text between Date and the First Amount
-                        
-                        pre_date_text = line[:date_start].strip()
-                        
-                        # Find where the relevant amount starts, searching after the date
-                        idx_amt = line.find(first_amt_str, date_end)
-                        if idx_amt > -1:
-                            mid_text = line[date_end:idx_amt].strip()
+                            debit = val
+                        first_amt = amts[-2]
+                    else:
+                        # Only 1 amount found. Assume it's the transaction amount.
+                        val = amts[-1].value
+                        if "CR" in upper:
+                            credit = val
                         else:
-                            mid_text = line[date_end:].strip() # Fallback
-                        
-                        desc = f"{pre_date_text} {mid_text}".strip()
-                        
-                        current_row = [txn_date, "", desc, "", debit, credit, balance]
-                        rows.append(current_row)
+                            debit = val
+                        first_amt = amts[-1]
+
+                    # Extract Description: 
+                    # 1. Text before the Date (e.g. Txn No)
+                    # 2. Text between Date and the First Amount
                 
-                elif current_row:
-                    # Append continuation lines to description (skipping headers/footers)
-                    if "Page" not in line and "Statement" not in line and "Balance" not in line:
-                        current_row[2] += " " + line
+                    pre_date_text = line[:date_tok.start].strip()
+                
+                    if first_amt.start >= date_tok.end:
+                        mid_text = line[date_tok.end:first_amt.start].strip()
+                    else:
+                        mid_text = line[date_tok.end:].strip() # Fallback
+                
+                    desc = f"{pre_date_text} {mid_text}".strip()
+                
+                    current_row = [txn_date, "", desc, "", debit, credit, balance]
+                    rows.append(current_row)
+        
+            elif current_row:
+                # Append continuation lines to description (skipping headers/footers)
+                if "Page" not in line and "Statement" not in line and "Balance" not in line:
+                    current_row[2] += " " + line
 
-    df = pd.DataFrame(rows, columns=["Txn Date", "Value Date", "Description", "Ref No.", "Debit", "Credit", "Balance"])
-    return df
+    counter("rows", len(rows), page=page_idx)
+    return rows
 
-def convert_generic(pdf_path, password=None, areas=None, return_df=False):
-    df = parse_generic(pdf_path, password, areas=areas)
+def convert_generic(pdf_path, password=None, areas=None, return_df=False, workers=1, progress=None, backend=None):
     if return_df:
-        return df
+        return parse_generic(pdf_path, password, areas=areas, workers=workers, progress=progress, backend=backend)
     out_path = get_save_path("Generic", pdf_path)
-    df.to_excel(out_path, index=False)
+    write_rows_to_excel(iter_transactions(pdf_path, password, areas=areas, workers=workers, progress=progress, backend=backend), COLUMNS, out_path)
     return out_path
\ No newline at end of file
@@ -0,0 +1,94 @@
+import glob
+import importlib
+import os
+import sys
+from timing import traced
+
+BANK_PARSERS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bank parces")
+
+# Labels shown in the app; parsers not listed here get their name upper-cased
+BANK_LABELS = {
+    "axis": "Axis",
+    "bob": "Bank of Baroda",
+    "boi": "Bank of India",
+    "canara": "Canara",
+    "hdfc": "HDFC",
+    "icici": "ICICI",
+    "idfc": "IDFC First",
+    "indusind": "IndusInd",
+    "kotak": "Kotak",
+    "pnb": "PNB",
+    "sbi": "SBI",
+    "union": "Union Bank",
+    "yes": "Yes Bank",
+}
+
+class LazyConverter:
+    """
+    Stands in for a convert_* function and imports its module (and with it
+    pandas, pdfplumber, PyMuPDF...) only on the first call.
+    """
+    def __init__(self, module, function, path=None):
+        self.module = module
+        self.function = function
+        self.path = path
+        self._func = None
+
+    def load(self):
+        if self._func is None:
+            # The bank parsers folder has a space in its name, so it can't be
+            # imported as a package; its modules are imported from the folder
+            if self.path and self.path not in sys.path:
+                sys.path.insert(0, self.path)
+            func = getattr(importlib.import_module(self.module), self.function)
+            # The whole conversion as one stage (e.g. "convert_sbi") around the parser's own stages
+            self._func = traced(self.function)(func)
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<LazyConverter {self.module}.{self.function}>"
+
+def bank_modules():
+    """Bank name (e.g. 'sbi') -> module name, from the files in the bank parsers folder."""
+    names = {}
+    for path in glob.glob(os.path.join(BANK_PARSERS_DIR, "parse_*.py")):
+        module = os.path.splitext(os.path.basename(path))[0]
+        names[module[len("parse_"):]] = module
+    return names
+
+def discover():
+    """Label -> converter for Auto-detect, Generic and every parser in the bank parsers folder."""
+    handlers = {
+        "Auto-detect": LazyConverter("bank_router", "convert_auto"),
+        "Generic": LazyConverter("parse_generic", "convert_generic"),
+    }
+    for bank, module in sorted(bank_modules().items()):
+        handlers[BANK_LABELS.get(bank, bank.upper())] = LazyConverter(module, "convert_" + bank, BANK_PARSERS_DIR)
+    return handlers
+
+# Every parser, by label. Nothing is imported until a converter is called.
+BANK_HANDLERS = discover()
+
+# Custom mode needs areas/headers from the selector, so it isn't one of the BANK_HANDLERS buttons
+CUSTOM = LazyConverter("parse_custom", "convert_custom")
+
+def load_converter(name):
+    """
+    The convert function for a label ('SBI', 'Auto-detect'), a parser name
+    ('sbi', 'hdfc'), 'auto', 'generic' or 'custom'. Case-insensitive.
+    """
+    key = name.lower()
+    if key == "custom":
+        return CUSTOM.load()
+    if key == "auto":
+        key = "auto-detect"
+    modules = bank_modules()
+    if key in modules:
+        key = BANK_LABELS.get(key, key.upper()).lower()
+    for label, converter in BANK_HANDLERS.items():
+        if label.lower() == key:
+            return converter.load()
+    raise ValueError(f"Unknown bank '{name}'. Choose from: Auto, Generic, Custom, " + ", ".join(sorted(m.upper() for m in modules)))
@@ -0,0 +1,71 @@
+import threading
+import time
+
+class Cancelled(Exception):
+    """Raised between pages once a conversion's progress has been cancelled."""
+
+class ConversionProgress:
+    """
+    Progress and cancellation shared by every parser. Parsers call page()
+    before each page (through utils.iter_pages or parallel.iter_page_results),
+    which raises Cancelled if cancel() was called from another thread, and
+    count their output rows with track(). The callback receives
+    (page_index, total_pages, rows_so_far, stage) and runs on the converting
+    thread.
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.page_index = 0
+        self.total_pages = 0
+        self.rows = 0
+        self.started = time.perf_counter()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise Cancelled("Conversion cancelled.")
+
+    def page(self, page_index, total_pages, stage="parse"):
+        """Called before page_index (0-based) of total_pages is processed."""
+        self.check()
+        self.page_index = page_index
+        self.total_pages = total_pages
+        self.report(stage)
+
+    def report(self, stage):
+        if self.callback:
+            self.callback(self.page_index, self.total_pages, self.rows, stage)
+
+    def finish(self):
+        self.page_index = self.total_pages
+        self.report("done")
+
+    def eta(self):
+        """Estimated seconds left from the pace so far, or None before the first page is done."""
+        if self.page_index <= 0 or self.page_index >= self.total_pages:
+            return None
+        elapsed = time.perf_counter() - self.started
+        return elapsed / self.page_index * (self.total_pages - self.page_index)
+
+def track(rows, progress=None):
+    """Passes rows through, counting them in progress.rows."""
+    if progress is None:
+        yield from rows
+        return
+    for row in rows:
+        progress.rows += 1
+        yield row
+
+def format_progress(page_index, total_pages, rows, eta=None):
+    """'Page 3 of 120 · 85 rows · ~40s left' for the progress labels of both apps."""
+    text = f"Page {min(page_index + 1, total_pages)} of {total_pages} · {rows} rows"
+    if eta is not None:
+        text += f" · ~{eta:.0f}s left"
+    return text
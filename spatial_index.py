@@ -0,0 +1,83 @@
+"""
+Spatial index of a page's objects, so cropping a region doesn't test them all.
+pdfplumber's crop() runs every char, line and rect of the page through
+clip_obj for every box: column mode crops each column of each group, the grid
+preview each selection. The index sorts each kind of object by top once per
+page. A box query is then a binary search for the band of objects that can
+reach the box and a NumPy overlap test of that band, and only the objects it
+finds go through clip_obj, so the cropped page has exactly pdfplumber's
+objects, in the same order.
+"""
+import numpy as np
+from pdfplumber.page import CroppedPage
+from pdfplumber.utils import clip_obj
+
+# Points added to the band searched above a box, so rounding in the object
+# heights can't push an object that reaches the box out of it
+BAND_MARGIN = 1.0
+
+class SpatialIndex:
+    """The bounds of a page's objects, per kind, sorted by top."""
+    def __init__(self, objects):
+        self.objects = objects
+        self._bounds = {kind: _SortedBounds(objs) for kind, objs in objects.items()}
+
+    def query(self, kind, bbox):
+        """Positions in objects[kind] of the objects meeting bbox, in page order."""
+        return self._bounds[kind].query(bbox)
+
+    def crop(self, kind, bbox):
+        """utils.crop_to_bbox(objects[kind], bbox): the objects meeting bbox, clipped to it."""
+        objs = self.objects[kind]
+        return [obj for obj in (clip_obj(objs[k], bbox) for k in self.query(kind, bbox)) if obj is not None]
+
+class _SortedBounds:
+    def __init__(self, objs):
+        bounds = np.array([(o["x0"], o["top"], o["x1"], o["bottom"]) for o in objs], dtype=float).reshape(len(objs), 4)
+        self.order = np.argsort(bounds[:, 1], kind="stable")
+        self.bounds = bounds[self.order]
+        self.tops = self.bounds[:, 1]
+        heights = self.bounds[:, 3] - self.tops
+        self.max_height = float(heights.max()) if len(objs) else 0.0
+
+    def query(self, bbox):
+        x0, top, x1, bottom = bbox
+        # Only objects starting at most max_height above the box can reach into it
+        lo = np.searchsorted(self.tops, top - self.max_height - BAND_MARGIN, side="left")
+        hi = np.searchsorted(self.tops, bottom, side="right")
+        band = self.bounds[lo:hi]
+        # utils.get_bbox_overlap, on the whole band at once
+        width = np.minimum(band[:, 2], x1) - np.maximum(band[:, 0], x0)
+        height = np.minimum(band[:, 3], bottom) - np.maximum(band[:, 1], top)
+        hit = (width >= 0) & (height >= 0) & (width + height > 0)
+        return np.sort(self.order[lo:hi][hit])
+
+def index_for(page):
+    """The page's SpatialIndex, built on first use and again if the page has reloaded its objects."""
+    objects = page.objects
+    index = getattr(page, "_spatial_index", None)
+    if index is None or index.objects is not objects:
+        index = SpatialIndex(objects)
+        page._spatial_index = index
+    return index
+
+def drop_index(page):
+    """Forgets the page's index, for callers that close() a page they keep around."""
+    page.__dict__.pop("_spatial_index", None)
+
+def crop_page(page, bbox):
+    """page.crop(bbox, relative=False, strict=False), finding the objects through the page's index."""
+    return IndexedCrop(page, bbox)
+
+class IndexedCrop(CroppedPage):
+    """A CroppedPage whose objects come from the parent page's SpatialIndex."""
+    def __init__(self, parent_page, bbox):
+        super().__init__(parent_page, bbox, relative=False, strict=False)
+        self._index = index_for(parent_page)
+
+    @property
+    def objects(self):
+        if hasattr(self, "_objects"):
+            return self._objects
+        self._objects = {kind: self._index.crop(kind, self.bbox) for kind in self._index.objects}
+        return self._objects
@@ -1,13 +1,17 @@
 import streamlit as st
 import pandas as pd
 import io
-import pypdfium2 as pdfium
 import auth_system as auth
 from datetime import datetime
 
 # Import existing logic
-from parse_generic import convert_generic
-from parse_custom import convert_custom
+import parse_generic
+import parse_custom
+from parallel import max_workers
+from ocr import MAX_OCR_WORKERS
+from cache import conversion_key, load_result, store_result
+from document import DocumentSession
+from progress import ConversionProgress, format_progress
 
 # --- Configuration ---
 st.set_page_config(page_title="PDF Pro by Akash", layout="wide", page_icon="🏦")
@@ -43,14 +47,44 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Rows shown in the live preview while a conversion is running
+PREVIEW_ROWS = 5
+PREVIEW_REFRESH_EVERY = 250
+
 # --- Helper Functions ---
+def collect_rows(row_iter, preview, status, columns=None):
+    """Collects parser rows, refreshing the preview while later pages are still parsing."""
+    rows = []
+    for row in row_iter:
+        rows.append(row)
+        if len(rows) == PREVIEW_ROWS or len(rows) % PREVIEW_REFRESH_EVERY == 0:
+            preview.dataframe(pd.DataFrame(rows[:PREVIEW_ROWS], columns=columns))
+            status.caption(f"Parsed {len(rows)} rows so far...")
+    status.empty()
+    return rows
+
+def progress_reporter(bar, text):
+    """ConversionProgress that moves a st.progress bar and shows pages, rows and ETA under it."""
+    progress = ConversionProgress()
+    def show(page_index, total_pages, rows, stage):
+        if total_pages:
+            bar.progress(min(page_index / total_pages, 1.0))
+            text.caption(format_progress(page_index, total_pages, rows, progress.eta()))
+    progress.callback = show
+    return progress
+
 def get_pdf_preview(pdf_bytes, password=None, page_idx=0):
     try:
-        pdf = pdfium.PdfDocument(pdf_bytes, password=password)
-        page = pdf[page_idx]
-        bitmap = page.render(scale=2) # Render at 2x scale for quality
-        pil_image = bitmap.to_pil()
-        return pil_image, len(pdf)
+        # Closed before the conversion opens the upload again
+        with DocumentSession(pdf_bytes, password) as session:
+            pdf = session.pdfium_doc
+            page = pdf[page_idx]
+            bitmap = page.render(scale=2) # Render at 2x scale for quality
+            # Copy out of the pdfium buffer before the document goes away
+            pil_image = bitmap.to_pil().copy()
+            bitmap.close()
+            page.close()
+            return pil_image, len(pdf)
     except Exception as e:
         return None, 0
 
@@ -185,12 +219,16 @@ def user_dashboard():
             st.subheader("Conversion Settings")
             
             bank_mode = st.selectbox("Select Bank / Mode", ["Generic", "Custom"])
+            workers = st.number_input("Parallel Workers (1 = off)", min_value=1, max_value=max_workers(), value=1,
+                                      help="Parse pages in several processes. Helps on long statements.")
             
             areas = None
             headers = None
             skip_rows = 0
             use_grid = False
+            use_template = False
             use_ocr = False
+            ocr_workers = 1
             merge_multi = False
             
             if bank_mode == "Custom":
@@ -211,7 +249,11 @@ def user_dashboard():
                     headers = [h.strip() for h in headers_str.split(",") if h.strip()]
                     
                 use_grid = st.checkbox("Use Grid Lines")
+                use_template = st.checkbox("Reuse Column Layout", help="Find the columns on the first page and reuse them on the rest. Faster on long statements.")
                 use_ocr = st.checkbox("Use OCR")
+                if use_ocr:
+                    ocr_workers = st.number_input("OCR Workers", min_value=1, max_value=MAX_OCR_WORKERS, value=1,
+                                                  help="Pages OCR'd at the same time. The server caps the total across all users.")
                 merge_multi = st.checkbox("Merge Multi-line Rows")
                 skip_rows = st.number_input("Skip Top N Rows", min_value=0, value=0)
 
@@ -226,23 +268,56 @@ def user_dashboard():
                 with st.spinner("Processing..."):
                     try:
                         pdf_file_obj = io.BytesIO(pdf_bytes)
-                        df = None
+                        progress_bar = st.progress(0.0)
+                        progress_text = st.empty()
+                        # Any click reruns the script, and Streamlit stops this run at its next
+                        # progress update, i.e. between pages. Nothing is charged for a stopped run.
+                        st.button("Cancel", key="cancel_conversion")
+                        progress = progress_reporter(progress_bar, progress_text)
+                        preview = st.empty()
+                        status = st.empty()
                         
+                        # Same file and settings as an earlier conversion: reuse its result
                         if bank_mode == "Generic":
-                            df = convert_generic(pdf_file_obj, password=password, areas=areas, return_df=True)
+                            cache_key = conversion_key(pdf_bytes, password, mode=bank_mode, areas=areas)
                         else:
-                            df = convert_custom(
-                                pdf_file_obj, password=password, areas=areas, headers=headers,
-                                use_grid_lines=use_grid, use_ocr=use_ocr, merge_multiline=merge_multi,
-                                skip_rows=skip_rows, return_df=True
-                            )
+                            cache_key = conversion_key(pdf_bytes, password, mode=bank_mode, areas=areas, headers=headers,
+                                                       use_grid_lines=use_grid, use_ocr=use_ocr,
+                                                       merge_multiline=merge_multi, skip_rows=skip_rows, use_template=use_template)
+                        df = load_result(cache_key)
+                        
+                        if df is None:
+                            if bank_mode == "Generic":
+                                rows = collect_rows(
+                                    parse_generic.iter_transactions(pdf_file_obj, password=password, areas=areas, workers=workers, progress=progress),
+                                    preview, status, columns=parse_generic.COLUMNS
+                                )
+                                df = pd.DataFrame(rows, columns=parse_generic.COLUMNS)
+                            else:
+                                rows = collect_rows(
+                                    parse_custom.iter_transactions(
+                                        pdf_file_obj, password=password, areas=areas,
+                                        use_grid_lines=use_grid, use_ocr=use_ocr, merge_multiline=merge_multi,
+                                        skip_rows=skip_rows, workers=workers, ocr_workers=ocr_workers, progress=progress,
+                                        use_template=use_template
+                                    ),
+                                    preview, status
+                                )
+                                df = parse_custom.build_dataframe(rows, headers)
+                            store_result(cache_key, df)
+                        preview.empty()
+                        progress_bar.empty()
+                        progress_text.empty()
                         
                         if df is not None and not df.empty:
+                            # Charge the pages; re-checks the quota in the same transaction
+                            # in case another session used it up during the conversion
+                            charged, msg = auth.consume_quota(username, total_pages)
+                            if not charged:
+                                st.error(msg)
+                                st.stop()
                             st.success("Conversion Successful!")
                             
-                            # Update Usage
-                            auth.update_usage(username, total_pages)
-                            
                             st.dataframe(df.head())
                             
                             output = io.BytesIO()
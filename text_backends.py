@@ -0,0 +1,246 @@
+"""
+Where the parsers' page text comes from. Every backend yields pdfplumber-style
+pages (textlayer.TextPage), so crop(), extract_text(), extract_words() and
+the text strategy of extract_tables() behave the same whichever library read
+the PDF; only the chars differ, by fractions of a point.
+
+  pdfplumber  pdfminer's parse of the page, kept in the text sidecar (default)
+  pypdfium2   PDFium's text page, about 5x faster than pdfplumber on a cold run
+  pymupdf     MuPDF's raw text dict
+
+Pick one per job with SMA_TEXT_BACKEND or per call with backend=...; the fast
+backends carry chars only, so ruling lines (use_grid_lines) need pdfplumber.
+"""
+import ctypes
+import math
+import os
+from importlib.util import find_spec
+from document import use_session
+from textlayer import TextPage
+from timing import stage
+
+# Imported by _load_backend when a fast backend is first used: together they
+# add over 30 MB to a process that only ever reads with pdfplumber
+pdfium = None
+pdfium_c = None
+pymupdf = None
+
+BACKENDS = ("pdfplumber", "pypdfium2", "pymupdf")
+DEFAULT_BACKEND = os.environ.get("SMA_TEXT_BACKEND", "pdfplumber")
+
+def available_backends():
+    installed = (True, find_spec("pypdfium2"), find_spec("pymupdf") or find_spec("fitz"))
+    return [name for name, lib in zip(BACKENDS, installed) if lib]
+
+def _load_backend(backend):
+    global pdfium, pdfium_c, pymupdf
+    if backend == "pypdfium2" and pdfium is None:
+        import pypdfium2 as pdfium
+        import pypdfium2.raw as pdfium_c
+    elif backend == "pymupdf" and pymupdf is None:
+        try:
+            import pymupdf
+        except ImportError:
+            import fitz as pymupdf
+
+def resolve_backend(backend=None):
+    """The backend name to use for backend=None/'pdfplumber'/..., checked against what's installed."""
+    backend = (backend or DEFAULT_BACKEND).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown text backend '{backend}'. Choose from: " + ", ".join(BACKENDS))
+    if backend not in available_backends():
+        raise ImportError(f"The {backend} text backend isn't installed.")
+    return backend
+
+def iter_backend_pages(pdf_path, password=None, start=0, stop=None, progress=None, backend=None):
+    """
+    Yields (page_index, TextPage) for the pages in [start, stop), read with the
+    given backend. Same contract as textlayer.iter_text_pages: progress hears
+    about each page first, a page is closed once the next one is requested,
+    and a document.DocumentSession passed as pdf_path lends its handles.
+    """
+    backend = resolve_backend(backend)
+    if backend == "pdfplumber":
+        from textlayer import iter_text_pages
+        yield from iter_text_pages(pdf_path, password, start, stop, progress)
+        return
+
+    _load_backend(backend)
+    with use_session(pdf_path, password) as session:
+        reader = PdfiumReader(session) if backend == "pypdfium2" else MupdfReader(session)
+        total = len(reader)
+        stop = total if stop is None else min(stop, total)
+        doctop = reader.doctop(start)
+        for i in range(start, stop):
+            if progress:
+                progress.page(i, total)
+            with stage("extract", page=i, backend=backend):
+                data = reader.page_data(i, doctop)
+            doctop += data["bbox"][3]
+            page = TextPage(data)
+            yield i, page
+            page.close()
+
+def _page_data(page_index, doctop, width, height, chars):
+    """
+    TextPage data for a page of the given (displayed) size, from its chars as
+    (text, fontname, size, upright, x0, top, x1, bottom) tuples.
+    """
+    bbox = (0, 0, width, height)
+    objects = {}
+    if chars:
+        text, fontname, size, upright, x0, top, x1, bottom = (list(column) for column in zip(*chars))
+        objects["char"] = {
+            "text": text, "fontname": fontname, "size": size, "upright": upright,
+            "x0": x0, "y0": [height - b for b in bottom], "x1": x1, "y1": [height - t for t in top],
+            "width": [r - l for l, r in zip(x0, x1)], "height": [b - t for t, b in zip(top, bottom)],
+            "top": top, "bottom": bottom, "doctop": [doctop + t for t in top],
+        }
+    return {
+        "page_number": page_index + 1,
+        "initial_doctop": doctop,
+        "rotation": 0,
+        "mediabox": bbox,
+        "cropbox": bbox,
+        "bbox": bbox,
+        "objects": objects,
+    }
+
+def _rotate_box(x0, top, x1, bottom, width, height, rotation):
+    """A top-left-origin box on the unrotated page, as seen on the page rotated clockwise by rotation degrees."""
+    if rotation == 90:
+        return height - bottom, x0, height - top, x1
+    if rotation == 180:
+        return width - x1, height - bottom, width - x0, height - top
+    if rotation == 270:
+        return top, width - x1, bottom, width - x0
+    return x0, top, x1, bottom
+
+def _pdfium_text(raw, count):
+    """All chars of a PDFium text page in one call, or None if they don't map one UTF-16 unit per char."""
+    if count <= 0:
+        return ""
+    buffer = ctypes.create_string_buffer((count + 1) * 2)
+    written = pdfium_c.FPDFText_GetText(raw, 0, count, ctypes.cast(buffer, ctypes.POINTER(ctypes.c_ushort)))
+    text = buffer.raw[:max(written - 1, 0) * 2].decode("utf-16-le", errors="replace")
+    return text if len(text) == count else None
+
+def _restore_spaces(chars, next_x0, next_top):
+    """
+    PDFium keeps one space of a run of spaces; pdfminer keeps them all, and
+    column mode (keep_blank_chars) shows them. Refills the gap after the kept
+    space with copies of it.
+    """
+    text, font, size, upright, x0, top, x1, bottom = chars[-1]
+    width = x1 - x0
+    if width <= 0 or abs(next_top - top) > 0.5:
+        return
+    missing = int((next_x0 - x1) / width + 0.5)
+    for k in range(1, missing + 1):
+        chars.append((text, font, size, upright, x0 + k * width, top, x1 + k * width, bottom))
+
+class PdfiumReader:
+    """Page data from a DocumentSession's pypdfium2 handle, under its pdfium_lock."""
+    def __init__(self, session):
+        self.session = session
+        self.doc = session.pdfium_doc
+
+    def __len__(self):
+        with self.session.pdfium_lock:
+            return len(self.doc)
+
+    def doctop(self, page_index):
+        # Page sizes come from the page tree, without loading the pages
+        with self.session.pdfium_lock:
+            return sum(self.doc.get_page_size(i)[1] for i in range(page_index))
+
+    def page_data(self, page_index, doctop):
+        with self.session.pdfium_lock:
+            return self._page_data(page_index, doctop)
+
+    def _page_data(self, page_index, doctop):
+        page = self.doc[page_index]
+        try:
+            # pdfplumber measures from the mediabox corner too
+            left, bottom, right, top = page.get_mediabox()
+            width, height = right - left, top - bottom
+            rotation = page.get_rotation()
+            shown_width, shown_height = (height, width) if rotation in (90, 270) else (width, height)
+            textpage = page.get_textpage()
+            try:
+                chars = self._chars(textpage, left, top, width, height, rotation)
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+        return _page_data(page_index, doctop, shown_width, shown_height, chars)
+
+    @staticmethod
+    def _chars(textpage, left, top, width, height, rotation):
+        raw = textpage.raw
+        count = textpage.count_chars()
+        text = _pdfium_text(raw, count)
+        if text is None:
+            text = "".join(chr(pdfium_c.FPDFText_GetUnicode(raw, i)) for i in range(count))
+        get_box = pdfium_c.FPDFText_GetLooseCharBox
+        get_angle = pdfium_c.FPDFText_GetCharAngle
+        is_generated = pdfium_c.FPDFText_IsGenerated
+        rect = pdfium_c.FS_RECTF()
+        full_turn = 2 * math.pi
+        chars = []
+        for i, char in enumerate(text):
+            # PDFium adds spaces and line breaks of its own; pdfplumber only has the real ones
+            if char.isspace() and is_generated(raw, i):
+                continue
+            # The loose box spans the advance width like pdfminer's, so words split the same way
+            if char in "\x00\ufffe\uffff" or not get_box(raw, i, rect):
+                continue
+            angle = get_angle(raw, i)
+            x0, x1 = rect.left - left, rect.right - left
+            char_top, char_bottom = top - rect.top, top - rect.bottom
+            upright = angle <= 0.01 or angle >= full_turn - 0.01
+            if chars and chars[-1][0] == " ":
+                _restore_spaces(chars, x0, char_top)
+            # Font size isn't read by text or word extraction; the box height stands in for it
+            chars.append((char, "", char_bottom - char_top, upright, x0, char_top, x1, char_bottom))
+        if rotation:
+            # Upside-down text is still horizontal, which is all pdfminer's upright means
+            sideways = rotation in (90, 270)
+            chars = [
+                (char, font, size, upright and not sideways, *_rotate_box(x0, char_top, x1, char_bottom, width, height, rotation))
+                for char, font, size, upright, x0, char_top, x1, char_bottom in chars
+            ]
+        return chars
+
+class MupdfReader:
+    """Page data from a DocumentSession's PyMuPDF handle."""
+    def __init__(self, session):
+        self.doc = session.mupdf_doc
+
+    def __len__(self):
+        return len(self.doc)
+
+    def doctop(self, page_index):
+        return sum(self.doc[i].rect.height for i in range(page_index))
+
+    def page_data(self, page_index, doctop):
+        page = self.doc[page_index]
+        rect = page.rect
+        # Real spaces and ligatures as written, no images
+        flags = pymupdf.TEXT_PRESERVE_LIGATURES | pymupdf.TEXT_PRESERVE_WHITESPACE | pymupdf.TEXT_MEDIABOX_CLIP
+        # rawdict boxes are on the unrotated page; the matrix maps them to the displayed one
+        derotate = page.rotation_matrix if page.rotation else None
+        chars = []
+        for block in page.get_text("rawdict", flags=flags)["blocks"]:
+            for line in block.get("lines", ()):
+                upright = page.rotation in (0, 180) and line["dir"] == (1.0, 0.0)
+                for span in line["spans"]:
+                    size, font = span["size"], span["font"]
+                    for ch in span["chars"]:
+                        if ch.get("synthetic"):
+                            continue
+                        box = pymupdf.Rect(ch["bbox"])
+                        if derotate is not None:
+                            box = box * derotate
+                        chars.append((ch["c"], font, size, upright, box.x0, box.y0, box.x1, box.y1))
+        return _page_data(page_index, doctop, rect.width, rect.height, chars)
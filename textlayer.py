@@ -0,0 +1,139 @@
+import pickle
+import zlib
+from functools import lru_cache
+import pdfplumber
+from pdfplumber.page import Page
+from cache import DiskCache, hash_key, file_sha256
+from document import use_session
+from utils import PAGE_WINDOW, release_parsed_objects
+from timing import stage, counter
+
+# Bump when the stored fields change
+TEXT_LAYER_VERSION = "1"
+TEXT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# What pdfplumber's text, word and table extraction read from each object.
+# Colours, fonts flags and marked-content tags are left out to keep the sidecar small.
+CHAR_FIELDS = ("text", "fontname", "size", "adv", "upright", "x0", "y0", "x1", "y1", "width", "height", "top", "bottom", "doctop", "matrix")
+SHAPE_FIELDS = ("x0", "y0", "x1", "y1", "width", "height", "top", "bottom", "doctop", "pts")
+OBJECT_FIELDS = {"char": CHAR_FIELDS, "line": SHAPE_FIELDS, "rect": SHAPE_FIELDS, "curve": SHAPE_FIELDS}
+
+_text_cache = DiskCache("text", TEXT_CACHE_MAX_BYTES, suffix=".bin")
+
+class TextPage(Page):
+    """
+    A pdfplumber Page rebuilt from the sidecar instead of parsed from the PDF.
+    crop(), extract_text(), extract_words() and extract_tables() are pdfplumber's
+    own code running on the stored chars/lines/rects/curves, so parsers get the
+    same output as from the original page.
+    """
+    def __init__(self, data):
+        self.pdf = None
+        self.page_obj = None
+        self.root_page = self
+        self.page_number = data["page_number"]
+        self.initial_doctop = data["initial_doctop"]
+        self.rotation = data["rotation"]
+        self.mediabox = data["mediabox"]
+        self.cropbox = data["cropbox"]
+        self.bbox = data["bbox"]
+        self._stored_objects = {kind: _rows(kind, columns, self.page_number) for kind, columns in data["objects"].items()}
+        self.get_textmap = lru_cache()(self._get_textmap)
+
+    @property
+    def objects(self):
+        return self._stored_objects
+
+    def close(self):
+        self._stored_objects = {}
+        super().close()
+
+def _rows(kind, columns, page_number):
+    fields = list(columns)
+    objs = []
+    for values in zip(*(columns[f] for f in fields)):
+        obj = dict(zip(fields, values))
+        obj["object_type"] = kind
+        obj["page_number"] = page_number
+        objs.append(obj)
+    return objs
+
+def dump_page(page):
+    """
+    Serializes the text-relevant objects of a pdfplumber page: one list per
+    field, pickled and zlib-compressed (several times faster than JSON, which
+    spends most of its time formatting floats).
+    """
+    objects = {}
+    for kind, fields in OBJECT_FIELDS.items():
+        objs = page.objects.get(kind)
+        if not objs:
+            continue
+        present = [f for f in fields if f in objs[0]]
+        objects[kind] = {f: [obj.get(f) for obj in objs] for f in present}
+    data = {
+        "page_number": page.page_number,
+        "initial_doctop": page.initial_doctop,
+        "rotation": page.rotation,
+        "mediabox": page.mediabox,
+        "cropbox": page.cropbox,
+        "bbox": page.bbox,
+        "objects": objects,
+    }
+    return zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+def load_page(blob):
+    return TextPage(pickle.loads(zlib.decompress(blob)))
+
+def document_key(pdf_path, password=None):
+    """Sidecar key: the file contents, the password (the text is the decrypted text) and the extractor version."""
+    return hash_key(TEXT_LAYER_VERSION, pdfplumber.__version__, file_sha256(pdf_path), password or "")
+
+def iter_text_pages(pdf_path, password=None, start=0, stop=None, progress=None):
+    """
+    Yields (page_index, TextPage) for the pages in [start, stop).
+    Pages extracted by any earlier run, with any parser, come from the sidecar;
+    the PDF is only opened for pages that aren't there yet. pdf_path may be a
+    document.DocumentSession, whose pdfplumber handle is then used and left open.
+    Each page is closed once the next one is requested, and only PAGE_WINDOW
+    pages' worth of parsed PDF objects are kept, so memory stays flat however
+    long the statement is: don't hold on to a page past its iteration.
+    progress (a progress.ConversionProgress) is told about each page before it
+    is read, and can cancel the run there.
+    """
+    doc_key = document_key(pdf_path, password)
+    extracted = 0
+    # The PDF itself is only opened (and decrypted) on a sidecar miss
+    with use_session(pdf_path, password) as session:
+        meta = _text_cache.get(doc_key)
+        if meta is None:
+            with session.plumber_lock:
+                total = len(session.plumber_doc.pages)
+            _text_cache.put(doc_key, str(total).encode("ascii"))
+        else:
+            total = int(meta)
+
+        stop = total if stop is None else min(stop, total)
+        for i in range(start, stop):
+            if progress:
+                progress.page(i, total)
+            page_key = hash_key(doc_key, str(i))
+            blob = _text_cache.get(page_key)
+            if blob is None:
+                with session.plumber_lock, stage("extract", page=i):
+                    pdf = session.plumber_doc
+                    page = pdf.pages[i]
+                    blob = dump_page(page)
+                    # The sidecar copy is what gets parsed, so drop pdfplumber's
+                    page.close()
+                    extracted += 1
+                    if extracted % PAGE_WINDOW == 0:
+                        release_parsed_objects(pdf)
+                _text_cache.put(page_key, blob)
+            else:
+                counter("sidecar_hits", 1, page=i)
+            with stage("sidecar_load", page=i):
+                text_page = load_page(blob)
+            yield i, text_page
+            # The parser has moved on to the next page (or finished)
+            text_page.close()
@@ -0,0 +1,181 @@
+"""
+Stage timing for the conversion pipeline.
+
+    with stage("extract_text", page=i):
+        text = page.extract_text()
+
+records the wall and CPU time of the block when tracing is on. When it is
+off (the default) stage() returns a shared no-op object, so the cost is one
+global lookup per call.
+
+Turn tracing on with enable(), or for any entry point (desktop app, Streamlit,
+batch_convert, benchmarks) by setting SMA_TRACE=trace.json. The file is a
+Chrome trace: open it in chrome://tracing, https://ui.perfetto.dev or
+speedscope. Process-pool workers inherit SMA_TRACE and write their own
+trace.<pid>.json next to it.
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+_enabled = False
+_events = []
+_lock = threading.Lock()
+_t0 = time.perf_counter_ns()
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    __slots__ = ("name", "args", "start", "cpu")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        self.cpu = time.thread_time_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        cpu = time.thread_time_ns() - self.cpu
+        with _lock:
+            _events.append(("X", self.name, self.start, end - self.start, cpu, threading.get_ident(), self.args))
+        return False
+
+def enabled():
+    return _enabled
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def reset():
+    with _lock:
+        _events.clear()
+
+def stage(name, **args):
+    """Context manager timing one stage; args (page=..., rows=...) show up in the trace."""
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name, args)
+
+def traced(name):
+    """Decorator timing every call of a (non-generator) function as a stage."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Stage(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def counter(name, value, **args):
+    """Records a per-page counter (chars, rows, cache hits...) at the current time."""
+    if _enabled:
+        with _lock:
+            _events.append(("C", name, time.perf_counter_ns(), value, None, threading.get_ident(), args))
+
+def chrome_trace():
+    """The recorded events in Chrome's trace event format."""
+    pid = os.getpid()
+    trace = []
+    with _lock:
+        events = list(_events)
+    for kind, name, start, dur_or_value, cpu, tid, args in events:
+        ts = (start - _t0) / 1000
+        if kind == "X":
+            event_args = dict(args, cpu_ms=round(cpu / 1e6, 3))
+            trace.append({"name": name, "ph": "X", "ts": ts, "dur": dur_or_value / 1000, "pid": pid, "tid": tid, "args": event_args})
+        else:
+            trace.append({"name": name, "ph": "C", "ts": ts, "pid": pid, "tid": tid, "args": dict(args, value=dur_or_value)})
+    return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+def summary():
+    """
+    {stage: {"count", "wall_s", "self_s", "cpu_s"}}. wall_s includes nested
+    stages (the first "extract" of a document contains its "open"), self_s
+    doesn't.
+    """
+    with _lock:
+        events = [e for e in _events if e[0] == "X"]
+    totals = {}
+    by_thread = {}
+    for e in events:
+        by_thread.setdefault(e[5], []).append(e)
+    for thread_events in by_thread.values():
+        # Outer stages first when two start together
+        thread_events.sort(key=lambda e: (e[2], -e[3]))
+        stack = []
+        for _, name, start, dur, cpu, _, _ in thread_events:
+            while stack and stack[-1][0] + stack[-1][1] <= start:
+                stack.pop()
+            entry = totals.setdefault(name, {"count": 0, "wall_s": 0.0, "self_s": 0.0, "cpu_s": 0.0})
+            entry["count"] += 1
+            entry["wall_s"] += dur / 1e9
+            entry["self_s"] += dur / 1e9
+            entry["cpu_s"] += cpu / 1e9
+            if stack:
+                totals[stack[-1][2]]["self_s"] -= dur / 1e9
+            stack.append((start, dur, name))
+    return totals
+
+def format_summary(totals=None):
+    totals = summary() if totals is None else totals
+    lines = [f"{'stage':<18} {'count':>7} {'wall s':>9} {'self s':>9} {'cpu s':>9}"]
+    for name, t in sorted(totals.items(), key=lambda kv: -kv[1]["self_s"]):
+        lines.append(f"{name:<18} {t['count']:>7} {t['wall_s']:>9.3f} {t['self_s']:>9.3f} {t['cpu_s']:>9.3f}")
+    return "\n".join(lines)
+
+def save(path):
+    with open(path, "w") as f:
+        json.dump(chrome_trace(), f)
+    return path
+
+def _worker_trace_path(path):
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}{ext or '.json'}"
+
+def _save_if_recorded(path):
+    if _events:
+        save(path)
+
+def _trace_worker(path):
+    # Pool workers leave through os._exit, which skips atexit; multiprocessing's
+    # own finalizers do run there
+    from multiprocessing import util
+    reset()
+    util.Finalize(None, _save_if_recorded, args=(_worker_trace_path(path),), exitpriority=0)
+
+def _trace_to(path):
+    import multiprocessing
+    from multiprocessing import util
+    enable()
+    if multiprocessing.parent_process() is None:
+        atexit.register(_save_if_recorded, path)
+    else:
+        _trace_worker(path)
+    # Forked workers inherit this module (and the parent's events) without re-importing it
+    util.register_after_fork(_trace_worker, lambda _: _trace_worker(path))
+
+if os.environ.get("SMA_TRACE"):
+    _trace_to(os.path.abspath(os.environ["SMA_TRACE"]))
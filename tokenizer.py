@@ -0,0 +1,60 @@
+import re
+from collections import namedtuple
+
+DATE = "date"
+AMOUNT = "amount"
+TEXT = "text"
+
+# kind: DATE, AMOUNT or TEXT. start/end are offsets into the line (for an amount
+# they cover the number only). value is the float of an amount, suffix its Cr/Dr marker.
+Token = namedtuple("Token", ["kind", "text", "start", "end", "value", "suffix"])
+
+# Tried in order at each position, so the line is scanned once left to right:
+# 1. A date like 01/01/2023, 01-01-23 or 01-Jan-2023
+# 2. A whole run of digits/commas with an optional fraction. Consuming the run in
+#    one go keeps the scan linear even on very long digit runs, where the old
+#    ((?:[\d,]*\d)\.\d{2}) pattern backtracked at every start position.
+# 3. Anything else up to the next digit
+_TOKEN_RE = re.compile(
+    r"(?P<date>\d{2}[/-](?:\d{2}|[A-Za-z]{3})[/-]\d{2,4})"
+    r"|(?P<num>\d[\d,]*(?P<frac>\.\d+)?)(?:\s?(?P<suffix>[CcDd][Rr])\b)?"
+    r"|\D+"
+)
+
+def tokenize_line(line):
+    """Splits a statement line into date, amount and text tokens in a single scan."""
+    tokens = []
+    for m in _TOKEN_RE.finditer(line):
+        if m.group("date"):
+            tokens.append(Token(DATE, m.group("date"), m.start(), m.end(), None, ""))
+            continue
+        num = m.group("num")
+        if num is None:
+            tokens.append(Token(TEXT, m.group(0), m.start(), m.end(), None, ""))
+            continue
+        frac = m.group("frac")
+        if frac and len(frac) == 3:
+            # Amounts always carry exactly 2 decimal places (e.g. 1,23,456.00)
+            suffix = m.group("suffix") or ""
+            tokens.append(Token(AMOUNT, num, m.start(), m.end("num"), float(num.replace(",", "")), suffix.capitalize()))
+        else:
+            # Plain numbers (cheque numbers, txn ids) are part of the text
+            tokens.append(Token(TEXT, m.group(0), m.start(), m.end(), None, ""))
+    return tokens
+
+def first_date(tokens, pattern=None):
+    """First date token, optionally one that fully matches a bank-specific date pattern."""
+    for tok in tokens:
+        if tok.kind == DATE and (pattern is None or pattern.fullmatch(tok.text)):
+            return tok
+    return None
+
+def leading_date(tokens, pattern=None):
+    """The date token the line starts with, if any."""
+    if tokens and tokens[0].kind == DATE and tokens[0].start == 0:
+        if pattern is None or pattern.fullmatch(tokens[0].text):
+            return tokens[0]
+    return None
+
+def amounts(tokens):
+    return [tok for tok in tokens if tok.kind == AMOUNT]
@@ -1,24 +1,118 @@
+import io
 import os
+from itertools import islice
+from document import DocumentSession
+from timing import stage
 
-def clean_amount(value):
-    """Cleans currency strings (e.g., '1,200.00 Cr') into floats."""
-    if value is None or value.strip() in ["", "-"]:
-        return 0.0
+# Pages read from a PDF between releases of pdfminer's object cache (see release_parsed_objects)
+PAGE_WINDOW = 16
+# Rows handed to the .xlsx writer at a time by write_rows_to_excel
+EXCEL_BATCH_ROWS = 1000
+
+def convert_to_number_if_possible(val):
+    """
+    Converts string to float if it looks like a number (handles lakh/thousands
+    commas and Cr/Dr/Rs. markers, e.g. '1,20,000.00 Cr' -> 120000.0).
+    """
+    if not isinstance(val, str):
+        return val
+    val_clean = _strip_number_noise(val)
+    if not val_clean:
+        return val
+    
+    # Avoid converting strings with leading zeros that are not decimals (e.g. "0123" -> 123)
+    # This preserves Cheque Numbers
+    if val_clean.startswith('0') and len(val_clean) > 1 and '.' not in val_clean:
+        return val
+        
+    try:
+        return float(val_clean)
+    except ValueError:
+        return val
+
+def _strip_number_noise(value):
+    """Drops the grouping commas and Cr/Dr/Rs. markers around an amount."""
+    value = value.replace(",", "")
+    if "r" in value or "R" in value:
+        value = value.replace("Cr", "").replace("Dr", "").replace("Rs.", "")
+    return value.strip()
+
+def convert_numbers_if_possible(series):
+    """
+    Vectorized convert_to_number_if_possible over a whole column: numeric strings
+    (with commas or Cr/Dr/Rs. markers) become floats, everything else is left
+    untouched.
+    """
+    return _map_distinct(series, _numbers_from_distinct)
+
+def _map_distinct(series, convert):
+    """
+    Converts each distinct non-null value of the series once (statement columns
+    repeat a lot) and scatters the results back with a NumPy take.
+    """
+    import numpy as np
+    import pandas as pd
+    codes, uniques = pd.factorize(series)
+    converted = convert(np.asarray(uniques, dtype=object))
+    out = series.to_numpy(dtype=object, copy=True)
+    present = codes >= 0
+    out[present] = converted[codes[present]]
+    return pd.Series(out, index=series.index, name=series.name).infer_objects()
+
+def _numbers_from_distinct(values):
+    import numpy as np
+    out = values.copy()
+    is_str = np.array([isinstance(v, str) for v in values], dtype=bool)
+    cleaned = np.array([_strip_number_noise(v) if s else "" for v, s in zip(values, is_str)], dtype=object)
+    # Leading zeros without a decimal point are Cheque Numbers, keep them as text
+    cheque = np.array([c[:1] == "0" and len(c) > 1 and "." not in c for c in cleaned], dtype=bool)
+    candidates = is_str & (cleaned != "") & ~cheque
     try:
-        # Remove commas, currency symbols, Cr/Dr markers
-        cleaned = value.replace(",", "").replace("Cr", "").replace("Dr", "").replace("Rs.", "").strip()
-        return float(cleaned) if cleaned else 0.0
-    except:
-        return 0.0
+        # Fast path: NumPy parses the whole batch in C
+        out[candidates] = cleaned[candidates].astype(float)
+    except (TypeError, ValueError):
+        # Column mixes numbers and text: fall back to the scalar rule per distinct value
+        out = np.array([convert_to_number_if_possible(v) for v in values], dtype=object)
+    return out
+
+def convert_numeric_columns(df):
+    """Applies convert_numbers_if_possible to every column of the DataFrame."""
+    for k in range(df.shape[1]):
+        df.isetitem(k, convert_numbers_if_possible(df.iloc[:, k]))
+    return df
 
 def get_save_path(bank_name, original_pdf_path):
     """Generates a save path in the user's Documents folder."""
+    if isinstance(original_pdf_path, DocumentSession):
+        original_pdf_path = original_pdf_path.name
     docs = os.path.join(os.path.expanduser("~"), "Documents")
     folder = os.path.join(docs, "SMA_TRANSACTION", bank_name)
     os.makedirs(folder, exist_ok=True)
-    filename = os.path.basename(original_pdf_path).replace(".pdf", f"_{bank_name.lower()}.xlsx")
+    # splitext: the extension may be .PDF as well as .pdf
+    filename = os.path.splitext(os.path.basename(original_pdf_path))[0] + f"_{bank_name.lower()}.xlsx"
     return os.path.join(folder, filename)
 
+def write_rows_to_excel(rows, columns, out_path):
+    """Streams rows into an .xlsx file without holding the whole sheet in memory."""
+    from openpyxl import Workbook
+    with stage("excel"):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+        ws.append(columns)
+    # rows is often the parser's own generator: pull each batch outside the
+    # excel stage so parsing isn't booked as writing
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, EXCEL_BATCH_ROWS))
+        if not batch:
+            break
+        with stage("excel", rows=len(batch)):
+            for row in batch:
+                ws.append(row)
+    with stage("excel"):
+        wb.save(out_path)
+    return out_path
+
 def get_cropped_page(page, areas, page_idx):
     """Crops the page if areas are defined for this page or globally."""
     if not areas:
@@ -36,5 +130,35 @@ def get_cropped_page(page, areas, page_idx):
                 bbox = bbox[0]
             else:
                 return page
-        return page.crop(bbox, relative=False, strict=False)
-    return page
\ No newline at end of file
+        from spatial_index import crop_page
+        return crop_page(page, bbox)
+    return page
+
+def open_pdf(pdf_path, password=None):
+    """Opens a PDF with pdfplumber. Accepts a file path, a file-like object or raw bytes."""
+    import pdfplumber
+    if isinstance(pdf_path, (bytes, bytearray)):
+        pdf_path = io.BytesIO(pdf_path)
+    with stage("open"):
+        return pdfplumber.open(pdf_path, password=password)
+
+def release_parsed_objects(pdf):
+    """
+    Drops pdfminer's cache of the PDF objects parsed so far (content streams,
+    images, fonts). pdfplumber keeps it for the life of the document, so it grows
+    with every page read; whatever is still needed gets parsed again.
+    """
+    cache = getattr(pdf.doc, "_cached_objs", None)
+    if cache:
+        cache.clear()
+
+def iter_pages(pdf_path, password=None, start=0, stop=None, progress=None, backend=None):
+    """
+    Yields (page_index, page) for the pages in [start, stop) of the PDF.
+    With the default pdfplumber backend pages come from the extracted-text
+    sidecar (see textlayer), so running another parser on the same statement
+    doesn't extract the text again; backend='pypdfium2' or 'pymupdf' reads
+    the text much faster with those libraries (see text_backends).
+    """
+    from text_backends import iter_backend_pages
+    yield from iter_backend_pages(pdf_path, password, start, stop, progress, backend)